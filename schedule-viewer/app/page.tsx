@@ -1,7 +1,9 @@
 'use client';
 
 import { useEffect, useState, useMemo } from 'react';
-import { loadAllData } from '@/lib/data-loader';
+import { loadAllData, getDateFilterRange } from '@/lib/data-loader';
+import { filterBySearch } from '@/lib/search';
+import { summarizeAggregates, summarizeSchedules } from '@/lib/aggregates';
 import { DashboardData } from '@/lib/types';
 import CalendarGrid from '@/components/CalendarGrid';
 import DashboardFilters from '@/components/DashboardFilters';
@@ -14,30 +16,49 @@ export default function Home() {
 
   // Filter states
   const [selectedTC, setSelectedTC] = useState('');
-  const [selectedDate, setSelectedDate] = useState('');
+  // Start on this week so the first load fetches its shards only; the rest of
+  // history is fetched when "All Dates" is picked
+  const [selectedDate, setSelectedDate] = useState('week');
   const [searchQuery, setSearchQuery] = useState('');
 
+  // Load only the data shards covering the selected date filter
   useEffect(() => {
-    loadAllData()
+    let cancelled = false;
+    loadAllData(getDateFilterRange(selectedDate))
       .then((loadedData) => {
+        if (cancelled) return;
         setData(loadedData);
         setLoading(false);
       })
       .catch((err) => {
+        if (cancelled) return;
         setError(err.message);
         setLoading(false);
       });
-  }, []);
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedDate]);
 
   // Get unique TC names for filter
   const tcNames = useMemo(() => {
     if (!data) return [];
+    if (data.tcNames) return data.tcNames;
     const names = new Set(data.tcSchedules.map((s) => s.tcName));
     return Array.from(names).sort();
   }, [data]);
 
   // Get date range
   const dateRange = useMemo(() => {
+    if (data?.dataStart && data.dataEnd) {
+      const [startYear, startMonth, startDay] = data.dataStart.split('-').map(Number);
+      const [endYear, endMonth, endDay] = data.dataEnd.split('-').map(Number);
+      return {
+        start: new Date(startYear, startMonth - 1, startDay).toLocaleDateString(),
+        end: new Date(endYear, endMonth - 1, endDay).toLocaleDateString(),
+      };
+    }
+
     if (!data || data.tcSchedules.length === 0) {
       return { start: '', end: '' };
     }
@@ -64,52 +85,32 @@ export default function Home() {
     }
 
     // Filter by date
-    if (selectedDate) {
-      const today = new Date();
-      today.setHours(0, 0, 0, 0);
-
+    const range = getDateFilterRange(selectedDate);
+    if (range) {
       filtered = filtered.filter((s) => {
         const scheduleDate = new Date(s.date);
         scheduleDate.setHours(0, 0, 0, 0);
-
-        switch (selectedDate) {
-          case 'today':
-            return scheduleDate.getTime() === today.getTime();
-          case 'week': {
-            const weekFromNow = new Date(today);
-            weekFromNow.setDate(weekFromNow.getDate() + 7);
-            return scheduleDate >= today && scheduleDate <= weekFromNow;
-          }
-          case 'month': {
-            const monthFromNow = new Date(today);
-            monthFromNow.setMonth(monthFromNow.getMonth() + 1);
-            return scheduleDate >= today && scheduleDate <= monthFromNow;
-          }
-          default:
-            return true;
-        }
+        return scheduleDate >= range.start && scheduleDate <= range.end;
       });
     }
 
-    // Filter by search query
+    // Filter by search query, through the search index when available
     if (searchQuery) {
-      const query = searchQuery.toLowerCase();
-      filtered = filtered.filter(
-        (s) =>
-          s.tcName.toLowerCase().includes(query) ||
-          s.location.toLowerCase().includes(query) ||
-          s.address.toLowerCase().includes(query) ||
-          s.appointments.some(
-            (appt) =>
-              appt.patient_full_name.toLowerCase().includes(query) ||
-              appt.appt_care_center_location.toLowerCase().includes(query)
-          )
-      );
+      filtered = filterBySearch(filtered, searchQuery, data.searchIndex);
     }
 
     return filtered;
   }, [data, selectedTC, selectedDate, searchQuery]);
 
+  // Stats from the precomputed aggregates unless a search narrows the schedules
+  const summary = useMemo(() => {
+    if (!data) return null;
+    if (data.aggregates && !searchQuery) {
+      return summarizeAggregates(data.aggregates, selectedTC, getDateFilterRange(selectedDate));
+    }
+    return summarizeSchedules(filteredSchedules);
+  }, [data, selectedTC, selectedDate, searchQuery, filteredSchedules]);
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-gray-50">
@@ -146,7 +147,7 @@ export default function Home() {
         </div>
 
         {/* Stats Overview */}
-        {data && <StatsOverview schedules={filteredSchedules} />}
+        {summary && <StatsOverview summary={summary} />}
 
         {/* Filters */}
         <DashboardFilters
@@ -15,6 +15,20 @@ interface CalendarCell {
   schedule?: TCSchedule;
 }
 
+const getAppointmentSummary = (schedule: TCSchedule): string => {
+  const total = schedule.appointments.length;
+  const consults = schedule.appointments.filter(a => a.is_consult === 'TRUE').length;
+  const regular = total - consults;
+
+  if (consults > 0 && regular > 0) {
+    return `${consults}C, ${regular}R`;
+  } else if (consults > 0) {
+    return `${consults} Consult${consults !== 1 ? 's' : ''}`;
+  } else {
+    return `${regular} Reg${regular !== 1 ? '' : ''}`;
+  }
+};
+
 export default function CalendarGrid({ schedules }: CalendarGridProps) {
   const [selectedCell, setSelectedCell] = useState<TCSchedule | null>(null);
 
@@ -66,6 +80,21 @@ export default function CalendarGrid({ schedules }: CalendarGridProps) {
     return scheduleMap.get(key);
   };
 
+  // Appointment summaries of the visible cells, computed once per data change
+  // rather than on every render
+  const cellSummaries = useMemo(() => {
+    const summaries = new Map<TCSchedule, string>();
+    for (const tcName of uniqueTCs) {
+      for (const date of dateColumns) {
+        const schedule = scheduleMap.get(`${tcName}|${date.toISOString().split('T')[0]}`);
+        if (schedule && !summaries.has(schedule)) {
+          summaries.set(schedule, getAppointmentSummary(schedule));
+        }
+      }
+    }
+    return summaries;
+  }, [uniqueTCs, dateColumns, scheduleMap]);
+
   const calculateTotalHours = (schedule: TCSchedule): string => {
     const start = new Date(`2000-01-01 ${schedule.startTime}`);
     const end = new Date(`2000-01-01 ${schedule.endTime}`);
@@ -73,20 +102,6 @@ export default function CalendarGrid({ schedules }: CalendarGridProps) {
     return `${hours.toFixed(1)}h`;
   };
 
-  const getAppointmentSummary = (schedule: TCSchedule): string => {
-    const total = schedule.appointments.length;
-    const consults = schedule.appointments.filter(a => a.is_consult === 'TRUE').length;
-    const regular = total - consults;
-
-    if (consults > 0 && regular > 0) {
-      return `${consults}C, ${regular}R`;
-    } else if (consults > 0) {
-      return `${consults} Consult${consults !== 1 ? 's' : ''}`;
-    } else {
-      return `${regular} Reg${regular !== 1 ? '' : ''}`;
-    }
-  };
-
   return (
     <>
       <div className="overflow-auto border-2 border-slate-200 rounded-xl bg-white shadow-lg max-h-[calc(100vh-200px)]">
@@ -137,7 +152,7 @@ export default function CalendarGrid({ schedules }: CalendarGridProps) {
                             ⏱ {calculateTotalHours(cellSchedule)}
                           </div>
                           <div className="text-blue-600 font-semibold text-xs bg-blue-50 px-2 py-0.5 rounded inline-block">
-                            {getAppointmentSummary(cellSchedule)}
+                            {cellSummaries.get(cellSchedule)}
                           </div>
                         </div>
                       )}
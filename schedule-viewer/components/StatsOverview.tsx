@@ -1,20 +1,20 @@
-import { TCSchedule } from '@/lib/types';
+import { WorkloadSummary } from '@/lib/types';
 
 interface StatsOverviewProps {
-  schedules: TCSchedule[];
+  summary: WorkloadSummary;
 }
 
-export default function StatsOverview({ schedules }: StatsOverviewProps) {
-  const totalTCs = new Set(schedules.map((s) => s.tcName)).size;
-  const totalAppointments = schedules.reduce((sum, s) => sum + s.appointments.length, 0);
-  const totalLocations = new Set(schedules.map((s) => s.location)).size;
+export default function StatsOverview({ summary }: StatsOverviewProps) {
+  const totalTCs = summary.tcs;
+  const totalAppointments = summary.appointments;
+  const totalLocations = summary.locations;
 
-  const busyTCs = schedules.filter((s) => s.appointments.length >= 5).length;
-  const idleTCs = schedules.filter((s) => s.appointments.length === 0).length;
+  const busyTCs = summary.busy;
+  const idleTCs = summary.idle;
 
   // Data quality metrics
-  const exactMatches = schedules.filter((s) => s.matchQuality === 'exact').length;
-  const matchRate = schedules.length > 0 ? Math.round((exactMatches / schedules.length) * 100) : 0;
+  const exactMatches = summary.exact;
+  const matchRate = summary.schedules > 0 ? Math.round((exactMatches / summary.schedules) * 100) : 0;
 
   return (
     <div className="grid grid-cols-2 md:grid-cols-6 gap-4 mb-6">
@@ -0,0 +1,98 @@
+import { DateFilterRange, TCSchedule, WorkloadAggregates, WorkloadSummary } from './types';
+
+// A schedule with at least this many appointments counts as busy (matches scripts/aggregates.py)
+const BUSY_APPOINTMENTS = 5;
+
+const ISO_DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+
+function toISODate(date: Date): string {
+  const month = String(date.getMonth() + 1).padStart(2, '0');
+  const day = String(date.getDate()).padStart(2, '0');
+  return `${date.getFullYear()}-${month}-${day}`;
+}
+
+// First index in sorted cells whose date is not before `isoDate` (or after, with `after`)
+function dateBound(cells: WorkloadAggregates['cells'], isoDate: string, after: boolean): number {
+  let low = 0;
+  let high = cells.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (cells[mid][0] < isoDate || (after && cells[mid][0] === isoDate)) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  return low;
+}
+
+// Counts for a TC (or all TCs when empty) and date range, summed from the
+// precomputed cells. Cells are sorted by date, so only the range is visited.
+export function summarizeAggregates(
+  aggregates: WorkloadAggregates,
+  tcName: string,
+  range: DateFilterRange | null
+): WorkloadSummary {
+  const column = (measure: string) => aggregates.measures.indexOf(measure) + 3;
+  const columns = {
+    schedules: column('schedules'),
+    appointments: column('appointments'),
+    consults: column('consults'),
+    busy: column('busy'),
+    idle: column('idle'),
+    exact: column('exact'),
+  };
+
+  const { cells } = aggregates;
+  let start = 0;
+  let end = cells.length;
+  if (range) {
+    start = dateBound(cells, toISODate(range.start), false);
+    end = dateBound(cells, toISODate(range.end), true);
+  }
+
+  const tcs = new Set<string>();
+  const locations = new Set<string>();
+  const summary: WorkloadSummary = {
+    tcs: 0, locations: 0, schedules: 0, appointments: 0, consults: 0, busy: 0, idle: 0, exact: 0,
+  };
+  for (let i = start; i < end; i++) {
+    const cell = cells[i];
+    if ((tcName && cell[1] !== tcName) || (range && !ISO_DATE_PATTERN.test(cell[0]))) {
+      continue;
+    }
+    tcs.add(cell[1]);
+    locations.add(cell[2]);
+    summary.schedules += cell[columns.schedules] as number;
+    summary.appointments += cell[columns.appointments] as number;
+    summary.consults += cell[columns.consults] as number;
+    summary.busy += cell[columns.busy] as number;
+    summary.idle += cell[columns.idle] as number;
+    summary.exact += cell[columns.exact] as number;
+  }
+  summary.tcs = tcs.size;
+  summary.locations = locations.size;
+  return summary;
+}
+
+// The same counts computed directly from schedules (used when a search filter is active)
+export function summarizeSchedules(schedules: TCSchedule[]): WorkloadSummary {
+  const tcs = new Set<string>();
+  const locations = new Set<string>();
+  const summary: WorkloadSummary = {
+    tcs: 0, locations: 0, schedules: schedules.length, appointments: 0, consults: 0, busy: 0, idle: 0, exact: 0,
+  };
+  for (const schedule of schedules) {
+    const count = schedule.appointments.length;
+    tcs.add(schedule.tcName);
+    locations.add(schedule.location);
+    summary.appointments += count;
+    summary.consults += schedule.appointments.filter((a) => a.is_consult === 'TRUE').length;
+    if (count >= BUSY_APPOINTMENTS) summary.busy++;
+    if (count === 0) summary.idle++;
+    if (schedule.matchQuality === 'exact') summary.exact++;
+  }
+  summary.tcs = tcs.size;
+  summary.locations = locations.size;
+  return summary;
+}
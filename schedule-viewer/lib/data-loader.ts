@@ -1,5 +1,23 @@
 import Papa from 'papaparse';
-import { JoinedSchedule, TCSchedule, DashboardData } from './types';
+import {
+  JoinedSchedule,
+  TCSchedule,
+  TCSchedulesArtifact,
+  DashboardData,
+  DataShard,
+  ShardManifest,
+  PublishedDataManifest,
+  SearchIndex,
+  WorkloadAggregates,
+  DateFilterRange,
+} from './types';
+
+// Parsed shards by content hash, kept for the lifetime of the page
+const shardCache = new Map<string, Promise<DashboardData>>();
+
+// Search index and aggregates, loaded once per page
+let searchIndexPromise: Promise<SearchIndex | null> | null = null;
+let aggregatesPromise: Promise<WorkloadAggregates | null> | null = null;
 
 export async function loadCSV<T>(url: string): Promise<T[]> {
   const response = await fetch(url);
@@ -19,12 +37,84 @@ export async function loadCSV<T>(url: string): Promise<T[]> {
   });
 }
 
-export async function loadAllData(): Promise<DashboardData> {
+// Date range covered by a date filter value ('' means all dates)
+export function getDateFilterRange(selectedDate: string): DateFilterRange | null {
+  const today = new Date();
+  today.setHours(0, 0, 0, 0);
+
+  switch (selectedDate) {
+    case 'today':
+      return { start: today, end: today };
+    case 'week': {
+      const weekFromNow = new Date(today);
+      weekFromNow.setDate(weekFromNow.getDate() + 7);
+      return { start: today, end: weekFromNow };
+    }
+    case 'month': {
+      const monthFromNow = new Date(today);
+      monthFromNow.setMonth(monthFromNow.getMonth() + 1);
+      return { start: today, end: monthFromNow };
+    }
+    default:
+      return null;
+  }
+}
+
+export async function loadAllData(range: DateFilterRange | null = null): Promise<DashboardData> {
+  const data = await loadScheduleData(range);
+  const [searchIndex, aggregates] = await Promise.all([searchIndexPromise, aggregatesPromise]);
+  return {
+    ...data,
+    ...(searchIndex && { searchIndex }),
+    ...(aggregates && { aggregates }),
+  };
+}
+
+async function loadScheduleData(range: DateFilterRange | null): Promise<DashboardData> {
+  // Content-hashed URLs of the published artifacts, if they have been published
+  const published = await loadPublishedDataManifest('/data/data-manifest.json');
+  const dataUrl = (path: string) => published?.files[path]?.url ?? `/data/${path}`;
+
+  // These cover all dates, so they are fetched once alongside the first load
+  if (!searchIndexPromise) {
+    searchIndexPromise = loadVersionedJSON<SearchIndex>(dataUrl('search_index.json'));
+  }
+  if (!aggregatesPromise) {
+    aggregatesPromise = loadVersionedJSON<WorkloadAggregates>(dataUrl('aggregates.json'));
+  }
+
+  // Fetch only the date shards overlapping the range
+  const manifest = await loadShardManifest(dataUrl('shards/manifest.json'));
+  if (manifest) {
+    const parts = await Promise.all(
+      manifest.shards
+        .filter((shard) => shardOverlaps(shard, range))
+        .map((shard) => loadShard(shard, published))
+    );
+    return {
+      tcSchedules: parts.flatMap((part) => part.tcSchedules),
+      allJoinedData: parts.flatMap((part) => part.allJoinedData),
+      tcNames: manifest.tc_names,
+      dataStart: manifest.start,
+      dataEnd: manifest.end,
+    };
+  }
+
+  // Otherwise the pre-grouped schedules, which need no client-side grouping
+  const artifact = await loadTCSchedulesArtifact(dataUrl('tc_schedules.json'));
+  if (artifact) {
+    return buildDashboardDataFromArtifact(artifact);
+  }
+
   // Load the pre-joined data
-  const joinedData = await loadCSV<JoinedSchedule>('/data/joined_schedules.csv');
+  const joinedData = await loadCSV<JoinedSchedule>(dataUrl('joined_schedules.csv'));
+
+  // join_data.py writes rows in chronological order and marks the file
+  // with a row_order column, so schedules come out already sorted
+  const presorted = joinedData.length > 0 && 'row_order' in joinedData[0];
 
   // Group by TC + date + location to create TC schedules
-  const tcSchedules = buildTCSchedulesFromJoinedData(joinedData);
+  const tcSchedules = buildTCSchedulesFromJoinedData(joinedData, presorted);
 
   return {
     tcSchedules,
@@ -32,7 +122,149 @@ export async function loadAllData(): Promise<DashboardData> {
   };
 }
 
-function buildTCSchedulesFromJoinedData(joinedData: JoinedSchedule[]): TCSchedule[] {
+async function loadVersionedJSON<T extends { version: number }>(url: string): Promise<T | null> {
+  try {
+    const response = await fetch(url);
+    if (!response.ok) {
+      return null;
+    }
+    const artifact = (await response.json()) as T;
+    return artifact.version === 1 ? artifact : null;
+  } catch {
+    return null;
+  }
+}
+
+async function loadPublishedDataManifest(url: string): Promise<PublishedDataManifest | null> {
+  try {
+    // Always revalidate: the pointer manifest is what points at new data
+    const response = await fetch(url, { cache: 'no-cache' });
+    if (!response.ok) {
+      return null;
+    }
+    const manifest = (await response.json()) as PublishedDataManifest;
+    return manifest.version === 1 ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+async function loadShardManifest(url: string): Promise<ShardManifest | null> {
+  try {
+    // Hashed URLs never change content; the unpublished manifest must be revalidated
+    const response = await fetch(url, url.startsWith('/data/published/') ? {} : { cache: 'no-cache' });
+    if (!response.ok) {
+      return null;
+    }
+    const manifest = (await response.json()) as ShardManifest;
+    return manifest.version === 1 ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+function parseISODate(value: string): Date {
+  const [year, month, day] = value.split('-').map(Number);
+  return new Date(year, month - 1, day);
+}
+
+function shardOverlaps(shard: DataShard, range: DateFilterRange | null): boolean {
+  if (!range) {
+    return true;
+  }
+  // Undated shards are only needed when showing all dates
+  if (!shard.start || !shard.end) {
+    return false;
+  }
+  return parseISODate(shard.start) <= range.end && parseISODate(shard.end) >= range.start;
+}
+
+function loadShard(shard: DataShard, published: PublishedDataManifest | null): Promise<DashboardData> {
+  let cached = shardCache.get(shard.sha256);
+  if (!cached) {
+    const url =
+      published?.files[`shards/${shard.file}`]?.url ??
+      `/data/shards/${shard.file}?v=${shard.sha256.slice(0, 16)}`;
+    cached = loadTCSchedulesArtifact(url).then(
+      (artifact) => {
+        if (!artifact) {
+          throw new Error(`Failed to load data shard ${shard.file}`);
+        }
+        return buildDashboardDataFromArtifact(artifact);
+      }
+    );
+    shardCache.set(shard.sha256, cached);
+    // Let a failed shard be retried on the next load
+    cached.catch(() => shardCache.delete(shard.sha256));
+  }
+  return cached;
+}
+
+async function loadTCSchedulesArtifact(url: string): Promise<TCSchedulesArtifact | null> {
+  try {
+    const response = await fetch(url);
+    if (!response.ok) {
+      return null;
+    }
+    const artifact = (await response.json()) as TCSchedulesArtifact;
+    return artifact.version === 1 ? artifact : null;
+  } catch {
+    return null;
+  }
+}
+
+function zipFields(fields: string[], values: string[]): Record<string, string> {
+  const record: Record<string, string> = {};
+  for (let i = 0; i < fields.length; i++) {
+    record[fields[i]] = values[i] ?? '';
+  }
+  return record;
+}
+
+function buildDashboardDataFromArtifact(artifact: TCSchedulesArtifact): DashboardData {
+  // Already grouped, deduplicated and sorted by join_data.py; only expand
+  // each appointment with its schedule's fields
+  const emptyAppointment = zipFields(artifact.appointment_fields, []);
+  const tcSchedules: TCSchedule[] = [];
+  const allJoinedData: JoinedSchedule[] = [];
+
+  for (const [scheduleValues, appointmentCount, appointmentRows] of artifact.schedules) {
+    const schedule = zipFields(artifact.schedule_fields, scheduleValues);
+    const appointments = appointmentRows.map(
+      (values) => ({ ...schedule, ...zipFields(artifact.appointment_fields, values) }) as unknown as JoinedSchedule
+    );
+
+    let matchQuality: 'exact' | 'fuzzy' | 'unmatched' = 'unmatched';
+    if (schedule.match_quality === 'exact') {
+      matchQuality = 'exact';
+    } else if (schedule.match_quality === 'fuzzy') {
+      matchQuality = 'fuzzy';
+    }
+
+    tcSchedules.push({
+      scheduleId: schedule.schedule_id,
+      tcName: schedule.tc_name,
+      date: schedule.date,
+      location: schedule.schedule_location,
+      address: schedule.schedule_address,
+      startTime: schedule.start_time,
+      endTime: schedule.end_time,
+      appointmentCount,
+      appointments,
+      matchQuality,
+    });
+
+    if (appointments.length > 0) {
+      allJoinedData.push(...appointments);
+    } else {
+      allJoinedData.push({ ...schedule, ...emptyAppointment } as unknown as JoinedSchedule);
+    }
+  }
+
+  return { tcSchedules, allJoinedData };
+}
+
+function buildTCSchedulesFromJoinedData(joinedData: JoinedSchedule[], presorted: boolean): TCSchedule[] {
   // Group rows by schedule_id (each schedule can have multiple appointment rows)
   const scheduleMap = new Map<string, JoinedSchedule[]>();
 
@@ -63,6 +295,7 @@ function buildTCSchedulesFromJoinedData(joinedData: JoinedSchedule[]): TCSchedul
     }
 
     schedules.push({
+      scheduleId,
       tcName: firstRow.tc_name,
       date: firstRow.date,
       location: firstRow.schedule_location,
@@ -75,6 +308,11 @@ function buildTCSchedulesFromJoinedData(joinedData: JoinedSchedule[]): TCSchedul
     });
   }
 
+  // Pre-sorted rows give schedules in date, then TC name order already
+  if (presorted) {
+    return schedules;
+  }
+
   // Sort by date, then by TC name
   schedules.sort((a, b) => {
     const dateCompare = new Date(a.date).getTime() - new Date(b.date).getTime();
@@ -0,0 +1,126 @@
+import { SearchIndex, TCSchedule } from './types';
+
+const TOKEN_PATTERN = /[a-z0-9]+/g;
+
+// Shorter query words match most schedules, so they only go through the full check
+const MIN_INDEXED_WORD_LENGTH = 2;
+
+// Vocabulary positions per character bigram, per index
+const bigramCache = new WeakMap<SearchIndex, Map<string, number[]>>();
+
+// Matching schedule positions per query word, per index
+const wordCache = new WeakMap<SearchIndex, Map<string, Set<number>>>();
+
+function bigrams(word: string): string[] {
+  const result: string[] = [];
+  for (let i = 0; i + 2 <= word.length; i++) {
+    result.push(word.slice(i, i + 2));
+  }
+  return result;
+}
+
+// Built on the first query, so each keystroke after that only checks the
+// vocabulary words sharing a bigram with the query word
+function bigramIndex(index: SearchIndex): Map<string, number[]> {
+  let byBigram = bigramCache.get(index);
+  if (!byBigram) {
+    byBigram = new Map();
+    index.tokens.forEach((token, i) => {
+      for (const bigram of new Set(bigrams(token))) {
+        let tokens = byBigram!.get(bigram);
+        if (!tokens) {
+          tokens = [];
+          byBigram!.set(bigram, tokens);
+        }
+        tokens.push(i);
+      }
+    });
+    bigramCache.set(index, byBigram);
+  }
+  return byBigram;
+}
+
+// Vocabulary positions of the words containing `word` (at least MIN_INDEXED_WORD_LENGTH long)
+function tokensContaining(index: SearchIndex, word: string): number[] {
+  const byBigram = bigramIndex(index);
+  let rarest: number[] | undefined;
+  for (const bigram of bigrams(word)) {
+    const tokens = byBigram.get(bigram) ?? [];
+    if (!rarest || tokens.length < rarest.length) {
+      rarest = tokens;
+    }
+  }
+  return (rarest ?? []).filter((i) => index.tokens[i].includes(word));
+}
+
+// The dashboard's search semantics: case-insensitive substring of the TC,
+// location, address or any appointment's patient or care center location
+function matchesQuery(schedule: TCSchedule, query: string): boolean {
+  return (
+    schedule.tcName.toLowerCase().includes(query) ||
+    schedule.location.toLowerCase().includes(query) ||
+    schedule.address.toLowerCase().includes(query) ||
+    schedule.appointments.some(
+      (appt) =>
+        appt.patient_full_name.toLowerCase().includes(query) ||
+        appt.appt_care_center_location.toLowerCase().includes(query)
+    )
+  );
+}
+
+// Positions of schedules with a word containing `word`
+function positionsForWord(index: SearchIndex, word: string): Set<number> {
+  let cache = wordCache.get(index);
+  if (!cache) {
+    cache = new Map();
+    wordCache.set(index, cache);
+  }
+  let positions = cache.get(word);
+  if (!positions) {
+    positions = new Set();
+    for (const i of tokensContaining(index, word)) {
+      for (const position of index.postings[i]) {
+        positions.add(position);
+      }
+    }
+    cache.set(word, positions);
+  }
+  return positions;
+}
+
+// Schedule ids that may match the query, or null if the index can't narrow it down
+function candidateIds(index: SearchIndex, query: string): Set<string> | null {
+  const words = Array.from(new Set(query.match(TOKEN_PATTERN) ?? [])).filter(
+    (word) => word.length >= MIN_INDEXED_WORD_LENGTH
+  );
+  if (words.length === 0) {
+    return null;
+  }
+
+  // Every word of a matching query lies inside one word of the schedule
+  const sets = words.map((word) => positionsForWord(index, word)).sort((a, b) => a.size - b.size);
+  const ids = new Set<string>();
+  for (const position of sets[0]) {
+    if (sets.every((set) => set.has(position))) {
+      ids.add(index.schedule_ids[position]);
+    }
+  }
+  return ids;
+}
+
+export function filterBySearch(
+  schedules: TCSchedule[],
+  searchQuery: string,
+  index?: SearchIndex
+): TCSchedule[] {
+  const query = searchQuery.toLowerCase();
+  const candidates = index ? candidateIds(index, query) : null;
+  if (!candidates) {
+    return schedules.filter((s) => matchesQuery(s, query));
+  }
+
+  // Only candidates need the full check (multi-word queries must match as typed)
+  return schedules.filter(
+    (s) => s.scheduleId !== undefined && candidates.has(s.scheduleId) && matchesQuery(s, query)
+  );
+}
@@ -38,10 +38,14 @@ export interface JoinedSchedule {
   appt_note: string;
   pat_apt_count_all: string;
   assigned_care_center: string;
+
+  // Position in chronological order (present when the file is pre-sorted)
+  row_order?: string;
 }
 
 // Aggregated view for display (grouped by TC + date + location)
 export interface TCSchedule {
+  scheduleId?: string;
   tcName: string;
   date: string;
   location: string;
@@ -53,9 +57,98 @@ export interface TCSchedule {
   matchQuality: 'exact' | 'fuzzy' | 'unmatched';
 }
 
+// Pre-grouped TC schedules written by join_data.py (public/data/tc_schedules.json).
+// Field names are listed once; each schedule is
+// [schedule values, appointment count, appointment value rows].
+export interface TCSchedulesArtifact {
+  version: number;
+  schedule_fields: string[];
+  appointment_fields: string[];
+  schedules: [string[], number, string[][]][];
+}
+
+// Date shards of tc_schedules.json (public/data/shards/manifest.json)
+export interface DataShard {
+  key: string;
+  file: string;
+  start: string;
+  end: string;
+  schedules: number;
+  appointments: number;
+  rows: number;
+  sha256: string;
+}
+
+export interface ShardManifest {
+  version: number;
+  period: 'month' | 'week';
+  start: string;
+  end: string;
+  tc_names: string[];
+  shards: DataShard[];
+}
+
+// public/data/data-manifest.json, written by scripts/publish_data.py
+export interface PublishedFile {
+  url: string;
+  sha256: string;
+  bytes: number;
+  encodings: Record<string, number>;
+}
+
+export interface PublishedDataManifest {
+  version: number;
+  published_at: string;
+  files: Record<string, PublishedFile>;
+}
+
+// Word -> schedule index for the search box (public/data/search_index.json).
+// tokens is sorted; postings[i] lists positions in schedule_ids of the
+// schedules containing tokens[i].
+export interface SearchIndex {
+  version: number;
+  schedule_ids: string[];
+  tokens: string[];
+  postings: number[][];
+}
+
+// Additive workload counts written by join_data.py (public/data/aggregates.json).
+// Each cell is [YYYY-MM-DD, TC name, location, ...counts in `measures` order].
+export interface WorkloadAggregates {
+  version: number;
+  measures: string[];
+  cells: [string, string, string, ...number[]][];
+}
+
+// Counts shown by StatsOverview
+export interface WorkloadSummary {
+  tcs: number;
+  locations: number;
+  schedules: number;
+  appointments: number;
+  consults: number;
+  busy: number;
+  idle: number;
+  exact: number;
+}
+
+export interface DateFilterRange {
+  start: Date;
+  end: Date;
+}
+
 export interface DashboardData {
   tcSchedules: TCSchedule[];
   allJoinedData: JoinedSchedule[];
+
+  // Across all data, when loaded from shards (tcSchedules may cover only part of it)
+  tcNames?: string[];
+  dataStart?: string;
+  dataEnd?: string;
+
+  // Present when join_data.py wrote search_index.json and aggregates.json
+  searchIndex?: SearchIndex;
+  aggregates?: WorkloadAggregates;
 }
 
 // Legacy types for reference (no longer used)
@@ -1,7 +1,91 @@
 import type { NextConfig } from "next";
+import { existsSync, readFileSync } from "fs";
+import path from "path";
+
+// Written by scripts/publish_data.py, which npm runs as the prebuild step
+const PUBLISHED_MANIFEST = path.join(process.cwd(), "public/data/data-manifest.json");
+
+const CONTENT_TYPES: Record<string, string> = {
+  ".csv": "text/csv; charset=utf-8",
+  ".json": "application/json; charset=utf-8",
+};
+
+const ENCODING_EXTENSIONS: Record<string, string> = { br: ".br", gzip: ".gz" };
+
+interface PublishedEntry {
+  url: string;
+  encodings: Record<string, number>;
+}
+
+function loadPublishedFiles(): PublishedEntry[] {
+  if (!existsSync(PUBLISHED_MANIFEST)) {
+    return [];
+  }
+  const manifest = JSON.parse(readFileSync(PUBLISHED_MANIFEST, "utf-8"));
+  return manifest.version === 1 ? Object.values(manifest.files) : [];
+}
+
+function acceptsEncoding(encoding: string) {
+  return { type: "header" as const, key: "accept-encoding", value: `.*\\b${encoding}\\b.*` };
+}
+
+// Conditions for serving an encoding: accepted, and no better encoding available and accepted
+function encodingConditions(entry: PublishedEntry, encoding: string) {
+  const better = encoding === "gzip" && entry.encodings.br !== undefined ? [acceptsEncoding("br")] : [];
+  return { has: [acceptsEncoding(encoding)], missing: better };
+}
+
+const publishedFiles = loadPublishedFiles();
 
 const nextConfig: NextConfig = {
-  /* config options here */
+  // Published data files are content-hashed, so they never change once
+  // deployed; serve their pre-built .br/.gz variants to clients that accept them
+  async headers() {
+    const encodingHeaders = publishedFiles.flatMap((entry) =>
+      Object.keys(entry.encodings)
+        .filter((encoding) => encoding in ENCODING_EXTENSIONS)
+        .map((encoding) => ({
+          source: entry.url,
+          ...encodingConditions(entry, encoding),
+          headers: [
+            { key: "Content-Encoding", value: encoding },
+            { key: "Content-Type", value: CONTENT_TYPES[path.extname(entry.url)] ?? "application/octet-stream" },
+          ],
+        }))
+    );
+
+    return [
+      {
+        source: "/data/published/:file*",
+        headers: [
+          { key: "Cache-Control", value: "public, max-age=31536000, immutable" },
+          { key: "Vary", value: "Accept-Encoding" },
+        ],
+      },
+      {
+        // Points at the current hashed files, so always revalidate
+        source: "/data/data-manifest.json",
+        headers: [{ key: "Cache-Control", value: "no-cache" }],
+      },
+      ...encodingHeaders,
+    ];
+  },
+
+  async rewrites() {
+    return {
+      beforeFiles: publishedFiles.flatMap((entry) =>
+        Object.keys(entry.encodings)
+          .filter((encoding) => encoding in ENCODING_EXTENSIONS)
+          .map((encoding) => ({
+            source: entry.url,
+            ...encodingConditions(entry, encoding),
+            destination: entry.url + ENCODING_EXTENSIONS[encoding],
+          }))
+      ),
+      afterFiles: [],
+      fallback: [],
+    };
+  },
 };
 
 export default nextConfig;
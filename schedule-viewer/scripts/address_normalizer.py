@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Address Normalization
+
+Shared by connecteam_extractor.py and join_data.py so both stages produce
+the same normalized form for addresses and location names.
+
+Normalization lowercases, strips commas and periods, abbreviates common
+street words (street -> st, suite -> ste, northwest -> nw, ...) and
+collapses whitespace. Abbreviations only apply to whole words, so
+"Streetsboro" is left alone. Everything happens in one compiled regex pass,
+and results are memoized in a bounded LRU cache since the same few hundred
+addresses repeat across thousands of shifts.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+# Whole-word abbreviations
+ABBREVIATIONS = {
+    'street': 'st',
+    'avenue': 'ave',
+    'road': 'rd',
+    'drive': 'dr',
+    'boulevard': 'blvd',
+    'suite': 'ste',
+    'northwest': 'nw',
+    'northeast': 'ne',
+    'southwest': 'sw',
+    'southeast': 'se',
+}
+
+# Maximum number of distinct addresses kept in the memo cache
+CACHE_SIZE = 8192
+
+# One pass: drop commas/periods, or abbreviate a whole word
+_TOKEN_PATTERN = re.compile(
+    r"[,.]|\b(" + "|".join(sorted(ABBREVIATIONS, key=len, reverse=True)) + r")\b"
+)
+
+def _replace_token(match: re.Match) -> str:
+    word = match.group(1)
+    return ABBREVIATIONS[word] if word else ''
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address or location name for matching.
+
+    Args:
+        address: Raw address string
+
+    Returns:
+        Normalized address string
+    """
+    if not address:
+        return ""
+
+    normalized = _TOKEN_PATTERN.sub(_replace_token, address.lower())
+
+    # Remove extra whitespace
+    return ' '.join(normalized.split())
+
+def normalize_addresses(addresses: Iterable[str]) -> List[str]:
+    """
+    Normalize many addresses, reusing cached results for repeats.
+
+    Args:
+        addresses: Raw address strings
+
+    Returns:
+        Normalized address strings, in input order
+    """
+    return [normalize_address(address) for address in addresses]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Workload Aggregates
+
+Builds public/data/aggregates.json from the grouped TC schedules: the
+counts StatsOverview shows, pre-summed so the dashboard doesn't rescan every
+schedule and appointment to get them.
+
+Every count is additive. The base cells are one per (date, TC, location);
+summing the cells in any date range, optionally for one TC, gives that
+range's totals. Distinct TC and location counts are the distinct keys of
+the non-empty cells.
+
+    {
+      "version": 1,
+      "measures": ["schedules", "appointments", ...],
+      "cells": [["2025-07-01", "<tc>", "<location>", <measures...>], ...]
+    }
+
+Dates are YYYY-MM-DD (unparseable dates are kept as they appear in the
+schedule data).
+"""
+
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from join_records import format_date_for_comparison
+from tc_schedules import write_atomic
+
+AGGREGATES_VERSION = 1
+AGGREGATES_FILE = 'public/data/aggregates.json'
+
+# A schedule with at least this many appointments counts as busy
+BUSY_APPOINTMENTS = 5
+
+MEASURES = (
+    'schedules',     # TC schedules
+    'appointments',  # appointments across those schedules
+    'consults',      # appointments with is_consult TRUE
+    'busy',          # schedules with BUSY_APPOINTMENTS or more appointments
+    'idle',          # schedules without appointments
+    'exact',         # schedules by match quality
+    'fuzzy',
+    'unmatched',
+)
+
+def _add(total: List[int], counts: Sequence[int]) -> None:
+    for i, count in enumerate(counts):
+        total[i] += count
+
+def schedule_measures(match_quality: str, appointment_count: int, consult_count: int) -> Tuple[int, ...]:
+    """Get one schedule's contribution to each measure, in MEASURES order."""
+    return (
+        1,
+        appointment_count,
+        consult_count,
+        int(appointment_count >= BUSY_APPOINTMENTS),
+        int(appointment_count == 0),
+        int(match_quality == 'exact'),
+        int(match_quality == 'fuzzy'),
+        int(match_quality not in ('exact', 'fuzzy')),
+    )
+
+class AggregatesBuilder:
+    """Sums the base cells one grouped schedule at a time (a TCScheduleAggregator sink)."""
+
+    def __init__(self, schedule_fields: Sequence[str], appointment_fields: Sequence[str]):
+        self.date_column = schedule_fields.index('date')
+        self.tc_column = schedule_fields.index('tc_name')
+        self.location_column = schedule_fields.index('schedule_location')
+        self.quality_column = schedule_fields.index('match_quality')
+        self.consult_column = appointment_fields.index('is_consult')
+        self.cells: Dict[Tuple[str, str, str], List[int]] = {}
+
+    def add(self, entry: Sequence[Any]) -> None:
+        """Add a schedule: (schedule values, appointment value rows, ...), as held by TCScheduleAggregator."""
+        schedule_values, appointments = entry[0], entry[1]
+        key = (format_date_for_comparison(schedule_values[self.date_column]),
+               schedule_values[self.tc_column], schedule_values[self.location_column])
+        consults = sum(1 for appointment in appointments if appointment[self.consult_column] == 'TRUE')
+        measures = schedule_measures(schedule_values[self.quality_column], len(appointments), consults)
+        _add(self.cells.setdefault(key, [0] * len(MEASURES)), measures)
+
+    def build(self) -> Dict[str, Any]:
+        """Get the cells, sorted by date, ready to serialize."""
+        cells = self.cells
+        return {
+            'version': AGGREGATES_VERSION,
+            'measures': list(MEASURES),
+            'cells': [[*key, *cells[key]] for key in sorted(cells)],
+        }
+
+def write_aggregates(aggregates: Dict[str, Any], filename: str = AGGREGATES_FILE) -> None:
+    """Write the aggregates compactly (atomically, as they are read by publish_data.py)."""
+    write_atomic(filename, json.dumps(aggregates, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
@@ -12,11 +12,25 @@ import csv
 import datetime
 import time
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import logging
 import sys
 import json
+import hashlib
+import shutil
+import argparse
+import threading
+import random
+import tempfile
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import date
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from address_normalizer import normalize_address
+from schedule_store import ScheduleStore, STORE_FILE as SCHEDULE_STORE_FILE, SHIFT_COLUMNS
+from run_report import RunReport, latency_bucket
 
 # Configure logging
 logging.basicConfig(
@@ -49,14 +63,401 @@ print(DAYS_OF_DATA)
 # Output files
 OUTPUT_FILE = "public/data/schedule_data.csv"
 LOCATION_MAPPING_FILE = "data-pipelines/connecteam/location_mapping.csv"
+# Incremental extraction state (updateTime watermark, last full reconcile)
+STATE_FILE = "data-pipelines/connecteam/extraction_state.json"
+# On-disk cache for users, jobs and schedulers
+REFERENCE_CACHE_DIR = "data-pipelines/connecteam/cache"
+# Persistent user directory used to resolve assignedUserIds
+USER_DIRECTORY_FILE = "data-pipelines/connecteam/cache/user_directory.json"
+# Per-month shift partitions and their manifest
+PARTITION_DIR = "data-pipelines/connecteam/partitions"
+PARTITION_MANIFEST_FILE = "data-pipelines/connecteam/partitions/manifest.json"
 
-# CSV field names (matching the provided CSV structure)
-CSV_FIELDS = [
-    "id", "assignedUsers", "startDateTime", "endDateTime", "startDate", "endDate",
-    "startTime", "endTime", "timeZone", "isOpenShift", "title", "location",
-    "address", "normalized_address", "jobId", "isPublished", "updatedDateTime",
-    "createdDateTime", "shiftName"
-]
+# Partitioned mode: months that ended more than this many days ago are frozen
+FREEZE_AFTER_DAYS = 45
+
+# Incremental mode: force a full reconcile (catches deleted shifts) this often
+FULL_RECONCILE_DAYS = 7
+# Re-fetch changes this far behind the watermark to tolerate clock skew
+WATERMARK_OVERLAP_SECONDS = 300
+# Ask for the most recently changed shifts first so incremental paging can
+# stop at the watermark. If the API ignores these, pages arrive unsorted and
+# paging simply continues to the end of the window.
+INCREMENTAL_SORT_PARAMS = {"sort": "updateTime", "order": "desc"}
+
+# Request quota shared by every Connecteam call (requests per second).
+# Override with --rate-limit if the account's quota changes.
+RATE_LIMIT_PER_SECOND = 10
+# Number of concurrent fetch threads (1 = sequential extraction)
+DEFAULT_WORKERS = 1
+# Page size for the shifts endpoint
+SHIFTS_PAGE_LIMIT = 500
+
+# HTTP transport: keep-alive pool, timeouts and retry policy
+CONNECTION_POOL_SIZE = 10
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# How long cached reference data is used without revalidating (seconds)
+REFERENCE_CACHE_TTL_SECONDS = {
+    USERS_ENDPOINT: 24 * 3600,
+    JOBS_ENDPOINT: 24 * 3600,
+    SCHEDULERS_ENDPOINT: 6 * 3600
+}
+
+# Re-crawl the full users directory when it is older than this
+USER_DIRECTORY_MAX_AGE_DAYS = 7
+# Maximum user IDs per targeted users lookup
+USER_LOOKUP_BATCH_SIZE = 100
+
+# Time zone used for shifts that do not carry a valid timezone
+DEFAULT_TIME_ZONE = "America/New_York"
+
+# CSV field names (matching the provided CSV structure, and the schedule store's shifts table)
+CSV_FIELDS = list(SHIFT_COLUMNS)
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket shared by all Connecteam requests.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    request takes one token, blocking until one is available, so concurrent
+    workers together never exceed the API quota.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+        self.set_rate(rate, capacity)
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Reconfigure the bucket and refill it.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        with self.lock:
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(rate, 1.0)
+            self.tokens = self.capacity
+            self.updated = time.monotonic()
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for the given number of seconds.
+
+        Used when the API signals throttling so every worker backs off,
+        not just the one that received the 429.
+
+        Args:
+            seconds: How long to pause
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            # No tokens accrue while paused
+            self.tokens = min(self.tokens, 1.0)
+            self.updated = max(self.updated, self.paused_until)
+
+    def acquire(self) -> None:
+        """Block until a request token is available and consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait_seconds = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+# Shared limiter gating every API request made by this script
+rate_limiter = TokenBucketRateLimiter(RATE_LIMIT_PER_SECOND)
+
+class ConnecteamClient:
+    """
+    Shared HTTP transport for all Connecteam fetchers.
+
+    Reuses keep-alive connections from a pooled session, takes a token from
+    the shared rate limiter before every attempt, and retries timeouts,
+    connection errors and 429/5xx responses with jittered exponential backoff
+    (honoring Retry-After when the server sends it). Latency and retry counts
+    are recorded per endpoint template.
+    """
+
+    def __init__(self, limiter: TokenBucketRateLimiter, pool_size: int = CONNECTION_POOL_SIZE,
+                 max_retries: int = MAX_RETRIES):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.set_pool_size(pool_size)
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.stats_lock = threading.Lock()
+
+    def set_pool_size(self, pool_size: int) -> None:
+        """
+        Size the keep-alive connection pool (should be at least the worker count).
+
+        Args:
+            pool_size: Maximum number of pooled connections per host
+        """
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _record(self, endpoint: str, elapsed: Optional[float] = None, retried: bool = False,
+                failed: bool = False, waited: float = 0.0) -> None:
+        """Record one attempt against an endpoint (waited: time spent waiting on the rate limiter)."""
+        with self.stats_lock:
+            stats = self.stats.setdefault(endpoint, {
+                "requests": 0, "retries": 0, "failures": 0,
+                "total_seconds": 0.0, "max_seconds": 0.0, "rate_limit_wait_seconds": 0.0,
+                "latency_histogram": {}
+            })
+            stats["requests"] += 1
+            stats["rate_limit_wait_seconds"] += waited
+            if elapsed is not None:
+                stats["total_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+                bucket = latency_bucket(elapsed)
+                stats["latency_histogram"][bucket] = stats["latency_histogram"].get(bucket, 0) + 1
+            if retried:
+                stats["retries"] += 1
+            if failed:
+                stats["failures"] += 1
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Compute how long to wait before the next attempt.
+
+        Args:
+            attempt: Zero-based attempt number that just failed
+            response: Response that triggered the retry, if any
+
+        Returns:
+            Delay in seconds
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    try:
+                        retry_at = parsedate_to_datetime(retry_after)
+                        delay = retry_at.timestamp() - time.time()
+                    except (TypeError, ValueError):
+                        delay = None
+                if delay is not None:
+                    return min(max(delay, 0.0), BACKOFF_MAX_SECONDS)
+
+        # Equal jitter: half the exponential step plus a random share of the rest
+        step = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+        return step / 2 + random.uniform(0, step / 2)
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **path_params: Any) -> Any:
+        """
+        GET an endpoint and return its parsed JSON body.
+
+        Args:
+            endpoint: Endpoint template, e.g. SHIFTS_ENDPOINT (used as the stats key)
+            params: Query parameters
+            **path_params: Values substituted into the endpoint template
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries
+        """
+        response = self.request(endpoint, params=params, **path_params)
+        return response.json()
+
+    def request(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                headers: Optional[Dict[str, str]] = None, **path_params: Any) -> requests.Response:
+        """
+        GET an endpoint with retries and return the raw response.
+
+        Args:
+            endpoint: Endpoint template, e.g. SHIFTS_ENDPOINT (used as the stats key)
+            params: Query parameters
+            headers: Extra request headers (e.g. conditional request validators)
+            **path_params: Values substituted into the endpoint template
+
+        Returns:
+            Successful (2xx/3xx) response
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries
+        """
+        url = f"{BASE_URL}{endpoint.format(**path_params)}"
+
+        for attempt in range(self.max_retries + 1):
+            is_last_attempt = attempt == self.max_retries
+            wait_started = time.monotonic()
+            self.limiter.acquire()
+            started = time.monotonic()
+            waited = started - wait_started
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(endpoint, time.monotonic() - started, retried=not is_last_attempt,
+                             failed=is_last_attempt, waited=waited)
+                if is_last_attempt:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"{e.__class__.__name__} on {url} (attempt {attempt + 1}/{self.max_retries + 1}), "
+                               f"retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            elapsed = time.monotonic() - started
+            if response.status_code in RETRY_STATUS_CODES and not is_last_attempt:
+                self._record(endpoint, elapsed, retried=True, waited=waited)
+                delay = self._backoff_delay(attempt, response)
+                logger.warning(f"HTTP {response.status_code} from {url} (attempt {attempt + 1}/{self.max_retries + 1}), "
+                               f"retrying in {delay:.1f}s")
+                if response.status_code == 429:
+                    # Throttling applies to the whole API key, so hold every worker
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            self._record(endpoint, elapsed, failed=not response.ok, waited=waited)
+            response.raise_for_status()
+            return response
+
+    def log_stats(self) -> None:
+        """Log request count, retries and latency for each endpoint."""
+        with self.stats_lock:
+            for endpoint, stats in sorted(self.stats.items()):
+                avg = stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+                logger.info(f"Endpoint {endpoint}: {stats['requests']} requests, {stats['retries']} retries, "
+                            f"{stats['failures']} failures, avg {avg:.3f}s, max {stats['max_seconds']:.3f}s, "
+                            f"{stats['rate_limit_wait_seconds']:.1f}s waiting on the rate limiter")
+
+# Shared transport used by every fetcher
+api_client = ConnecteamClient(rate_limiter)
+
+class ReferenceDataCache:
+    """
+    Persistent on-disk cache for reference endpoints (users, jobs, schedulers).
+
+    Responses are stored per endpoint and query parameters. Fresh entries
+    (younger than the endpoint's TTL) are served without a request; stale
+    entries are revalidated with If-None-Match / If-Modified-Since when the
+    server supplied validators, so an unchanged page costs a bodiless 304.
+    Within a run each distinct request is made at most once.
+    """
+
+    def __init__(self, client: ConnecteamClient, cache_dir: str, ttls: Dict[str, int]):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.ttls = ttls
+        self.force_revalidate = False
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = set()
+        self.fetched_this_run = set()
+        self.lock = threading.Lock()
+
+    def _cache_file(self, endpoint: str) -> str:
+        """Get the cache filename for an endpoint."""
+        name = endpoint.strip("/").replace("/", "_")
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load(self, endpoint: str) -> Dict[str, Any]:
+        """Load an endpoint's cache entries from disk (once per run)."""
+        if endpoint not in self.entries:
+            try:
+                with open(self._cache_file(endpoint), 'r', encoding='utf-8') as f:
+                    self.entries[endpoint] = json.load(f)
+            except FileNotFoundError:
+                self.entries[endpoint] = {}
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable cache for {endpoint}: {e}")
+                self.entries[endpoint] = {}
+        return self.entries[endpoint]
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Get a reference endpoint's parsed JSON body, using the cache when possible.
+
+        Args:
+            endpoint: Endpoint template (also selects the TTL)
+            params: Query parameters
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after all retries
+        """
+        key = json.dumps(params or {}, sort_keys=True)
+        with self.lock:
+            entries = self._load(endpoint)
+            entry = entries.get(key)
+            ttl = self.ttls.get(endpoint, 0)
+
+            # Serve from cache if already fetched this run or still fresh
+            if entry is not None:
+                if (endpoint, key) in self.fetched_this_run:
+                    return entry["data"]
+                if not self.force_revalidate and time.time() - entry["fetched_at"] < ttl:
+                    logger.debug(f"Cache hit for {endpoint} {key}")
+                    self.fetched_this_run.add((endpoint, key))
+                    return entry["data"]
+
+            # Revalidate stale entries with their validators
+            headers = {}
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            response = self.client.request(endpoint, params=params, headers=headers)
+            self.fetched_this_run.add((endpoint, key))
+
+            if response.status_code == 304 and entry is not None:
+                logger.debug(f"Cache revalidated for {endpoint} {key}")
+                entry["fetched_at"] = time.time()
+            else:
+                entry = {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                    "data": response.json()
+                }
+                entries[key] = entry
+            self.dirty.add(endpoint)
+            return entry["data"]
+
+    def save(self) -> None:
+        """Write every endpoint cache touched during this run to disk."""
+        with self.lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for endpoint in sorted(self.dirty):
+                with atomic_write(self._cache_file(endpoint), encoding='utf-8') as f:
+                    json.dump(self.entries[endpoint], f)
+            if self.dirty:
+                logger.info(f"Saved reference data cache for {len(self.dirty)} endpoints to {self.cache_dir}")
+            self.dirty.clear()
+
+# Shared cache for users, jobs and schedulers
+reference_cache = ReferenceDataCache(api_client, REFERENCE_CACHE_DIR, REFERENCE_CACHE_TTL_SECONDS)
+
+# Schedulers whose shifts could not be fetched during this run
+failed_scheduler_ids = set()
 
 def get_unix_timestamp(days_offset: int) -> int:
     """
@@ -71,6 +472,63 @@ def get_unix_timestamp(days_offset: int) -> int:
     target_date = datetime.datetime.now() + datetime.timedelta(days=days_offset)
     return int(target_date.timestamp())
 
+def extract_users(response_data: Any) -> List[Dict[str, Any]]:
+    """
+    Extract the list of users from a users endpoint response.
+
+    Args:
+        response_data: Parsed JSON response
+
+    Returns:
+        List of user objects (empty if none found)
+    """
+    users = []
+    if isinstance(response_data, dict):
+        if "data" in response_data:
+            if isinstance(response_data["data"], list):
+                users = response_data["data"]
+            elif isinstance(response_data["data"], dict) and "users" in response_data["data"]:
+                users = response_data["data"]["users"]
+        elif "users" in response_data:
+            users = response_data["users"]
+        elif "items" in response_data:
+            users = response_data["items"]
+    elif isinstance(response_data, list):
+        users = response_data
+    return users
+
+def add_user_entry(user_map: Dict[str, Dict[str, Any]], user: Dict[str, Any]) -> Optional[str]:
+    """
+    Add a user object to the user map.
+
+    Args:
+        user_map: Dictionary mapping user IDs to user details (updated in place)
+        user: Raw user object from API
+
+    Returns:
+        The user's ID, or None if it has none
+    """
+    # Check for userId first, then fall back to id
+    user_id = str(user.get("userId", user.get("id", "")))
+    if not user_id:
+        return None
+
+    first_name = user.get("firstName", "")
+    last_name = user.get("lastName", "")
+    full_name = f"{first_name} {last_name}".strip()
+
+    user_map[user_id] = {
+        "name": full_name if full_name else user.get("email", ""),
+        "firstName": first_name,
+        "lastName": last_name,
+        "email": user.get("email", ""),
+        "phone": user.get("phoneNumber", user.get("phone", ""))
+    }
+
+    # Debug log for user mapping
+    logger.debug(f"Mapped user ID {user_id} to name: {full_name}")
+    return user_id
+
 def get_all_users() -> Dict[str, Dict[str, Any]]:
     """
     Retrieve all users from the Connecteam API and create a mapping of user IDs to user details.
@@ -94,25 +552,10 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
                 "offset": offset
             }
 
-            
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            response_data = response.json()
+            response_data = reference_cache.get(USERS_ENDPOINT, params=params)
             
             # Extract users based on the response structure
-            users = []
-            if isinstance(response_data, dict):
-                if "data" in response_data:
-                    if isinstance(response_data["data"], list):
-                        users = response_data["data"]
-                    elif isinstance(response_data["data"], dict) and "users" in response_data["data"]:
-                        users = response_data["data"]["users"]
-                elif "users" in response_data:
-                    users = response_data["users"]
-                elif "items" in response_data:
-                    users = response_data["items"]
-            elif isinstance(response_data, list):
-                users = response_data
+            users = extract_users(response_data)
             
             if not users:
                 logger.warning("No users found in response structure")
@@ -120,23 +563,7 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
                 
             # Add users to the mapping - use userId instead of id
             for user in users:
-                # Check for userId first, then fall back to id
-                user_id = str(user.get("userId", user.get("id", "")))
-                if user_id:
-                    first_name = user.get("firstName", "")
-                    last_name = user.get("lastName", "")
-                    full_name = f"{first_name} {last_name}".strip()
-                    
-                    user_map[user_id] = {
-                        "name": full_name if full_name else user.get("email", ""),
-                        "firstName": first_name,
-                        "lastName": last_name,
-                        "email": user.get("email", ""),
-                        "phone": user.get("phoneNumber", user.get("phone", ""))
-                    }
-                    
-                    # Debug log for user mapping
-                    logger.debug(f"Mapped user ID {user_id} to name: {full_name}")
+                add_user_entry(user_map, user)
             
             total_users += len(users)
             
@@ -148,7 +575,6 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
                 break
                 
             offset += limit
-            time.sleep(0.5)  # Add a small delay to avoid rate limiting
         
         logger.info(f"Successfully retrieved {total_users} users ({len(user_map)} unique IDs)")
         
@@ -165,6 +591,121 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
             logger.error(f"Response body: {e.response.text}")
         return {}
 
+class UserResolver:
+    """
+    Resolves assignedUserIds to names from a persistent local user directory.
+
+    The directory is seeded by a full users crawl only when it is missing or
+    older than USER_DIRECTORY_MAX_AGE_DAYS. IDs not in the directory are
+    batched into targeted users lookups as shift pages arrive, and the
+    formatted name string is memoized per unique assignee tuple. IDs that
+    still cannot be resolved are warned about once each.
+    """
+
+    def __init__(self, client: ConnecteamClient, directory_file: str):
+        self.client = client
+        self.directory_file = directory_file
+        self.user_map: Dict[str, Dict[str, Any]] = {}
+        self.synced_at = 0.0
+        self.unresolved = set()
+        self.names_by_assignees: Dict[Tuple[str, ...], str] = {}
+        self.dirty = False
+
+    def load(self) -> None:
+        """Load the user directory from disk."""
+        try:
+            with open(self.directory_file, 'r', encoding='utf-8') as f:
+                directory = json.load(f)
+            self.user_map = directory.get("users", {})
+            self.synced_at = directory.get("synced_at", 0.0)
+            logger.info(f"Loaded {len(self.user_map)} users from {self.directory_file}")
+        except FileNotFoundError:
+            logger.info(f"No user directory at {self.directory_file}")
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring unreadable user directory {self.directory_file}: {e}")
+
+    def save(self) -> None:
+        """Write the user directory to disk if it changed."""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.directory_file) or ".", exist_ok=True)
+        with atomic_write(self.directory_file, encoding='utf-8') as f:
+            json.dump({"synced_at": self.synced_at, "users": self.user_map}, f)
+        logger.info(f"Saved {len(self.user_map)} users to {self.directory_file}")
+        self.dirty = False
+
+    def needs_full_sync(self) -> bool:
+        """Check whether the directory is missing or too old to trust."""
+        return not self.user_map or time.time() - self.synced_at >= USER_DIRECTORY_MAX_AGE_DAYS * 86400
+
+    def sync_all(self) -> None:
+        """Replace the directory with a full users crawl."""
+        user_map = get_all_users()
+        if user_map:
+            self.user_map = user_map
+            self.synced_at = time.time()
+            self.names_by_assignees.clear()
+            self.dirty = True
+
+    def resolve_missing(self, shifts: List[Dict[str, Any]]) -> None:
+        """
+        Look up any assignedUserIds in these shifts that are not in the directory.
+
+        Args:
+            shifts: Raw shift objects
+        """
+        missing = []
+        seen = set()
+        for shift in shifts:
+            for user_id in shift.get("assignedUserIds") or []:
+                user_id = str(user_id)
+                if user_id not in self.user_map and user_id not in self.unresolved and user_id not in seen:
+                    seen.add(user_id)
+                    missing.append(user_id)
+
+        for i in range(0, len(missing), USER_LOOKUP_BATCH_SIZE):
+            batch = missing[i:i + USER_LOOKUP_BATCH_SIZE]
+            logger.info(f"Looking up {len(batch)} users not in the directory")
+            try:
+                response_data = self.client.get(USERS_ENDPOINT, params={"userIds": batch, "limit": len(batch)})
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error looking up users {', '.join(batch)}: {e}")
+                response_data = None
+
+            for user in extract_users(response_data):
+                if add_user_entry(self.user_map, user):
+                    self.dirty = True
+
+            for user_id in batch:
+                if user_id not in self.user_map:
+                    logger.warning(f"User ID {user_id} not found in Connecteam")
+                    self.unresolved.add(user_id)
+
+    def get_assigned_users(self, user_ids: Tuple[str, ...]) -> str:
+        """
+        Format the assigned users string for a tuple of user IDs.
+
+        Args:
+            user_ids: Assigned user IDs in shift order
+
+        Returns:
+            Comma-separated names ("User <id>" for unresolved IDs)
+        """
+        names = self.names_by_assignees.get(user_ids)
+        if names is None:
+            user_names = []
+            for user_id in user_ids:
+                if user_id in self.user_map:
+                    user_names.append(self.user_map[user_id]["name"])
+                else:
+                    user_names.append(f"User {user_id}")
+            names = ", ".join(filter(None, user_names))
+            self.names_by_assignees[user_ids] = names
+        return names
+
+# Shared resolver for assignedUserIds
+user_resolver = UserResolver(api_client, USER_DIRECTORY_FILE)
+
 def get_all_schedulers() -> List[Dict[str, Any]]:
     """
     Retrieve all schedulers from the Connecteam API.
@@ -176,9 +717,7 @@ def get_all_schedulers() -> List[Dict[str, Any]]:
     logger.info(f"Fetching schedulers from {url}")
     
     try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        schedulers = response.json()
+        schedulers = reference_cache.get(SCHEDULERS_ENDPOINT)
         logger.info(f"Successfully retrieved schedulers response")
         
         # Debug the structure of the response
@@ -192,7 +731,146 @@ def get_all_schedulers() -> List[Dict[str, Any]]:
             logger.error(f"Response body: {e.response.text}")
         return []
 
-def get_shifts_for_scheduler(scheduler_id: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
+def extract_shifts(response_data: Any) -> List[Dict[str, Any]]:
+    """
+    Extract the list of shifts from a shifts endpoint response.
+
+    Args:
+        response_data: Parsed JSON response
+
+    Returns:
+        List of shift objects (empty if none found)
+    """
+    shifts = []
+    if isinstance(response_data, dict):
+        # Check for common response patterns
+        if "data" in response_data and "shifts" in response_data["data"]:
+            shifts = response_data["data"]["shifts"]
+        elif "data" in response_data and isinstance(response_data["data"], list):
+            shifts = response_data["data"]
+        elif "shifts" in response_data:
+            shifts = response_data["shifts"]
+        elif "items" in response_data:
+            shifts = response_data["items"]
+    elif isinstance(response_data, list):
+        shifts = response_data
+    return shifts
+
+def get_shift_change_time(shift: Dict[str, Any]) -> int:
+    """
+    Get the last time a shift was changed (updateTime, falling back to creationTime).
+
+    Args:
+        shift: Raw shift data from API
+
+    Returns:
+        Unix timestamp in seconds (0 if unknown)
+    """
+    return int(shift.get("updateTime") or shift.get("creationTime") or 0)
+
+def is_page_past_watermark(shifts: List[Dict[str, Any]], updated_since: int) -> bool:
+    """
+    Check whether a page of newest-first shifts has reached the watermark.
+
+    Only trusted when the page really is sorted by change time descending, so
+    an API that ignores the sort parameters never cuts paging short.
+
+    Args:
+        shifts: Shifts on one page
+        updated_since: Watermark as Unix timestamp
+
+    Returns:
+        True if later pages can only contain unchanged shifts
+    """
+    if not shifts:
+        return True
+    change_times = [get_shift_change_time(shift) for shift in shifts]
+    is_sorted = all(a >= b for a, b in zip(change_times, change_times[1:]))
+    return is_sorted and change_times[-1] <= updated_since
+
+def fetch_shifts_page(scheduler_id: str, start_time: int, end_time: int, offset: int,
+                      limit: int = SHIFTS_PAGE_LIMIT, incremental: bool = False) -> List[Dict[str, Any]]:
+    """
+    Retrieve a single page of shifts for a scheduler.
+
+    Args:
+        scheduler_id: ID of the scheduler
+        start_time: Start time as Unix timestamp
+        end_time: End time as Unix timestamp
+        offset: Pagination offset
+        limit: Page size
+        incremental: Request most recently changed shifts first
+
+    Returns:
+        List of shift objects on this page
+
+    Raises:
+        requests.exceptions.RequestException: If the request still fails after retries
+    """
+    params = {
+        "startTime": start_time,
+        "endTime": end_time,
+        "limit": limit,
+        "offset": offset
+    }
+    if incremental:
+        params.update(INCREMENTAL_SORT_PARAMS)
+
+    response_data = api_client.get(SHIFTS_ENDPOINT, params=params, scheduler_id=scheduler_id)
+    shifts = extract_shifts(response_data)
+
+    # Log the structure of the first shift for debugging
+    if shifts and offset == 0:
+        logger.info(f"First shift structure: {json.dumps(shifts[0])}")
+
+        # Specifically log assignedUserIds if present
+        if "assignedUserIds" in shifts[0]:
+            logger.info(f"First shift assignedUserIds: {shifts[0]['assignedUserIds']}")
+
+    return shifts
+
+def iter_shift_pages(scheduler_id: str, start_time: int, end_time: int,
+                     updated_since: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield a scheduler's shifts one page at a time.
+
+    Args:
+        scheduler_id: ID of the scheduler
+        start_time: Start time as Unix timestamp
+        end_time: End time as Unix timestamp
+        updated_since: If set, stop paging once pages only hold shifts changed before this
+
+    Yields:
+        Non-empty pages of shift objects
+
+    Raises:
+        requests.exceptions.RequestException: If a page still fails after retries
+    """
+    incremental = updated_since is not None
+    offset = 0
+    limit = SHIFTS_PAGE_LIMIT
+
+    # Use pagination to get all shifts
+    while True:
+        shifts = fetch_shifts_page(scheduler_id, start_time, end_time, offset, limit, incremental)
+
+        if not shifts:
+            break
+
+        yield shifts
+
+        # Check if we've reached the end of the pagination
+        if len(shifts) < limit:
+            break
+
+        # In incremental mode, stop once the remaining pages are unchanged
+        if incremental and is_page_past_watermark(shifts, updated_since):
+            break
+
+        offset += limit
+
+def get_shifts_for_scheduler(scheduler_id: str, start_time: int, end_time: int,
+                             updated_since: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Retrieve shifts for a specific scheduler within the given time range.
     
@@ -200,66 +878,18 @@ def get_shifts_for_scheduler(scheduler_id: str, start_time: int, end_time: int)
         scheduler_id: ID of the scheduler
         start_time: Start time as Unix timestamp
         end_time: End time as Unix timestamp
+        updated_since: If set, stop paging once pages only hold shifts changed before this
         
     Returns:
         List of shift objects
     """
-    url = f"{BASE_URL}{SHIFTS_ENDPOINT.format(scheduler_id=scheduler_id)}"
-    
     all_shifts = []
-    offset = 0
-    limit = 500  # Use a reasonable page size
     
     logger.info(f"Fetching shifts for scheduler {scheduler_id} from {start_time} to {end_time}")
     
     try:
-        # Use pagination to get all shifts
-        while True:
-            params = {
-                "startTime": start_time,
-                "endTime": end_time,
-                "limit": limit,
-                "offset": offset
-            }
-            
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            response_data = response.json()
-            
-            # Extract shifts based on the response structure
-            shifts = []
-            if isinstance(response_data, dict):
-                # Check for common response patterns
-                if "data" in response_data and "shifts" in response_data["data"]:
-                    shifts = response_data["data"]["shifts"]
-                elif "data" in response_data and isinstance(response_data["data"], list):
-                    shifts = response_data["data"]
-                elif "shifts" in response_data:
-                    shifts = response_data["shifts"]
-                elif "items" in response_data:
-                    shifts = response_data["items"]
-            elif isinstance(response_data, list):
-                shifts = response_data
-            
-            if not shifts:
-                break
-                
-            # Log the structure of the first shift for debugging
-            if shifts and offset == 0:
-                logger.info(f"First shift structure: {json.dumps(shifts[0])}")
-                
-                # Specifically log assignedUserIds if present
-                if "assignedUserIds" in shifts[0]:
-                    logger.info(f"First shift assignedUserIds: {shifts[0]['assignedUserIds']}")
-            
+        for shifts in iter_shift_pages(scheduler_id, start_time, end_time, updated_since):
             all_shifts.extend(shifts)
-            
-            # Check if we've reached the end of the pagination
-            if len(shifts) < limit:
-                break
-                
-            offset += limit
-            time.sleep(0.5)  # Add a small delay to avoid rate limiting
         
         logger.info(f"Successfully retrieved {len(all_shifts)} shifts for scheduler {scheduler_id}")
         return all_shifts
@@ -268,55 +898,263 @@ def get_shifts_for_scheduler(scheduler_id: str, start_time: int, end_time: int)
         if hasattr(e, 'response') and e.response:
             logger.error(f"Response status: {e.response.status_code}")
             logger.error(f"Response body: {e.response.text}")
+        failed_scheduler_ids.add(scheduler_id)
         return []
 
-def format_datetime(timestamp: Optional[int]) -> str:
+def iter_shift_pages_concurrently(scheduler_ids: List[str], start_time: int, end_time: int, workers: int,
+                                  updated_since: Optional[int] = None) -> Iterator[Tuple[str, int, List[Dict[str, Any]]]]:
     """
-    Format Unix timestamp to M/D/YY H:MM format.
-    
+    Yield shift pages for all schedulers as a thread pool fetches them.
+
+    Every page is its own task, so pages from different schedulers are fetched
+    in parallel; a full page schedules the next page of the same scheduler,
+    and a scheduler's last page starts the next scheduler. At most `workers`
+    pages are in flight, so at most that many are held before the caller
+    consumes them. All requests share the module rate limiter. Pages arrive
+    in completion order. Schedulers with a failed page are added to
+    failed_scheduler_ids and not paged further.
+
     Args:
-        timestamp: Unix timestamp in seconds
-        
-    Returns:
-        Formatted date string
+        scheduler_ids: IDs of the schedulers to fetch
+        start_time: Start time as Unix timestamp
+        end_time: End time as Unix timestamp
+        workers: Number of worker threads
+        updated_since: If set, stop paging once pages only hold shifts changed before this
+
+    Yields:
+        (scheduler_id, offset, shifts) for each fetched page
     """
-    if not timestamp:
-        return ""
-    
-    dt = datetime.datetime.fromtimestamp(timestamp)
-    return dt.strftime("%-m/%-d/%y %-H:%M")
+    limit = SHIFTS_PAGE_LIMIT
+    incremental = updated_since is not None
+
+    logger.info(f"Fetching shifts for {len(scheduler_ids)} schedulers with {workers} workers "
+                f"from {start_time} to {end_time}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Dict[Future, Tuple[str, int]] = {}
+        queued = iter(scheduler_ids)
+
+        def submit(scheduler_id: str, offset: int) -> None:
+            future = executor.submit(fetch_shifts_page, scheduler_id, start_time, end_time, offset, limit,
+                                     incremental)
+            pending[future] = (scheduler_id, offset)
+
+        def submit_next_scheduler() -> None:
+            scheduler_id = next(queued, None)
+            if scheduler_id is not None:
+                submit(scheduler_id, 0)
 
-def format_date(timestamp: Optional[int]) -> str:
+        for _ in range(workers):
+            submit_next_scheduler()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                scheduler_id, offset = pending.pop(future)
+                try:
+                    shifts = future.result()
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Error fetching shifts for scheduler {scheduler_id} at offset {offset}: {e}")
+                    if hasattr(e, 'response') and e.response:
+                        logger.error(f"Response status: {e.response.status_code}")
+                        logger.error(f"Response body: {e.response.text}")
+                    failed_scheduler_ids.add(scheduler_id)
+                    submit_next_scheduler()
+                    continue
+
+                # A full page means there may be more; queue the next one
+                # (in incremental mode, only while pages are still changed)
+                if (len(shifts) == limit and scheduler_id not in failed_scheduler_ids
+                        and not (incremental and is_page_past_watermark(shifts, updated_since))):
+                    submit(scheduler_id, offset + limit)
+                else:
+                    submit_next_scheduler()
+
+                if shifts:
+                    yield scheduler_id, offset, shifts
+
+def get_shifts_concurrently(scheduler_ids: List[str], start_time: int, end_time: int,
+                            workers: int, updated_since: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Format Unix timestamp to M/D/YY format.
-    
+    Retrieve shifts for all schedulers using a thread pool.
+
+    As in the sequential path, a scheduler with a failed page contributes no shifts.
+
     Args:
-        timestamp: Unix timestamp in seconds
-        
+        scheduler_ids: IDs of the schedulers to fetch
+        start_time: Start time as Unix timestamp
+        end_time: End time as Unix timestamp
+        workers: Number of worker threads
+        updated_since: If set, stop paging once pages only hold shifts changed before this
+
     Returns:
-        Formatted date string
+        Dictionary mapping scheduler IDs to their shifts, in scheduler_ids order
     """
-    if not timestamp:
-        return ""
-    
-    dt = datetime.datetime.fromtimestamp(timestamp)
-    return dt.strftime("%-m/%-d/%y")
+    pages: Dict[str, Dict[int, List[Dict[str, Any]]]] = {scheduler_id: {} for scheduler_id in scheduler_ids}
+    for scheduler_id, offset, shifts in iter_shift_pages_concurrently(scheduler_ids, start_time, end_time,
+                                                                      workers, updated_since):
+        pages[scheduler_id][offset] = shifts
+
+    shifts_by_scheduler = {}
+    for scheduler_id in scheduler_ids:
+        if scheduler_id in failed_scheduler_ids:
+            shifts_by_scheduler[scheduler_id] = []
+            continue
+        scheduler_shifts = []
+        for offset in sorted(pages[scheduler_id]):
+            scheduler_shifts.extend(pages[scheduler_id][offset])
+        shifts_by_scheduler[scheduler_id] = scheduler_shifts
+        logger.info(f"Successfully retrieved {len(scheduler_shifts)} shifts for scheduler {scheduler_id}")
+
+    return shifts_by_scheduler
 
-def format_time(timestamp: Optional[int]) -> str:
+def iter_all_shift_pages(scheduler_ids: List[str], start_time: int, end_time: int,
+                         workers: int) -> Iterator[List[Dict[str, Any]]]:
     """
-    Format Unix timestamp to H:MM:SS AM/PM format.
-    
+    Yield shift pages for every scheduler, sequentially or on a thread pool.
+
+    Used by streaming mode, so pages are handed on as soon as they arrive.
+    A scheduler that fails part-way keeps the pages already yielded.
+
     Args:
-        timestamp: Unix timestamp in seconds
-        
-    Returns:
-        Formatted time string
+        scheduler_ids: IDs of the schedulers to fetch
+        start_time: Start time as Unix timestamp
+        end_time: End time as Unix timestamp
+        workers: Number of worker threads (1 = sequential)
+
+    Yields:
+        Pages of shift objects
     """
-    if not timestamp:
-        return ""
-    
-    dt = datetime.datetime.fromtimestamp(timestamp)
-    return dt.strftime("%-I:%M:%S %p")
+    if workers > 1:
+        for _, _, shifts in iter_shift_pages_concurrently(scheduler_ids, start_time, end_time, workers):
+            yield shifts
+        return
+
+    for scheduler_id in scheduler_ids:
+        logger.info(f"Fetching shifts for scheduler {scheduler_id} from {start_time} to {end_time}")
+        try:
+            yield from iter_shift_pages(scheduler_id, start_time, end_time)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching shifts for scheduler {scheduler_id}: {e}")
+            if hasattr(e, 'response') and e.response:
+                logger.error(f"Response status: {e.response.status_code}")
+                logger.error(f"Response body: {e.response.text}")
+            failed_scheduler_ids.add(scheduler_id)
+
+class TimestampFormatter:
+    """
+    Formats shift timestamps in each shift's own time zone.
+
+    ZoneInfo objects are cached by name, and the date and clock components
+    are memoized per (zone, minute), so shifts that start or end on the same
+    minute reuse one conversion. Output is independent of the host's local
+    time zone.
+    """
+
+    def __init__(self, default_zone: str):
+        self.default_zone = default_zone
+        self.zones: Dict[str, datetime.tzinfo] = {}
+        self.minutes: Dict[Tuple[str, int], Tuple[str, str, str, str, str]] = {}
+
+    def get_zone(self, zone_name: str) -> datetime.tzinfo:
+        """
+        Get a cached ZoneInfo, falling back to the default zone for unknown names.
+
+        Args:
+            zone_name: IANA time zone name
+
+        Returns:
+            Time zone object
+        """
+        zone = self.zones.get(zone_name)
+        if zone is None:
+            try:
+                zone = ZoneInfo(zone_name or self.default_zone)
+            except (ZoneInfoNotFoundError, ValueError):
+                logger.warning(f"Unknown time zone '{zone_name}', using {self.default_zone}")
+                zone = ZoneInfo(self.default_zone)
+            self.zones[zone_name] = zone
+        return zone
+
+    def _minute_components(self, zone_name: str, minute: int) -> Tuple[str, str, str, str, str]:
+        """
+        Get (M/D/YY, H:MM, HH:MM, I:MM, AM/PM) for a minute in a zone, memoized.
+
+        Args:
+            zone_name: IANA time zone name
+            minute: Unix timestamp divided by 60
+
+        Returns:
+            Date, 24-hour unpadded, 24-hour padded and 12-hour clock strings, and meridiem
+        """
+        key = (zone_name, minute)
+        components = self.minutes.get(key)
+        if components is None:
+            dt = datetime.datetime.fromtimestamp(minute * 60, self.get_zone(zone_name))
+            hour_12 = dt.hour % 12 or 12
+            components = (
+                f"{dt.month}/{dt.day}/{dt.year % 100:02d}",
+                f"{dt.hour}:{dt.minute:02d}",
+                f"{dt.hour:02d}:{dt.minute:02d}",
+                f"{hour_12}:{dt.minute:02d}",
+                "PM" if dt.hour >= 12 else "AM"
+            )
+            self.minutes[key] = components
+        return components
+
+    def format_shift(self, shift: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Format all of a shift's timestamps in its time zone.
+
+        Args:
+            shift: Raw shift data from API
+
+        Returns:
+            Dictionary of the formatted CSV timestamp fields
+        """
+        zone_name = shift.get("timezone", "") or ""
+        fields = {}
+
+        for prefix, key in (("start", "startTime"), ("end", "endTime")):
+            timestamp = shift.get(key)
+            if timestamp:
+                timestamp = int(timestamp)
+                date_str, clock_24, _, clock_12, meridiem = self._minute_components(zone_name, timestamp // 60)
+                fields[f"{prefix}DateTime"] = f"{date_str} {clock_24}"
+                fields[f"{prefix}Date"] = date_str
+                fields[f"{prefix}Time"] = f"{clock_12}:{timestamp % 60:02d} {meridiem}"
+            else:
+                fields[f"{prefix}DateTime"] = ""
+                fields[f"{prefix}Date"] = ""
+                fields[f"{prefix}Time"] = ""
+
+        for field, key in (("createdDateTime", "creationTime"), ("updatedDateTime", "updateTime")):
+            timestamp = shift.get(key)
+            if timestamp:
+                date_str, _, clock_24_padded, _, _ = self._minute_components(zone_name, int(timestamp) // 60)
+                fields[field] = f"{date_str} {clock_24_padded}"
+            else:
+                fields[field] = ""
+
+        return fields
+
+    def format_datetime(self, timestamp: Optional[int]) -> str:
+        """
+        Format a Unix timestamp as M/D/YY H:MM in the default time zone, for log messages.
+
+        Args:
+            timestamp: Unix timestamp in seconds
+
+        Returns:
+            Formatted date and time string
+        """
+        if not timestamp:
+            return ""
+        date_str, clock_24, _, _, _ = self._minute_components(self.default_zone, int(timestamp) // 60)
+        return f"{date_str} {clock_24}"
+
+# Shared formatter for shift timestamps
+timestamp_formatter = TimestampFormatter(DEFAULT_TIME_ZONE)
 
 def get_all_jobs() -> Dict[str, Dict[str, Any]]:
     """
@@ -340,9 +1178,7 @@ def get_all_jobs() -> Dict[str, Dict[str, Any]]:
                 "offset": offset
             }
 
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            response_data = response.json()
+            response_data = reference_cache.get(JOBS_ENDPOINT, params=params)
 
             # Extract jobs based on response structure
             jobs = []
@@ -400,7 +1236,6 @@ def get_all_jobs() -> Dict[str, Dict[str, Any]]:
                 break
 
             offset += limit
-            time.sleep(0.5)
 
         logger.info(f"Successfully retrieved {total_jobs} jobs ({len(job_map)} unique IDs)")
         return job_map
@@ -411,47 +1246,6 @@ def get_all_jobs() -> Dict[str, Dict[str, Any]]:
             logger.error(f"Response body: {e.response.text}")
         return {}
 
-def normalize_address(address: str) -> str:
-    """
-    Normalize address for better matching.
-
-    Args:
-        address: Raw address string
-
-    Returns:
-        Normalized address string
-    """
-    if not address:
-        return ""
-
-    # Convert to lowercase
-    normalized = address.lower()
-
-    # Replace common abbreviations
-    replacements = {
-        ' street': ' st',
-        ' avenue': ' ave',
-        ' road': ' rd',
-        ' drive': ' dr',
-        ' boulevard': ' blvd',
-        ' suite': ' ste',
-        ' northwest': ' nw',
-        ' northeast': ' ne',
-        ' southwest': ' sw',
-        ' southeast': ' se',
-        ',': '',
-        '.': '',
-        '  ': ' '
-    }
-
-    for old, new in replacements.items():
-        normalized = normalized.replace(old, new)
-
-    # Remove extra whitespace
-    normalized = ' '.join(normalized.split())
-
-    return normalized.strip()
-
 def get_scheduler_details() -> Dict[str, str]:
     """
     Get scheduler details including names.
@@ -465,9 +1259,7 @@ def get_scheduler_details() -> Dict[str, str]:
     scheduler_map = {}
     
     try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        response_data = response.json()
+        response_data = reference_cache.get(SCHEDULERS_ENDPOINT)
         
         schedulers = []
         if isinstance(response_data, dict):
@@ -496,14 +1288,14 @@ def get_scheduler_details() -> Dict[str, str]:
             logger.error(f"Response body: {e.response.text}")
         return {}
 
-def transform_shift_data(shift: Dict[str, Any], user_map: Dict[str, Dict[str, Any]],
+def transform_shift_data(shift: Dict[str, Any], users: UserResolver,
                         scheduler_name_map: Dict[str, str], job_map: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
     Transform shift data to match the CSV structure.
 
     Args:
         shift: Raw shift data from API
-        user_map: Dictionary mapping user IDs to user details
+        users: Resolver mapping user IDs to names
         scheduler_name_map: Dictionary mapping scheduler IDs to scheduler names
         job_map: Dictionary mapping job IDs to job details
 
@@ -516,31 +1308,16 @@ def transform_shift_data(shift: Dict[str, Any], user_map: Dict[str, Dict[str, An
     assigned_users = ""
     if "assignedUserIds" in shift and shift["assignedUserIds"]:
         # Extract user IDs from the list
-        user_ids = [str(user_id) for user_id in shift["assignedUserIds"]]
-        
-        # Map user IDs to names
-        user_names = []
-        for user_id in user_ids:
-            if user_id in user_map:
-                user_names.append(user_map[user_id]["name"])
-                logger.debug(f"Mapped user ID {user_id} to name: {user_map[user_id]['name']} for shift {shift_id}")
-            else:
-                logger.warning(f"User ID {user_id} not found in user map for shift {shift_id}")
-                user_names.append(f"User {user_id}")
+        user_ids = tuple(str(user_id) for user_id in shift["assignedUserIds"])
         
-        assigned_users = ", ".join(filter(None, user_names))
+        # Map user IDs to names (memoized per assignee tuple)
+        assigned_users = users.get_assigned_users(user_ids)
         logger.debug(f"Shift {shift_id} assigned users: {assigned_users}")
     else:
         logger.debug(f"Shift {shift_id} has no assignedUserIds")
     
-    # Format timestamps
-    start_timestamp = shift.get("startTime")
-    end_timestamp = shift.get("endTime")
-    created_timestamp = shift.get("creationTime")
-    updated_timestamp = shift.get("updateTime")
-    
-    start_datetime = format_datetime(start_timestamp)
-    end_datetime = format_datetime(end_timestamp)
+    # Format timestamps in the shift's own time zone
+    timestamps = timestamp_formatter.format_shift(shift)
     
     # Extract location information and jobId
     location_name = ""
@@ -576,17 +1353,6 @@ def transform_shift_data(shift: Dict[str, Any], user_map: Dict[str, Dict[str, An
     scheduler_id = shift.get("schedulerId", "")
     shift_name = scheduler_name_map.get(str(scheduler_id), "")
     
-    # Format timestamps for created and updated
-    created_datetime = ""
-    if created_timestamp:
-        created_dt = datetime.datetime.fromtimestamp(created_timestamp)
-        created_datetime = created_dt.strftime("%-m/%-d/%y %H:%M")
-        
-    updated_datetime = ""
-    if updated_timestamp:
-        updated_dt = datetime.datetime.fromtimestamp(updated_timestamp)
-        updated_datetime = updated_dt.strftime("%-m/%-d/%y %H:%M")
-    
     # Normalize the address for better matching
     normalized_address = normalize_address(address)
 
@@ -594,12 +1360,12 @@ def transform_shift_data(shift: Dict[str, Any], user_map: Dict[str, Dict[str, An
     return {
         "id": shift_id,
         "assignedUsers": assigned_users,
-        "startDateTime": start_datetime,
-        "endDateTime": end_datetime,
-        "startDate": format_date(start_timestamp),
-        "endDate": format_date(end_timestamp),
-        "startTime": format_time(start_timestamp),
-        "endTime": format_time(end_timestamp),
+        "startDateTime": timestamps["startDateTime"],
+        "endDateTime": timestamps["endDateTime"],
+        "startDate": timestamps["startDate"],
+        "endDate": timestamps["endDate"],
+        "startTime": timestamps["startTime"],
+        "endTime": timestamps["endTime"],
         "timeZone": shift.get("timezone", ""),
         "isOpenShift": "1" if shift.get("isOpenShift") else "0",
         "title": shift.get("title", ""),
@@ -608,11 +1374,38 @@ def transform_shift_data(shift: Dict[str, Any], user_map: Dict[str, Dict[str, An
         "normalized_address": normalized_address,
         "jobId": job_id,
         "isPublished": "1" if shift.get("isPublished") else "0",
-        "updatedDateTime": updated_datetime,
-        "createdDateTime": created_datetime,
+        "updatedDateTime": timestamps["updatedDateTime"],
+        "createdDateTime": timestamps["createdDateTime"],
         "shiftName": shift_name
     }
 
+@contextmanager
+def atomic_write(filename: str, encoding: str = 'utf-8-sig') -> Iterator[Any]:
+    """
+    Open a temp file next to `filename` and rename it into place on success.
+
+    Readers never see a truncated file: if writing fails, the temp file is
+    removed and the previous file is left untouched.
+
+    Args:
+        filename: Final output filename
+        encoding: Text encoding
+
+    Yields:
+        Writable text file object
+    """
+    directory = os.path.dirname(filename) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding=encoding) as f:
+            yield f
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def write_to_csv(shifts: List[Dict[str, Any]], filename: str) -> None:
     """
     Write shifts data to CSV file.
@@ -624,7 +1417,7 @@ def write_to_csv(shifts: List[Dict[str, Any]], filename: str) -> None:
     logger.info(f"Writing {len(shifts)} shifts to {filename}")
 
     try:
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        with atomic_write(filename) as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
             writer.writeheader()
             writer.writerows(shifts)
@@ -646,17 +1439,37 @@ def write_location_mapping(shifts: List[Dict[str, Any]], filename: str) -> None:
     # Extract unique locations
     location_map = {}
     for shift in shifts:
-        address = shift.get("address", "")
-        if address and address not in location_map:
-            location_map[address] = {
-                "address": address,
-                "normalized_address": shift.get("normalized_address", ""),
-                "location_name": shift.get("location", ""),
-                "jobId": shift.get("jobId", "")
-            }
+        add_location_mapping(location_map, shift)
+
+    write_location_map(location_map, filename)
+
+def add_location_mapping(location_map: Dict[str, Dict[str, str]], shift: Dict[str, Any]) -> None:
+    """
+    Record a shift's location in the mapping if its address is new.
+
+    Args:
+        location_map: Dictionary mapping addresses to location rows (updated in place)
+        shift: Transformed shift data
+    """
+    address = shift.get("address", "")
+    if address and address not in location_map:
+        location_map[address] = {
+            "address": address,
+            "normalized_address": shift.get("normalized_address", ""),
+            "location_name": shift.get("location", ""),
+            "jobId": shift.get("jobId", "")
+        }
+
+def write_location_map(location_map: Dict[str, Dict[str, str]], filename: str) -> None:
+    """
+    Write accumulated location mappings to CSV file.
 
+    Args:
+        location_map: Dictionary mapping addresses to location rows
+        filename: Output CSV filename
+    """
     try:
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        with atomic_write(filename) as csvfile:
             fieldnames = ["address", "normalized_address", "location_name", "jobId"]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
@@ -666,6 +1479,379 @@ def write_location_mapping(shifts: List[Dict[str, Any]], filename: str) -> None:
         logger.error(f"Error writing location mapping: {e}")
         raise
 
+def load_extraction_state(filename: str) -> Dict[str, Any]:
+    """
+    Load incremental extraction state (watermark and last full reconcile time).
+
+    Args:
+        filename: State JSON filename
+
+    Returns:
+        State dictionary (empty if the file does not exist or is unreadable)
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (ValueError, OSError) as e:
+        logger.warning(f"Ignoring unreadable extraction state {filename}: {e}")
+        return {}
+
+def save_extraction_state(state: Dict[str, Any], filename: str) -> None:
+    """
+    Save incremental extraction state.
+
+    Args:
+        state: State dictionary
+        filename: State JSON filename
+    """
+    with atomic_write(filename, encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    logger.info(f"Saved extraction state to {filename}: {state}")
+
+def load_existing_shifts(filename: str) -> List[Dict[str, str]]:
+    """
+    Load previously extracted shifts from CSV.
+
+    Args:
+        filename: Existing CSV filename
+
+    Returns:
+        List of shift rows (empty if the file does not exist)
+    """
+    try:
+        with open(filename, 'r', newline='', encoding='utf-8-sig') as csvfile:
+            return list(csv.DictReader(csvfile))
+    except FileNotFoundError:
+        return []
+
+def merge_shifts(existing_shifts: List[Dict[str, Any]], changed_shifts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge changed shifts into existing shifts by id.
+
+    Changed shifts replace existing rows in place; new shifts are appended.
+
+    Args:
+        existing_shifts: Previously extracted shift rows
+        changed_shifts: Newly transformed shift rows
+
+    Returns:
+        Merged list of shift rows
+    """
+    merged = list(existing_shifts)
+    position_by_id = {shift.get("id", ""): i for i, shift in enumerate(merged)}
+
+    for shift in changed_shifts:
+        shift_id = shift.get("id", "")
+        if shift_id in position_by_id:
+            merged[position_by_id[shift_id]] = shift
+        else:
+            position_by_id[shift_id] = len(merged)
+            merged.append(shift)
+
+    return merged
+
+def keep_failed_scheduler_shifts(shifts: List[Dict[str, Any]], previous_shifts: List[Dict[str, Any]],
+                                 failed_scheduler_names: set) -> List[Dict[str, Any]]:
+    """
+    Add the previous rows of schedulers whose shifts could not be fetched.
+
+    A failed scheduler contributes no shifts to the run, so rewriting the
+    output from the fetched shifts alone would silently drop all of its rows.
+    Rows are matched to schedulers by shiftName (the scheduler name); rows
+    whose id was fetched this run are not repeated.
+
+    Args:
+        shifts: Transformed shift rows fetched this run
+        previous_shifts: Previously extracted shift rows
+        failed_scheduler_names: Names of the schedulers that failed
+
+    Returns:
+        The fetched rows followed by the kept previous rows
+    """
+    fetched_ids = {shift.get("id", "") for shift in shifts}
+    kept = [shift for shift in previous_shifts
+            if shift.get("shiftName", "") in failed_scheduler_names and shift.get("id", "") not in fetched_ids]
+    if kept:
+        logger.warning(f"Keeping {len(kept)} previously extracted shifts of {len(failed_scheduler_names)} "
+                       f"failed schedulers")
+    return shifts + kept
+
+def get_failed_scheduler_names(scheduler_name_map: Dict[str, str]) -> set:
+    """Get the shiftName values of the schedulers that failed this run."""
+    return {scheduler_name_map.get(scheduler_id, "") for scheduler_id in failed_scheduler_ids}
+
+def get_partition_key(shift: Dict[str, Any]) -> str:
+    """
+    Get the month partition (YYYY-MM) a transformed shift belongs to.
+
+    Args:
+        shift: Transformed shift row
+
+    Returns:
+        Partition key, or "undated" if the start date is missing
+    """
+    try:
+        month, _, year = shift.get("startDate", "").split('/')
+        return f"20{year}-{int(month):02d}" if len(year) == 2 else f"{year}-{int(month):02d}"
+    except ValueError:
+        return "undated"
+
+def get_next_month(month_start: date) -> date:
+    """
+    Get the first day of the month after month_start.
+
+    Args:
+        month_start: First day of a month
+
+    Returns:
+        First day of the following month
+    """
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+def get_freeze_horizon(freeze_after_days: int) -> date:
+    """
+    Get the date months must end by to be frozen.
+
+    Counted from today's date in UTC, so every host freezes the same months.
+    Partition keys come from each shift's local date, which is at most a day
+    off UTC, well inside the freeze delay.
+
+    Args:
+        freeze_after_days: Days a month must have been over before it is frozen
+
+    Returns:
+        Freeze horizon date
+    """
+    today_utc = datetime.datetime.now(datetime.timezone.utc).date()
+    return today_utc - datetime.timedelta(days=freeze_after_days)
+
+def is_partition_closed(key: str, freeze_before: date) -> bool:
+    """
+    Check whether a month partition ended before the freeze horizon.
+
+    Args:
+        key: Partition key (YYYY-MM)
+        freeze_before: Months ending on or before this date are closed
+
+    Returns:
+        True if the partition can be frozen
+    """
+    try:
+        month_start = datetime.datetime.strptime(key, "%Y-%m").date()
+    except ValueError:
+        return False
+    return get_next_month(month_start) <= freeze_before
+
+def load_partition_manifest(filename: str) -> Dict[str, Any]:
+    """
+    Load the partition manifest.
+
+    Args:
+        filename: Manifest JSON filename
+
+    Returns:
+        Manifest dictionary with a "partitions" mapping
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    manifest.setdefault("partitions", {})
+    return manifest
+
+def get_first_open_month(start_time: int, frozen_keys: set) -> int:
+    """
+    Get the start of the first month in the window that is not frozen.
+
+    Months are taken in UTC, independent of the host's time zone. Fetching
+    starts a day before the month starts in UTC, so it covers the month's
+    first day in every shift time zone; rows of the frozen month before it
+    are ignored by write_partitions().
+
+    Args:
+        start_time: Window start as Unix timestamp
+        frozen_keys: Partition keys that are frozen
+
+    Returns:
+        Unix timestamp to start fetching from (never earlier than start_time)
+    """
+    utc = datetime.timezone.utc
+    month = datetime.datetime.fromtimestamp(start_time, utc).date().replace(day=1)
+    if month.strftime("%Y-%m") not in frozen_keys:
+        return start_time
+    while month.strftime("%Y-%m") in frozen_keys:
+        month = get_next_month(month)
+    month_start_time = int(datetime.datetime.combine(month, datetime.time(), utc).timestamp()) - 86400
+    return max(start_time, month_start_time)
+
+def write_partitions(shifts: List[Dict[str, Any]], manifest: Dict[str, Any], freeze_before: date,
+                     failed_scheduler_names: Optional[set] = None) -> None:
+    """
+    Rewrite the open month partitions and freeze those past the horizon.
+
+    Frozen partitions are left untouched and their rows in `shifts` are
+    ignored. Open partitions that no longer have any shifts are removed.
+
+    If any scheduler failed to fetch, the run is incomplete: the failed
+    schedulers' rows are kept in the open partitions, and no partition is
+    frozen or removed, so the next run refetches those months.
+
+    Args:
+        shifts: Transformed shift rows covering every open month
+        manifest: Partition manifest (updated in place)
+        freeze_before: Months ending on or before this date are frozen after writing
+        failed_scheduler_names: shiftName values of the schedulers that failed this run
+    """
+    partitions = manifest["partitions"]
+    frozen_keys = {key for key, entry in partitions.items() if entry.get("frozen")}
+    incomplete = bool(failed_scheduler_names)
+
+    shifts_by_month: Dict[str, List[Dict[str, Any]]] = {}
+    for shift in shifts:
+        key = get_partition_key(shift)
+        if key not in frozen_keys:
+            shifts_by_month.setdefault(key, []).append(shift)
+
+    if incomplete:
+        for key, entry in partitions.items():
+            if key in frozen_keys:
+                continue
+            previous_shifts = load_existing_shifts(os.path.join(PARTITION_DIR, entry["file"]))
+            month_shifts = keep_failed_scheduler_shifts(shifts_by_month.get(key, []), previous_shifts,
+                                                        failed_scheduler_names)
+            if month_shifts:
+                shifts_by_month[key] = month_shifts
+        logger.warning("Schedulers failed to fetch, so no partition is frozen or removed this run")
+
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+
+    # Open partitions with no remaining shifts were emptied by deletions
+    # (unless a failed scheduler's shifts are missing from them)
+    removed_keys = [] if incomplete else [key for key in partitions
+                                          if key not in frozen_keys and key not in shifts_by_month]
+    for key in removed_keys:
+        filename = os.path.join(PARTITION_DIR, partitions[key]["file"])
+        if os.path.exists(filename):
+            os.remove(filename)
+        del partitions[key]
+        logger.info(f"Removed empty partition {key}")
+
+    written_at = datetime.datetime.now().isoformat(timespec="seconds")
+    for key, month_shifts in sorted(shifts_by_month.items()):
+        file_name = f"shifts_{key}.csv"
+        filename = os.path.join(PARTITION_DIR, file_name)
+        with atomic_write(filename) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(month_shifts)
+        with open(filename, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+
+        frozen = not incomplete and is_partition_closed(key, freeze_before)
+        partitions[key] = {
+            "file": file_name,
+            "rows": len(month_shifts),
+            "sha256": content_hash,
+            "frozen": frozen,
+            "written_at": written_at
+        }
+        logger.info(f"Wrote {len(month_shifts)} shifts to partition {key}{' (frozen)' if frozen else ''}")
+
+    with atomic_write(PARTITION_MANIFEST_FILE, encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Updated partition manifest {PARTITION_MANIFEST_FILE} ({len(partitions)} partitions, "
+                f"{len(frozen_keys)} frozen before this run)")
+
+def concatenate_partitions(manifest: Dict[str, Any], filename: str) -> int:
+    """
+    Build the output CSV by concatenating every partition in month order.
+
+    Args:
+        manifest: Partition manifest
+        filename: Output CSV filename
+
+    Returns:
+        Total number of shift rows written
+    """
+    total_rows = 0
+    with atomic_write(filename) as out:
+        csv.writer(out).writerow(CSV_FIELDS)
+        out.flush()
+        for key, entry in sorted(manifest["partitions"].items()):
+            with open(os.path.join(PARTITION_DIR, entry["file"]), 'r', newline='', encoding='utf-8-sig') as part:
+                part.readline()  # Skip the partition's header
+                shutil.copyfileobj(part, out)
+            total_rows += entry["rows"]
+    logger.info(f"Concatenated {len(manifest['partitions'])} partitions ({total_rows} shifts) into {filename}")
+    return total_rows
+
+def stream_shifts_to_csv(pages: Iterator[List[Dict[str, Any]]], users: UserResolver,
+                         scheduler_name_map: Dict[str, str], job_map: Dict[str, Dict[str, Any]],
+                         filename: str, location_mapping_filename: str) -> Dict[str, int]:
+    """
+    Transform shift pages as they arrive and write them straight to CSV.
+
+    Only the current page (and the ids written) is held in memory. Rows go
+    to a temp file that is renamed over `filename` once every page has been
+    written, so a crash mid-run leaves the previous CSV in place. Schedulers
+    that failed to fetch keep their rows from the previous CSV.
+
+    Args:
+        pages: Iterator of raw shift pages
+        users: Resolver mapping user IDs to names
+        scheduler_name_map: Dictionary mapping scheduler IDs to scheduler names
+        job_map: Dictionary mapping job IDs to job details
+        filename: Output CSV filename
+        location_mapping_filename: Location mapping CSV filename
+
+    Returns:
+        Dictionary with total shifts, shifts with empty assignedUsers, and the max change time seen
+    """
+    logger.info(f"Streaming shifts to {filename}")
+    stats = {"shifts": 0, "empty_assigned_users": 0, "watermark": 0}
+    location_map: Dict[str, Dict[str, str]] = {}
+    written_ids = set()
+
+    with atomic_write(filename) as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for page in pages:
+            users.resolve_missing(page)
+            for shift in page:
+                stats["watermark"] = max(stats["watermark"], get_shift_change_time(shift))
+                transformed = transform_shift_data(shift, users, scheduler_name_map, job_map)
+                writer.writerow(transformed)
+                add_location_mapping(location_map, transformed)
+                written_ids.add(transformed["id"])
+                stats["shifts"] += 1
+                if not transformed["assignedUsers"]:
+                    stats["empty_assigned_users"] += 1
+
+        # Failures are only known once every page has arrived; the previous
+        # CSV is still in place, so copy the failed schedulers' rows from it
+        if failed_scheduler_ids:
+            failed_scheduler_names = get_failed_scheduler_names(scheduler_name_map)
+            kept = 0
+            if os.path.exists(filename):
+                with open(filename, 'r', newline='', encoding='utf-8-sig') as previous_file:
+                    for previous in csv.DictReader(previous_file):
+                        if previous["shiftName"] in failed_scheduler_names and previous["id"] not in written_ids:
+                            writer.writerow(previous)
+                            add_location_mapping(location_map, previous)
+                            kept += 1
+            stats["shifts"] += kept
+            logger.warning(f"Keeping {kept} previously extracted shifts of {len(failed_scheduler_names)} "
+                           f"failed schedulers")
+
+    logger.info(f"Successfully streamed {stats['shifts']} shifts to {filename}")
+    write_location_map(location_map, location_mapping_filename)
+    return stats
+
 def extract_scheduler_ids(schedulers_response: Any) -> List[str]:
     """
     Extract scheduler IDs from the API response.
@@ -695,9 +1881,64 @@ def extract_scheduler_ids(schedulers_response: Any) -> List[str]:
     logger.info(f"Extracted {len(scheduler_ids)} scheduler IDs")
     return scheduler_ids
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line options.
+
+    Args:
+        argv: Argument list (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Extract Connecteam shift data to CSV")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent fetch threads (default: {DEFAULT_WORKERS}, sequential)")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT_PER_SECOND,
+                        help=f"Maximum API requests per second across all workers (default: {RATE_LIMIT_PER_SECOND})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch only shifts changed since the last run and merge them into the existing CSV "
+                             f"(a full reconcile still runs every {FULL_RECONCILE_DAYS} days)")
+    parser.add_argument("--full-reconcile", action="store_true",
+                        help="Force a full refetch, dropping shifts deleted in Connecteam")
+    parser.add_argument("--refresh-reference", action="store_true",
+                        help="Revalidate cached users, jobs and schedulers even if their TTL has not expired")
+    parser.add_argument("--full-user-sync", action="store_true",
+                        help="Re-crawl the full users directory instead of resolving unknown users on demand")
+    parser.add_argument("--stream", action="store_true",
+                        help="Transform and write shifts page by page instead of holding them all in memory")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Store shifts in per-month partitions, skipping frozen months entirely")
+    parser.add_argument("--freeze-after-days", type=int, default=FREEZE_AFTER_DAYS,
+                        help=f"Freeze month partitions that ended more than this many days ago (default: {FREEZE_AFTER_DAYS})")
+    parser.add_argument("--sqlite", action="store_true",
+                        help=f"Upsert shifts into the SQLite schedule store ({SCHEDULE_STORE_FILE}) "
+                             "and export the CSV from it")
+    parser.add_argument("--profile", action="store_true",
+                        help="Capture a cProfile of the run and tracemalloc peaks per stage in the run report")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+    if args.freeze_after_days < 0:
+        parser.error("--freeze-after-days must not be negative")
+    if args.stream and (args.incremental or args.partitioned):
+        parser.error("--stream cannot be combined with --incremental or --partitioned")
+    if args.sqlite and (args.stream or args.partitioned):
+        parser.error("--sqlite cannot be combined with --stream or --partitioned")
+    return args
+
+def main(argv: Optional[List[str]] = None):
     """Main function to orchestrate the data extraction process."""
+    args = parse_args(argv)
+    rate_limiter.set_rate(args.rate_limit)
+    api_client.set_pool_size(max(CONNECTION_POOL_SIZE, args.workers))
+    reference_cache.force_revalidate = args.refresh_reference
+    report = RunReport("connecteam_extractor", profile=args.profile)
+
     logger.info("Starting Connecteam data extraction")
+    logger.info(f"Workers: {args.workers}, rate limit: {args.rate_limit} requests/sec")
     
     # Calculate time range (90 days past to 90 days future for comprehensive coverage)
     start_time = get_unix_timestamp(-DAYS_OF_DATA)
@@ -706,69 +1947,227 @@ def main():
     print(start_time)
     print(end_time)
     
-    logger.info(f"Time range: {format_datetime(start_time)} to {format_datetime(end_time)}")
+    logger.info(f"Time range: {timestamp_formatter.format_datetime(start_time)} to "
+                f"{timestamp_formatter.format_datetime(end_time)} ({DEFAULT_TIME_ZONE})")
+
+    # Decide between an incremental merge and a full reconcile
+    state = load_extraction_state(STATE_FILE)
+    schedule_store = ScheduleStore(SCHEDULE_STORE_FILE) if args.sqlite else None
+    # Runs without --sqlite update the CSV only; catch the store up with it first
+    if schedule_store is not None and schedule_store.sync_shifts_csv(OUTPUT_FILE):
+        logger.info(f"Reloaded {SCHEDULE_STORE_FILE} from {OUTPUT_FILE}, which changed since the store last matched it")
+    existing_shifts = []
+    updated_since = None
+    if args.incremental and not args.full_reconcile:
+        now = int(time.time())
+        last_full = state.get("last_full_reconcile", 0)
+        if not state.get("watermark"):
+            logger.info("No watermark found, running a full reconcile")
+        elif now - last_full >= FULL_RECONCILE_DAYS * 86400:
+            logger.info(f"Last full reconcile is older than {FULL_RECONCILE_DAYS} days, running a full reconcile")
+        elif schedule_store is not None:
+            # Changed shifts are upserted by id, so the existing CSV is never loaded
+            if schedule_store.count_shifts():
+                updated_since = state["watermark"] - WATERMARK_OVERLAP_SECONDS
+            else:
+                logger.info(f"Empty schedule store and no existing {OUTPUT_FILE}, running a full reconcile")
+        else:
+            existing_shifts = load_existing_shifts(OUTPUT_FILE)
+            if existing_shifts:
+                updated_since = state["watermark"] - WATERMARK_OVERLAP_SECONDS
+            else:
+                logger.info(f"No existing {OUTPUT_FILE}, running a full reconcile")
+    incremental = updated_since is not None
+
+    # Skip months whose partitions are frozen
+    manifest = None
+    if args.partitioned:
+        manifest = load_partition_manifest(PARTITION_MANIFEST_FILE)
+        frozen_keys = {key for key, entry in manifest["partitions"].items() if entry.get("frozen")}
+        start_time = get_first_open_month(start_time, frozen_keys)
+        logger.info(f"Partitioned extraction: {len(frozen_keys)} frozen months, "
+                    f"fetching from {timestamp_formatter.format_datetime(start_time)}")
+
+    if incremental:
+        logger.info(f"Incremental extraction: shifts changed since {timestamp_formatter.format_datetime(updated_since)}")
+    else:
+        logger.info("Full extraction")
+    run_started = int(time.time())
     
     try:
-        # Get all users first to create a mapping of user IDs to names
-        user_map = get_all_users()
-        logger.info(f"User map contains {len(user_map)} entries")
+        # Load the user directory; crawl all users only when it is missing or stale
+        with report.stage("users") as stage:
+            user_resolver.load()
+            if args.full_user_sync or user_resolver.needs_full_sync():
+                user_resolver.sync_all()
+            logger.info(f"User map contains {len(user_resolver.user_map)} entries")
+            stage.rows_out = len(user_resolver.user_map)
 
         # Get all jobs to create a mapping of job IDs to locations
-        job_map = get_all_jobs()
-        logger.info(f"Job map contains {len(job_map)} entries")
-
-        # Get scheduler details including names
-        scheduler_name_map = get_scheduler_details()
-        print(scheduler_name_map)
-        # Get all schedulers
-        schedulers_response = get_all_schedulers()
-        
-        # Extract scheduler IDs
-        scheduler_ids = extract_scheduler_ids(schedulers_response)
+        with report.stage("jobs") as stage:
+            job_map = get_all_jobs()
+            logger.info(f"Job map contains {len(job_map)} entries")
+            stage.rows_out = len(job_map)
+
+        with report.stage("schedulers") as stage:
+            # Get scheduler details including names
+            scheduler_name_map = get_scheduler_details()
+            print(scheduler_name_map)
+            # Get all schedulers
+            schedulers_response = get_all_schedulers()
+
+            # Extract scheduler IDs
+            scheduler_ids = extract_scheduler_ids(schedulers_response)
+            stage.rows_out = len(scheduler_ids)
         
         if not scheduler_ids:
             logger.error("No scheduler IDs found in the response")
             return
         
+        if args.stream:
+            # Pages flow straight from the API through transform into the CSV
+            # (fetching, transforming and writing interleave, so they are one stage)
+            with report.stage("stream_shifts") as stage:
+                pages = iter_all_shift_pages(scheduler_ids, start_time, end_time, args.workers)
+                stats = stream_shifts_to_csv(pages, user_resolver, scheduler_name_map, job_map,
+                                             OUTPUT_FILE, LOCATION_MAPPING_FILE)
+                stage.rows_in = stage.rows_out = stats["shifts"]
+            if stats["shifts"]:
+                logger.info(f"Shifts with empty assignedUsers: {stats['empty_assigned_users']} "
+                            f"({stats['empty_assigned_users']/stats['shifts']*100:.2f}%)")
+            if failed_scheduler_ids:
+                logger.warning(f"Not advancing watermark: {len(failed_scheduler_ids)} schedulers failed "
+                               f"({', '.join(sorted(failed_scheduler_ids))})")
+            else:
+                state["watermark"] = stats["watermark"]
+                state["last_full_reconcile"] = run_started
+                save_extraction_state(state, STATE_FILE)
+            logger.info(f"Data extraction completed successfully. Total shifts: {stats['shifts']}")
+            return
+
         all_shifts = []
+        watermark = state.get("watermark", 0) if incremental else 0
+
+        # Fetch every scheduler's pages up front when running concurrently
+        shifts_by_scheduler = None
+        if args.workers > 1:
+            with report.stage("fetch_shifts") as stage:
+                shifts_by_scheduler = get_shifts_concurrently(scheduler_ids, start_time, end_time, args.workers,
+                                                              updated_since)
+                stage.rows_out = sum(len(shifts) for shifts in shifts_by_scheduler.values())
         
         # Get shifts for each scheduler
         for scheduler_id in scheduler_ids:
             logger.info(f"Processing scheduler ID: {scheduler_id}")
-            shifts = get_shifts_for_scheduler(scheduler_id, start_time, end_time)
-            
-            # Transform each shift to match CSV structure
-            transformed_shifts = []
-            for shift in shifts:
-                transformed = transform_shift_data(shift, user_map, scheduler_name_map, job_map)
-                transformed_shifts.append(transformed)
+            if shifts_by_scheduler is not None:
+                shifts = shifts_by_scheduler[scheduler_id]
+            else:
+                fetch_started = time.monotonic()
+                with report.stage("fetch_shifts") as stage:
+                    shifts = get_shifts_for_scheduler(scheduler_id, start_time, end_time, updated_since)
+                    stage.rows_out = len(shifts)
+                report.record("schedulers", scheduler_id, fetch_seconds=round(time.monotonic() - fetch_started, 3))
+            report.record("schedulers", scheduler_id, shifts=len(shifts))
+
+            with report.stage("transform") as stage:
+                stage.rows_in = len(shifts)
+                for shift in shifts:
+                    watermark = max(watermark, get_shift_change_time(shift))
 
-                # Log the first few transformations for debugging
-                if len(transformed_shifts) <= 3:
-                    logger.info(f"Transformed shift {shift.get('id', '')}: assignedUsers = '{transformed['assignedUsers']}', location = '{transformed['location']}'")
+                # Keep only shifts changed since the watermark
+                if incremental:
+                    shifts = [shift for shift in shifts if get_shift_change_time(shift) > updated_since]
+
+                # Look up any users not yet in the directory, then transform
+                # each shift to match CSV structure
+                user_resolver.resolve_missing(shifts)
+                transformed_shifts = []
+                for shift in shifts:
+                    transformed = transform_shift_data(shift, user_resolver, scheduler_name_map, job_map)
+                    transformed_shifts.append(transformed)
+
+                    # Log the first few transformations for debugging
+                    if len(transformed_shifts) <= 3:
+                        logger.info(f"Transformed shift {shift.get('id', '')}: assignedUsers = '{transformed['assignedUsers']}', location = '{transformed['location']}'")
+
+                stage.rows_out = len(transformed_shifts)
 
             all_shifts.extend(transformed_shifts)
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
         
         logger.info(f"Total shifts after transformation: {len(all_shifts)}")
+
+        # Merge changed shifts into the existing CSV
+        if incremental and schedule_store is None:
+            logger.info(f"Merging {len(all_shifts)} changed shifts into {len(existing_shifts)} existing shifts")
+            all_shifts = merge_shifts(existing_shifts, all_shifts)
         
         # Check for empty assignedUsers
         empty_assigned_users = sum(1 for shift in all_shifts if not shift['assignedUsers'])
-        logger.info(f"Shifts with empty assignedUsers: {empty_assigned_users} ({empty_assigned_users/len(all_shifts)*100:.2f}%)")
+        if all_shifts:
+            logger.info(f"Shifts with empty assignedUsers: {empty_assigned_users} ({empty_assigned_users/len(all_shifts)*100:.2f}%)")
         
-        # Write all shifts to CSV
-        write_to_csv(all_shifts, OUTPUT_FILE)
+        with report.stage("write_csv") as stage:
+            stage.rows_in = len(all_shifts)
+            if schedule_store is not None:
+                # Upsert into the store, then export the CSV from it
+                if incremental:
+                    written = schedule_store.upsert_shifts(all_shifts)
+                    logger.info(f"Upserted {written} changed shifts into {SCHEDULE_STORE_FILE}")
+                else:
+                    # Only schedulers that were fetched can tell which of their shifts were deleted
+                    written, deleted = schedule_store.replace_shifts(
+                        all_shifts, get_failed_scheduler_names(scheduler_name_map))
+                    logger.info(f"Upserted {written} shifts into {SCHEDULE_STORE_FILE}, "
+                                f"removed {deleted} no longer in Connecteam")
+                with atomic_write(OUTPUT_FILE) as csvfile:
+                    schedule_store.write_shifts_csv(csvfile)
+                schedule_store.record_shifts_csv(OUTPUT_FILE)
+                all_shifts = load_existing_shifts(OUTPUT_FILE)
+            elif manifest is not None:
+                # Rewrite open partitions, then rebuild the CSV from all partitions
+                freeze_before = get_freeze_horizon(args.freeze_after_days)
+                write_partitions(all_shifts, manifest, freeze_before,
+                                 get_failed_scheduler_names(scheduler_name_map))
+                concatenate_partitions(manifest, OUTPUT_FILE)
+                all_shifts = load_existing_shifts(OUTPUT_FILE)
+            else:
+                # A full rewrite must not drop the shifts of schedulers that failed to fetch
+                if failed_scheduler_ids and not incremental:
+                    all_shifts = keep_failed_scheduler_shifts(all_shifts, load_existing_shifts(OUTPUT_FILE),
+                                                              get_failed_scheduler_names(scheduler_name_map))
+                # Write all shifts to CSV
+                write_to_csv(all_shifts, OUTPUT_FILE)
+            stage.rows_out = len(all_shifts)
 
         # Write location mapping file
-        write_location_mapping(all_shifts, LOCATION_MAPPING_FILE)
+        with report.stage("location_mapping") as stage:
+            write_location_mapping(all_shifts, LOCATION_MAPPING_FILE)
+            stage.rows_in = len(all_shifts)
+
+        # Advance the watermark only if every scheduler was fetched
+        if failed_scheduler_ids:
+            logger.warning(f"Not advancing watermark: {len(failed_scheduler_ids)} schedulers failed "
+                           f"({', '.join(sorted(failed_scheduler_ids))})")
+        else:
+            state["watermark"] = watermark
+            if not incremental:
+                state["last_full_reconcile"] = run_started
+            save_extraction_state(state, STATE_FILE)
 
         logger.info(f"Data extraction completed successfully. Total shifts: {len(all_shifts)}")
         
     except Exception as e:
         logger.error(f"Error in data extraction process: {e}")
         raise
+    finally:
+        reference_cache.save()
+        user_resolver.save()
+        api_client.log_stats()
+        if schedule_store is not None:
+            schedule_store.close()
+        report.set_requests(api_client.stats)
+        report_file = report.write("error" if sys.exc_info()[0] else "ok")
+        logger.info(f"Run report written to {report_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+External Sorting
+
+Sorts record streams that may not fit in memory. Records are buffered into
+chunks of a fixed size, each chunk is sorted and spilled to a temporary
+file, and the chunk files are merged lazily with heapq.merge, so at most one
+chunk plus one record per chunk file is held in memory at a time.
+
+The sort is stable: records with equal keys come out in input order.
+"""
+
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Records held in memory per sorted chunk
+DEFAULT_CHUNK_SIZE = 50000
+
+def _write_chunk(chunk: List[Tuple[Any, int, Any]], directory: str) -> str:
+    """Spill a sorted chunk to a temporary file and return its path."""
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.chunk')
+    with os.fdopen(fd, 'wb') as f:
+        for item in chunk:
+            pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+def _read_chunk(path: str) -> Iterator[Tuple[Any, int, Any]]:
+    """Read a spilled chunk back one item at a time."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def _merge(directory: str, paths: List[str], tail: List[Tuple[Any, int, Any]]) -> Iterator[Any]:
+    """Merge spilled chunks and the in-memory tail, removing the chunk files when done."""
+    try:
+        sources = [_read_chunk(path) for path in paths]
+        if tail:
+            sources.append(iter(tail))
+        for _, _, record in heapq.merge(*sources, key=lambda item: item[:2]):
+            yield record
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def external_sort(records: Iterable[Any], key: Callable[[Any], Any],
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  temp_dir: Optional[str] = None) -> Iterator[Any]:
+    """
+    Sort records by key using bounded memory.
+
+    The input is consumed (and spilled) before this returns, so side effects
+    of iterating it have happened by the time the first record is read back.
+
+    Args:
+        records: Records to sort (must be picklable)
+        key: Sort key for a record
+        chunk_size: Maximum number of records held in memory while spilling
+        temp_dir: Directory for chunk files (default: system temp directory)
+
+    Returns:
+        Iterator over the records in key order
+    """
+    directory = tempfile.mkdtemp(prefix='external_sort_', dir=temp_dir)
+    try:
+        paths: List[str] = []
+        chunk: List[Tuple[Any, int, Any]] = []
+        for sequence, record in enumerate(records):
+            # The sequence number keeps the sort stable and avoids comparing records
+            chunk.append((key(record), sequence, record))
+            if len(chunk) >= chunk_size:
+                chunk.sort(key=lambda item: item[:2])
+                paths.append(_write_chunk(chunk, directory))
+                chunk = []
+        chunk.sort(key=lambda item: item[:2])
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    return _merge(directory, paths, chunk)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Location Matching
+
+Matches schedule location names to Cloud9 appt_care_center_location values
+when they are not exactly equal (typos, punctuation, "Dental" vs "Dental
+Group", ...).
+
+Comparing every schedule location against every appointment location with
+edit distance is quadratic, so candidates are blocked first: an inverted
+index maps character trigrams to the distinct appointment locations that
+contain them, and Levenshtein similarity is only computed for the few
+locations sharing the most trigrams with the query. Results are memoized
+per (schedule location, appointment location) pair and per query.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Minimum similarity (1 - edit distance / longer length) to accept a match.
+# Lower values start pairing different practices that share generic words
+# ("... Dental Care - Bay Shore" vs "- Patchogue"); see scripts/README.md.
+DEFAULT_THRESHOLD = 0.85
+
+# Number of blocked candidates scored with edit distance per query
+DEFAULT_MAX_CANDIDATES = 10
+
+def trigrams(value: str) -> Set[str]:
+    """Get the character trigrams of a value, padded so short words still count."""
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Compute the edit distance between two strings.
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Stop early once the distance is known to exceed this
+
+    Returns:
+        Edit distance (or any value > max_distance if it was exceeded)
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def similarity(a: str, b: str, threshold: float = 0.0) -> float:
+    """
+    Get the normalized edit-distance similarity between two strings (0..1).
+
+    Args:
+        a: First string
+        b: Second string
+        threshold: Scores below this may be returned as 0.0 (enables early exit)
+
+    Returns:
+        1 - distance / length of the longer string
+    """
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    max_distance = int(longest * (1 - threshold))
+    distance = levenshtein(a, b, max_distance)
+    if distance > max_distance:
+        return 0.0
+    return 1 - distance / longest
+
+class FuzzyLocationMatcher:
+    """
+    Finds appointment locations similar to a schedule location.
+
+    Build it once from the distinct (already normalized) appointment
+    locations, then call match() with a normalized schedule location.
+    """
+
+    def __init__(self, locations: Iterable[str], threshold: float = DEFAULT_THRESHOLD,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.locations = sorted({location for location in locations if location})
+        self.index: Dict[str, List[int]] = {}
+        for position, location in enumerate(self.locations):
+            for gram in trigrams(location):
+                self.index.setdefault(gram, []).append(position)
+
+        self.pair_scores: Dict[Tuple[str, str], float] = {}
+        self.matches: Dict[str, List[Tuple[str, float]]] = {}
+
+    def candidates(self, query: str) -> List[str]:
+        """Get the locations sharing the most trigrams with the query."""
+        shared: Dict[int, int] = {}
+        for gram in trigrams(query):
+            for position in self.index.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        best = sorted(shared.items(), key=lambda item: (-item[1], item[0]))[:self.max_candidates]
+        return [self.locations[position] for position, _ in best]
+
+    def score(self, query: str, location: str) -> float:
+        """Get the memoized similarity of a (schedule, appointment) location pair."""
+        key = (query, location)
+        if key not in self.pair_scores:
+            self.pair_scores[key] = similarity(query, location, self.threshold)
+        return self.pair_scores[key]
+
+    def match(self, query: str) -> List[Tuple[str, float]]:
+        """
+        Find appointment locations at or above the similarity threshold.
+
+        Args:
+            query: Normalized schedule location
+
+        Returns:
+            (location, score) pairs, best first; exact equality is excluded
+            since callers have already tried it
+        """
+        if not query:
+            return []
+        if query not in self.matches:
+            scored = []
+            for location in self.candidates(query):
+                if location == query:
+                    continue
+                score = self.score(query, location)
+                if score >= self.threshold:
+                    scored.append((location, score))
+            scored.sort(key=lambda item: (-item[1], item[0]))
+            self.matches[query] = scored
+        return self.matches[query]
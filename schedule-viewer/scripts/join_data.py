@@ -13,299 +13,686 @@ Input files:
   - public/data/cloud9_appts.csv (appointments data)
   - public/data/job_locations.csv (location mappings)
 
-Output file:
+Output files:
   - public/data/joined_schedules.csv (ready for app to load)
+  - public/data/tc_schedules.json (rows pre-grouped into TC schedules)
+  - public/data/shards/ (the same, split by month or week, with manifest.json)
+  - public/data/search_index.json (word -> schedule index for the search box)
+  - public/data/aggregates.json (additive workload counts for the stats)
+  - data-pipelines/reports/join_data_<timestamp>.json (stage timings, rows and memory of the run)
 """
 
+import argparse
 import csv
-import sys
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 import os
-
-def format_date_for_comparison(date_str: str) -> str:
-    """Convert M/D/YY format to YYYY-MM-DD format."""
-    try:
-        parts = date_str.split('/')
-        if len(parts) == 3:
-            month = parts[0].zfill(2)
-            day = parts[1].zfill(2)
-            year = parts[2] if len(parts[2]) == 4 else f"20{parts[2]}"
-            return f"{year}-{month}-{day}"
-    except Exception as e:
-        print(f"Error formatting date '{date_str}': {e}")
-    return date_str
-
-def normalize_string(s: str) -> str:
-    """Normalize string for comparison."""
-    if not s:
-        return ""
-    return s.lower().strip()
-
-def matches_location(appt_location: str, schedule_location: str) -> bool:
-    """
-    Check if appointment location matches schedule location.
-    Uses EXACT matching only - appt_care_center_location must match schedule location.
+from address_normalizer import normalize_address
+from fuzzy_matcher import FuzzyLocationMatcher, DEFAULT_THRESHOLD
+from location_store import (LocationStore, STORE_FILE, fingerprint, METHOD_EXACT_ADDRESS,
+                            METHOD_PARTIAL_ADDRESS, METHOD_UNRESOLVED)
+from external_sort import external_sort, DEFAULT_CHUNK_SIZE
+from join_records import (ScheduleRecord, AppointmentRecord, LocationRecord, EMPTY_APPOINTMENT_FIELDS,
+                          APPOINTMENT_OUTPUT_COLUMNS, UNKNOWN_ORDINAL, iter_csv, iter_schedules, tc_sort_key,
+                          iter_appointments, load_locations)
+from schedule_store import ScheduleStore, STORE_FILE as SCHEDULE_STORE_FILE
+from tc_schedules import (TCScheduleAggregator, ArtifactWriter, ShardWriter, SHARD_DIR, SHARD_PERIODS,
+                          DEFAULT_SHARD_PERIOD)
+from search_index import SEARCH_INDEX_FILE, SearchIndexBuilder, write_search_index
+from aggregates import AGGREGATES_FILE, AggregatesBuilder, write_aggregates
+from run_report import RunReport
+
+OUTPUT_FIELDNAMES = [
+    # Schedule info
+    'schedule_id', 'tc_name', 'date', 'start_time', 'end_time', 'time_zone',
+
+    # Schedule location info
+    'schedule_store_guid', 'schedule_store_name', 'schedule_store_id',
+    'schedule_location', 'schedule_address', 'schedule_normalized_address',
+
+    # Match metadata
+    'match_quality', 'is_published',
+
+    # Appointment info (one per row)
+    'appt_guid', 'appt_date_time', 'appt_time',
+    'patient_full_name', 'cloud9_patient_name', 'patient_status', 'patient_id',
+    'appt_care_center_location', 'appt_type', 'is_consult', 'appt_status',
+    'chair', 'appt_note', 'pat_apt_count_all', 'assigned_care_center',
+
+    # Position in chronological order; its presence marks the file as pre-sorted
+    'row_order'
+]
+
+def output_group_key(record: Any) -> Tuple[int, str]:
     """
-    if not appt_location or not schedule_location:
-        return False
-
-    # Normalize both for comparison
-    normalized_appt = normalize_string(appt_location)
-    normalized_schedule = normalize_string(schedule_location)
-
-    # EXACT match only - no substring matching
-    # This ensures appointments at "Paul Chaskes, DMD" don't match "East Cedar Dental"
-    return normalized_appt == normalized_schedule
-
-def find_location_by_address(address: str, locations: List[Dict[str, str]]) -> Optional[str]:
-    """Find job location name by address."""
-    if not address:
-        return None
+    Get the (date, TC) group of a schedule or appointment record.
 
-    # Try exact match first
-    for loc in locations:
-        if loc.get('Location', '') == address:
-            return loc.get('Job', '')
-
-    # Try partial match
-    for loc in locations:
-        location_addr = loc.get('Location', '')
-        if location_addr and location_addr.split(',')[0] in address:
-            return loc.get('Job', '')
-
-    return None
-
-def load_csv(filepath: str) -> List[Dict[str, str]]:
-    """Load CSV file into list of dictionaries."""
-    try:
-        with open(filepath, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
-    except FileNotFoundError:
-        print(f"ERROR: File not found: {filepath}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"ERROR loading {filepath}: {e}")
-        sys.exit(1)
-
-def main():
-    print("=" * 80)
-    print("Schedule Viewer - Data Preprocessing (One Row Per Appointment)")
-    print("=" * 80)
-    print()
+    Output is ordered by this key and then by appointment time. Dates and
+    times compare as integer ordinals parsed at load time, and TC names by
+    tc_sort_key(), the order the dashboard's localeCompare gave them.
+    """
+    return (record.date_ordinal, tc_sort_key(record.tc_name))
 
-    # Change to script's parent directory to ensure correct paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(os.path.join(script_dir, '..'))
+def build_appointment_index(appointments: Iterable[AppointmentRecord]
+                            ) -> Dict[Tuple[str, str, str], List[AppointmentRecord]]:
+    """
+    Index appointments by (assigned_tc, appt_date, normalized appt_care_center_location).
+
+    Built once so each schedule resolves its appointments with a single lookup
+    instead of scanning every appointment. Appointments keep their input order
+    within each key, matching the order the old linear scan produced.
+    Appointments without a location are skipped since they can never match.
+    Location keys use the extractor's normalize_address so both stages agree.
+    Lookups are exact on that key, never substring, so appointments at "Paul
+    Chaskes, DMD" don't join to a schedule at "East Cedar Dental".
+    """
+    index: Dict[Tuple[str, str, str], List[AppointmentRecord]] = {}
+    for appt in appointments:
+        if not appt.location_key:
+            continue
+        key = (appt.tc_name, appt.iso_date, appt.location_key)
+        index.setdefault(key, []).append(appt)
+    return index
+
+class LocationIndex:
+    """
+    Resolves a schedule address to its job name from job_locations.csv.
+
+    Built once per run. Gives the same answer as scanning the locations in
+    file order: first an exact match on the Location column, then the first
+    row whose first address segment (text before the first comma) appears
+    anywhere in the address. Exact matches are a dict lookup; the segment
+    check walks a character trie of all first segments from each position
+    in the address. Results are memoized per address.
+    """
 
-    # Load input files
-    print("Loading input files...")
-    schedules = load_csv('public/data/schedule_data.csv')
-    appointments = load_csv('public/data/cloud9_appts.csv')
-    locations = load_csv('public/data/job_locations.csv')
-
-    print(f"  ✓ Loaded {len(schedules):,} schedule entries")
-    print(f"  ✓ Loaded {len(appointments):,} appointments")
-    print(f"  ✓ Loaded {len(locations):,} location mappings")
-    print()
+    # Trie key holding (row number, job, segment length) for a segment ending at this node
+    _END = ''
+
+    def __init__(self, locations: List[LocationRecord]):
+        self.exact: Dict[str, str] = {}
+        self.trie: Dict[str, Any] = {}
+        # First row whose segment is empty (an empty segment matches every address)
+        self.empty_segment_match: Optional[Tuple[int, str, int]] = None
+        self.cache: Dict[str, Tuple[Optional[str], str, float]] = {}
+
+        for row_number, loc in enumerate(locations):
+            location_addr = loc.location
+            job = loc.job
+            self.exact.setdefault(location_addr, job)
+
+            if not location_addr:
+                continue
+            segment = location_addr.split(',')[0]
+            if not segment:
+                if self.empty_segment_match is None:
+                    self.empty_segment_match = (row_number, job, 0)
+                continue
+
+            node = self.trie
+            for char in segment:
+                node = node.setdefault(char, {})
+            # Earlier rows take precedence
+            node.setdefault(self._END, (row_number, job, len(segment)))
+
+    def resolve(self, address: str) -> Tuple[Optional[str], str, float]:
+        """
+        Find job location name by address, with how it was found.
+
+        Returns (job, method, score). Method is METHOD_EXACT_ADDRESS,
+        METHOD_PARTIAL_ADDRESS or METHOD_UNRESOLVED; a partial match scores
+        the share of the address covered by the matched segment.
+        """
+        if not address:
+            return None, METHOD_UNRESOLVED, 0.0
+
+        if address in self.cache:
+            return self.cache[address]
+
+        # Try exact match first
+        if address in self.exact:
+            result = (self.exact[address], METHOD_EXACT_ADDRESS, 1.0)
+        else:
+            # Try partial match: earliest row whose first segment is in the address
+            best = self.empty_segment_match
+            for start in range(len(address)):
+                node = self.trie
+                for char in address[start:]:
+                    node = node.get(char)
+                    if node is None:
+                        break
+                    match = node.get(self._END)
+                    if match is not None and (best is None or match[0] < best[0]):
+                        best = match
+            if best is not None:
+                result = (best[1], METHOD_PARTIAL_ADDRESS, round(best[2] / len(address), 4))
+            else:
+                result = (None, METHOD_UNRESOLVED, 0.0)
+
+        self.cache[address] = result
+        return result
+
+class ScheduleJoiner:
+    """
+    Joins one schedule at a time to its appointments.
 
-    # Filter valid schedule entries (must have assigned users)
-    valid_schedules = [s for s in schedules if s.get('assignedUsers', '').strip()]
-    print(f"Filtered to {len(valid_schedules):,} schedules with assigned users")
-    print()
+    Shared by the in-memory and streaming joins so both produce the same rows
+    and statistics. Location resolution goes through the location store, and
+    the LocationIndex is only built once an address needs matching.
+    """
 
-    # Build joined data - ONE ROW PER APPOINTMENT
-    print("Joining data (one row per appointment)...")
-    print("Join logic:")
-    print("  - Match on: TC name + date + EXACT appt_care_center_location")
-    print("  - Location match must be EXACT (no substring matching)")
-    print("  - Schedules with 'Unknown Location' will NOT match any appointments")
-    print()
-    joined_rows = []
-    stats = {
-        'schedules_processed': 0,
-        'schedules_with_appointments': 0,
-        'schedules_without_appointments': 0,
-        'schedules_unknown_location': 0,
-        'total_appointment_rows': 0,
-        'exact_match': 0,
-        'fuzzy_match': 0,
-        'unmatched': 0
-    }
-
-    for schedule in valid_schedules:
-        tc_name = schedule['assignedUsers']
-        date = schedule['startDate']
-        formatted_date = format_date_for_comparison(date)
+    def __init__(self, locations: List[LocationRecord], location_store: LocationStore,
+                 fuzzy_matcher: Optional[FuzzyLocationMatcher] = None):
+        self.locations = locations
+        self.location_store = location_store
+        self.fuzzy_matcher = fuzzy_matcher
+        self.location_index: Optional[LocationIndex] = None
+        self.stats = {
+            'schedules_processed': 0,
+            'schedules_with_appointments': 0,
+            'schedules_without_appointments': 0,
+            'schedules_unknown_location': 0,
+            'total_appointment_rows': 0,
+            'exact_match': 0,
+            'fuzzy_match': 0,
+            'unmatched': 0,
+            'fuzzy_location_joins': 0
+        }
+
+    def resolve_address(self, address: str) -> Tuple[Optional[str], str, float]:
+        """Resolve an address the location store has not seen."""
+        if self.location_index is None:
+            self.location_index = LocationIndex(self.locations)
+        return self.location_index.resolve(address)
+
+    def join(self, schedule: ScheduleRecord,
+             appointment_index: Dict[Tuple[str, str, str], List[AppointmentRecord]]
+             ) -> List[Tuple[int, Tuple[str, ...]]]:
+        """
+        Build the joined rows for a schedule: one per matching appointment, or one empty row.
+
+        Returns (appointment time ordinal, row) pairs. Rows are tuples in
+        OUTPUT_FIELDNAMES order, without the trailing row_order column.
+        """
+        tc_name = schedule.tc_name
+        formatted_date = schedule.iso_date
 
         # Get location info from schedule
-        store_name = schedule.get('store_name', '')
-        location_name = schedule.get('location', '')
+        store_name = schedule.store_name
+        location_name = schedule.location
 
         # Determine display location
-        display_location = (store_name or
-                          location_name or
-                          find_location_by_address(schedule.get('address', ''), locations) or
-                          'Unknown Location')
+        display_location = (self.location_store.resolve(schedule.address,
+                                                        schedule.job_id,
+                                                        store_name or location_name,
+                                                        self.resolve_address) or
+                            'Unknown Location')
 
         # If location is Unknown, do NOT join to any appointments
         if display_location == 'Unknown Location':
             matching_appts = []
-            stats['schedules_unknown_location'] += 1
+            self.stats['schedules_unknown_location'] += 1
         else:
             # Find matching appointments for this TC on this date AND location
             # Join on: TC name + date + EXACT match on appt_care_center_location to display_location
-            matching_appts = [
-                appt for appt in appointments
-                if (appt.get('assigned_tc', '') == tc_name
-                    and appt.get('appt_date', '') == formatted_date
-                    and matches_location(
-                        appt.get('appt_care_center_location', ''),
-                        display_location
-                    ))
-            ]
+            matching_appts = appointment_index.get(
+                (tc_name, formatted_date, normalize_address(display_location)),
+                []
+            )
+
+            # Optionally fall back to the most similar appointment location
+            # that has appointments for this TC on this date
+            if not matching_appts and self.fuzzy_matcher:
+                for candidate, score in self.location_store.fuzzy_matches(normalize_address(display_location),
+                                                                        self.fuzzy_matcher.match):
+                    matching_appts = appointment_index.get((tc_name, formatted_date, candidate), [])
+                    if matching_appts:
+                        self.stats['fuzzy_location_joins'] += 1
+                        break
 
             # Note: We do NOT fall back to matching without location
             # This prevents incorrect joins across different care centers
 
         # Determine match quality
         match_quality = 'unmatched'
-        if schedule.get('store_guid'):
+        if schedule.store_guid:
             match_quality = 'exact'
-            stats['exact_match'] += 1
-        elif location_name or schedule.get('address'):
+            self.stats['exact_match'] += 1
+        elif location_name or schedule.address:
             match_quality = 'fuzzy'
-            stats['fuzzy_match'] += 1
+            self.stats['fuzzy_match'] += 1
         else:
-            stats['unmatched'] += 1
+            self.stats['unmatched'] += 1
+
+        self.stats['schedules_processed'] += 1
 
-        stats['schedules_processed'] += 1
+        # Schedule, location and match columns shared by all of this schedule's rows
+        schedule_fields = (
+            schedule.id, tc_name, schedule.date, schedule.start_time, schedule.end_time,
+            schedule.time_zone, schedule.store_guid, store_name, schedule.store_id,
+            display_location, schedule.address, schedule.normalized_address,
+            match_quality, schedule.is_published,
+        )
 
         if matching_appts:
-            stats['schedules_with_appointments'] += 1
+            self.stats['schedules_with_appointments'] += 1
+            self.stats['total_appointment_rows'] += len(matching_appts)
 
             # Create ONE ROW PER APPOINTMENT
-            for appt in matching_appts:
-                row = {
-                    # Schedule fields
-                    'schedule_id': schedule.get('id', ''),
-                    'tc_name': tc_name,
-                    'date': date,
-                    'start_time': schedule.get('startTime', ''),
-                    'end_time': schedule.get('endTime', ''),
-                    'time_zone': schedule.get('timeZone', ''),
-
-                    # Location fields (from schedule)
-                    'schedule_store_guid': schedule.get('store_guid', ''),
-                    'schedule_store_name': store_name,
-                    'schedule_store_id': schedule.get('store_id', ''),
-                    'schedule_location': display_location,
-                    'schedule_address': schedule.get('address', ''),
-                    'schedule_normalized_address': schedule.get('normalized_address', ''),
-
-                    # Match metadata
-                    'match_quality': match_quality,
-                    'is_published': schedule.get('isPublished', ''),
-
-                    # Appointment fields (one per row)
-                    'appt_guid': appt.get('appt_guid', ''),
-                    'appt_date_time': appt.get('appt_date_time', ''),
-                    'appt_time': appt.get('appt_time', ''),
-                    'patient_full_name': appt.get('patient_full_name', ''),
-                    'cloud9_patient_name': appt.get('cloud9_patient_name', ''),
-                    'patient_status': appt.get('patient_status', ''),
-                    'patient_id': appt.get('patient_id', ''),
-                    'appt_care_center_location': appt.get('appt_care_center_location', ''),
-                    'appt_type': appt.get('appt_type', ''),
-                    'is_consult': appt.get('is_consult', ''),
-                    'appt_status': appt.get('appt_status', ''),
-                    'chair': appt.get('chair', ''),
-                    'appt_note': appt.get('appt_note', ''),
-                    'pat_apt_count_all': appt.get('pat_apt_count_all', ''),
-                    'assigned_care_center': appt.get('assigned_care_center', ''),
-                }
-
-                joined_rows.append(row)
-                stats['total_appointment_rows'] += 1
+            return [(appt.time_ordinal, schedule_fields + appt.output) for appt in matching_appts]
+
+        # Create one row for schedule with no appointments
+        self.stats['schedules_without_appointments'] += 1
+        return [(UNKNOWN_ORDINAL, schedule_fields + EMPTY_APPOINTMENT_FIELDS)]
+
+    def join_group(self, schedules: Iterable[ScheduleRecord],
+                   appointment_index: Dict[Tuple[str, str, str], List[AppointmentRecord]]
+                   ) -> List[Tuple[str, ...]]:
+        """
+        Join the schedules of one (date, TC) group, ordered by appointment time.
+
+        Ties keep schedule order and then appointment order; schedules
+        without appointments come first.
+        """
+        keyed_rows = []
+        for schedule in schedules:
+            keyed_rows.extend(self.join(schedule, appointment_index))
+        keyed_rows.sort(key=itemgetter(0))
+        return [row for _, row in keyed_rows]
+
+    def join_all(self, schedules: Iterable[ScheduleRecord],
+                 appointment_index: Dict[Tuple[str, str, str], List[AppointmentRecord]]
+                 ) -> List[Tuple[str, ...]]:
+        """Join schedules in any order, returning rows in chronological output order."""
+        rows = []
+        for _, group in groupby(sorted(schedules, key=output_group_key), key=output_group_key):
+            rows.extend(self.join_group(group, appointment_index))
+        return rows
+
+# Per-process joiner for parallel joins, set up by _init_join_worker
+_worker_joiner: Optional[ScheduleJoiner] = None
+
+def _init_join_worker(locations: List[LocationRecord], location_store: LocationStore,
+                      fuzzy_matcher: Optional[FuzzyLocationMatcher]) -> None:
+    """Set up the joiner a worker process reuses for all of its partitions."""
+    global _worker_joiner
+    _worker_joiner = ScheduleJoiner(locations, location_store, fuzzy_matcher)
+
+def join_partition(schedules: List[ScheduleRecord], appointments: List[AppointmentRecord]
+                   ) -> Tuple[List[Tuple[str, ...]], Dict[str, int], Dict[str, Any]]:
+    """
+    Join one date partition in a worker process.
+
+    Returns:
+        (rows in output order, partition stats, location store changes)
+    """
+    joiner = _worker_joiner
+    joiner.stats = dict.fromkeys(joiner.stats, 0)
+
+    rows = joiner.join_all(schedules, build_appointment_index(appointments))
+    return rows, joiner.stats, joiner.location_store.take_changes()
+
+def partition_by_date(schedules: List[ScheduleRecord], appointments: List[AppointmentRecord]
+                      ) -> List[Tuple[int, List[ScheduleRecord], List[AppointmentRecord]]]:
+    """
+    Split schedules and appointments by date ordinal.
+
+    Returns (date key, schedules, appointments) for every date with schedules,
+    in output date order. Both sides keep their input order within a date.
+    """
+    partitions: Dict[int, Tuple[List[ScheduleRecord], List[AppointmentRecord]]] = {}
+    for schedule in schedules:
+        partitions.setdefault(schedule.date_ordinal, ([], []))[0].append(schedule)
+    for appt in appointments:
+        partition = partitions.get(appt.date_ordinal)
+        if partition is not None:
+            partition[1].append(appt)
+    return [(ordinal, *partitions[ordinal]) for ordinal in sorted(partitions)]
+
+def parallel_join(joiner: ScheduleJoiner, schedules: List[ScheduleRecord],
+                  appointments: List[AppointmentRecord], workers: int) -> List[Tuple[str, ...]]:
+    """
+    Join date partitions across a process pool.
+
+    Partition stats and location store changes are merged into the joiner,
+    and partition outputs are concatenated in date order.
+    """
+    partitions = partition_by_date(schedules, appointments)
+    print(f"Joining {len(partitions):,} date partitions across {workers} processes")
+    # Batch several dates per task so small partitions don't pay a round trip each
+    chunksize = max(1, len(partitions) // (workers * 4))
+
+    joined_rows: List[Tuple[str, ...]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_join_worker,
+                             initargs=(joiner.locations, joiner.location_store, joiner.fuzzy_matcher)) as executor:
+        results = executor.map(join_partition,
+                               [partition[1] for partition in partitions],
+                               [partition[2] for partition in partitions],
+                               chunksize=chunksize)
+        for rows, stats, changes in results:
+            joined_rows.extend(rows)
+            for name, count in stats.items():
+                joiner.stats[name] += count
+            joiner.location_store.merge_changes(changes)
+    return joined_rows
+
+def iter_merge_groups(schedules: Iterator[ScheduleRecord],
+                      appointments: Iterator[AppointmentRecord]
+                      ) -> Iterator[Tuple[List[ScheduleRecord], List[AppointmentRecord]]]:
+    """
+    Merge-join schedules and appointments that are both sorted by (date, TC).
+
+    Yields (schedules, appointments) for each (date, TC) that has schedules;
+    appointment groups without schedules are skipped. Only one group from
+    each side is held in memory.
+    """
+    appointment_groups = groupby(appointments, key=output_group_key)
+    appt_key, appt_group = next(appointment_groups, (None, None))
+
+    for key, schedule_group in groupby(schedules, key=output_group_key):
+        while appt_key is not None and appt_key < key:
+            appt_key, appt_group = next(appointment_groups, (None, None))
+        if appt_key == key:
+            yield list(schedule_group), list(appt_group)
+            appt_key, appt_group = next(appointment_groups, (None, None))
         else:
-            stats['schedules_without_appointments'] += 1
-
-            # Create one row for schedule with no appointments
-            row = {
-                # Schedule fields
-                'schedule_id': schedule.get('id', ''),
-                'tc_name': tc_name,
-                'date': date,
-                'start_time': schedule.get('startTime', ''),
-                'end_time': schedule.get('endTime', ''),
-                'time_zone': schedule.get('timeZone', ''),
-
-                # Location fields (from schedule)
-                'schedule_store_guid': schedule.get('store_guid', ''),
-                'schedule_store_name': store_name,
-                'schedule_store_id': schedule.get('store_id', ''),
-                'schedule_location': display_location,
-                'schedule_address': schedule.get('address', ''),
-                'schedule_normalized_address': schedule.get('normalized_address', ''),
-
-                # Match metadata
-                'match_quality': match_quality,
-                'is_published': schedule.get('isPublished', ''),
-
-                # Empty appointment fields
-                'appt_guid': '',
-                'appt_date_time': '',
-                'appt_time': '',
-                'patient_full_name': '',
-                'cloud9_patient_name': '',
-                'patient_status': '',
-                'patient_id': '',
-                'appt_care_center_location': '',
-                'appt_type': '',
-                'is_consult': '',
-                'appt_status': '',
-                'chair': '',
-                'appt_note': '',
-                'pat_apt_count_all': '',
-                'assigned_care_center': '',
-            }
-
-            joined_rows.append(row)
-
-    # Sort by date, then by TC name, then by appointment time
-    joined_rows.sort(key=lambda x: (x['date'], x['tc_name'], x['appt_time']))
+            yield list(schedule_group), []
 
-    # Write output file
-    output_file = 'public/data/joined_schedules.csv'
-    print(f"Writing joined data to {output_file}...")
+def stream_join(joiner: ScheduleJoiner, schedules: Iterator[ScheduleRecord],
+                appointments: Iterator[AppointmentRecord]) -> Iterator[Tuple[str, ...]]:
+    """
+    Join pre-sorted schedules and appointments one (date, TC) group at a time.
 
-    fieldnames = [
-        # Schedule info
-        'schedule_id', 'tc_name', 'date', 'start_time', 'end_time', 'time_zone',
+    Rows come out in the final output order, so they can be written as they
+    are produced.
+    """
+    for schedule_group, appt_group in iter_merge_groups(schedules, appointments):
+        yield from joiner.join_group(schedule_group, build_appointment_index(appt_group))
 
-        # Schedule location info
-        'schedule_store_guid', 'schedule_store_name', 'schedule_store_id',
-        'schedule_location', 'schedule_address', 'schedule_normalized_address',
+def sort_inputs_for_streaming(chunk_size: int, appointment_locations: set
+                              ) -> Tuple[Iterator[ScheduleRecord], Iterator[AppointmentRecord], int, int]:
+    """
+    Externally sort schedules and appointments by (date, TC) in bounded-memory chunks.
 
-        # Match metadata
-        'match_quality', 'is_published',
+    Collects the distinct normalized appointment locations into
+    appointment_locations while the appointments are read.
 
-        # Appointment info (one per row)
-        'appt_guid', 'appt_date_time', 'appt_time',
-        'patient_full_name', 'cloud9_patient_name', 'patient_status', 'patient_id',
-        'appt_care_center_location', 'appt_type', 'is_consult', 'appt_status',
-        'chair', 'appt_note', 'pat_apt_count_all', 'assigned_care_center'
-    ]
+    Returns:
+        (sorted schedules, sorted appointments, schedule count, appointment count)
+    """
+    counts = {'schedules': 0, 'appointments': 0}
+
+    def valid_schedules() -> Iterator[ScheduleRecord]:
+        for schedule in iter_schedules('public/data/schedule_data.csv'):
+            # Must have assigned users
+            if schedule.tc_name.strip():
+                counts['schedules'] += 1
+                yield schedule
+
+    def located_appointments() -> Iterator[AppointmentRecord]:
+        for appt in iter_appointments('public/data/cloud9_appts.csv'):
+            counts['appointments'] += 1
+            # Appointments without a location can never match
+            if appt.location_key:
+                appointment_locations.add(appt.location_key)
+                yield appt
+
+    sorted_schedules = external_sort(valid_schedules(), key=output_group_key, chunk_size=chunk_size)
+    sorted_appointments = external_sort(located_appointments(), key=output_group_key, chunk_size=chunk_size)
+    return sorted_schedules, sorted_appointments, counts['schedules'], counts['appointments']
+
+def sqlite_join(joiner: ScheduleJoiner, schedule_store: ScheduleStore) -> List[Tuple[str, ...]]:
+    """
+    Join (date, TC) groups read from the schedule store.
 
-    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(joined_rows)
+    All groups are read in one snapshot, so a concurrent extractor run can't
+    mix old and new shifts into the output.
+    """
+    rows = []
+    with schedule_store.snapshot():
+        for schedule_group, appt_group in schedule_store.iter_join_groups():
+            rows.extend(joiner.join_group(schedule_group, build_appointment_index(appt_group)))
+    return rows
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Join schedules, appointments and locations into joined_schedules.csv")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="When no appointment location matches exactly, fall back to the most similar one")
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum edit-distance similarity (0-1) for a fuzzy location match (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--location-store', default=STORE_FILE,
+                        help=f"Persistent location resolution store (default: {STORE_FILE})")
+    parser.add_argument('--rebuild-location-store', action='store_true',
+                        help="Ignore stored location resolutions and resolve every address again")
+    parser.add_argument('--stream', action='store_true',
+                        help="Sort-merge join in bounded memory, writing rows as they are produced")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows held in memory per sorted chunk with --stream (default: {DEFAULT_CHUNK_SIZE:,})")
+    parser.add_argument('--shard-by', choices=SHARD_PERIODS, default=DEFAULT_SHARD_PERIOD,
+                        help=f"Period of the date shards written to {SHARD_DIR} (default: {DEFAULT_SHARD_PERIOD})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Join date partitions across this many processes (default: 1, single process)")
+    parser.add_argument('--sqlite', nargs='?', const=SCHEDULE_STORE_FILE, metavar='PATH',
+                        help=f"Load appointments and locations into the SQLite schedule store and join from its "
+                             f"indexes (default path: {SCHEDULE_STORE_FILE})")
+    parser.add_argument('--profile', action='store_true',
+                        help="Capture a cProfile of the run and tracemalloc peaks per stage in the run report")
+    args = parser.parse_args(argv)
+    if not 0 < args.fuzzy_threshold <= 1:
+        parser.error("--fuzzy-threshold must be between 0 and 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.stream:
+        parser.error("--workers cannot be combined with --stream")
+    if args.sqlite and (args.stream or args.workers > 1):
+        parser.error("--sqlite cannot be combined with --stream or --workers")
+    return args
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
 
-    print(f"  ✓ Wrote {len(joined_rows):,} rows ({stats['total_appointment_rows']:,} appointment rows + {stats['schedules_without_appointments']:,} empty schedule rows)")
+    print("=" * 80)
+    print("Schedule Viewer - Data Preprocessing (One Row Per Appointment)")
+    print("=" * 80)
     print()
 
+    # Change to script's parent directory to ensure correct paths
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(os.path.join(script_dir, '..'))
+
+    report = RunReport('join_data', profile=args.profile)
+    try:
+        run_join(args, report)
+    except BaseException:
+        print(f"Run report: {report.write('error')}")
+        raise
+    print(f"Run report: {report.write()}")
+
+def run_join(args: argparse.Namespace, report: RunReport) -> None:
+    # Load input files
+    with report.stage('load_inputs') as stage:
+        if args.sqlite:
+            # Shifts come from the store (upserted by the extractor); appointments
+            # and locations are bulk-loaded from their CSV exports
+            print(f"Loading input files into {args.sqlite}...")
+            schedule_store = ScheduleStore(args.sqlite)
+            if schedule_store.sync_shifts_csv('public/data/schedule_data.csv'):
+                print("  ✓ Reloaded shifts from public/data/schedule_data.csv (changed since the store last matched it)")
+            written, deleted = schedule_store.load_appointments(iter_csv('public/data/cloud9_appts.csv'))
+            schedule_store.load_job_locations(iter_csv('public/data/job_locations.csv'))
+            locations = schedule_store.locations()
+            appointment_locations = set(schedule_store.appointment_locations())
+
+            print(f"  ✓ {schedule_store.count_shifts():,} schedule entries in store")
+            print(f"  ✓ Upserted {written:,} appointments ({deleted:,} no longer in the export removed)")
+            print(f"  ✓ Loaded {len(locations):,} location mappings")
+            print()
+            stage.rows_in = stage.rows_out = schedule_store.count_shifts()
+            stage.rows_in += written + len(locations)
+        elif args.stream:
+            # Externally sort both inputs by (date, TC) so they can be merge-joined
+            print(f"Sorting input files in chunks of {args.chunk_size:,} rows...")
+            locations = load_locations('public/data/job_locations.csv')
+            appointment_locations: set = set()
+            sorted_schedules, sorted_appointments, schedule_count, appointment_count = \
+                sort_inputs_for_streaming(args.chunk_size, appointment_locations)
+            print(f"  ✓ Sorted {schedule_count:,} schedules with assigned users")
+            print(f"  ✓ Sorted {appointment_count:,} appointments")
+            print(f"  ✓ Loaded {len(locations):,} location mappings")
+            print()
+            stage.rows_in = schedule_count + appointment_count + len(locations)
+            stage.rows_out = schedule_count
+        else:
+            print("Loading input files...")
+            schedules = list(iter_schedules('public/data/schedule_data.csv'))
+            appointments = list(iter_appointments('public/data/cloud9_appts.csv'))
+            locations = load_locations('public/data/job_locations.csv')
+
+            print(f"  ✓ Loaded {len(schedules):,} schedule entries")
+            print(f"  ✓ Loaded {len(appointments):,} appointments")
+            print(f"  ✓ Loaded {len(locations):,} location mappings")
+            print()
+
+            # Filter valid schedule entries (must have assigned users)
+            valid_schedules = [s for s in schedules if s.tc_name.strip()]
+            print(f"Filtered to {len(valid_schedules):,} schedules with assigned users")
+            print()
+
+            # Index appointments once so each schedule is a single hash lookup
+            appointment_index = build_appointment_index(appointments)
+            print(f"Indexed appointments into {len(appointment_index):,} (TC, date, location) keys")
+            appointment_locations = {key[2] for key in appointment_index}
+            stage.rows_in = len(schedules) + len(appointments) + len(locations)
+            stage.rows_out = len(valid_schedules)
+
+    # Fuzzy fallback over the distinct appointment locations
+    with report.stage('prepare_locations') as stage:
+        fuzzy_matcher = None
+        fuzzy_fingerprint = ''
+        if args.fuzzy:
+            fuzzy_matcher = FuzzyLocationMatcher(appointment_locations, args.fuzzy_threshold)
+            fuzzy_fingerprint = fingerprint(fuzzy_matcher.locations +
+                                            [str(args.fuzzy_threshold), str(fuzzy_matcher.max_candidates)])
+            print(f"Fuzzy location matching enabled over {len(fuzzy_matcher.locations):,} appointment locations "
+                  f"(threshold {args.fuzzy_threshold})")
+
+        # Reuse location resolutions from earlier runs
+        location_store = LocationStore(args.location_store)
+        location_store.load(fingerprint(f"{loc.location}\t{loc.job}" for loc in locations),
+                            fuzzy_fingerprint, reset=args.rebuild_location_store)
+        print(f"Loaded {len(location_store.resolutions):,} stored location resolutions from {args.location_store}")
+        print()
+        stage.rows_in = len(locations)
+        stage.rows_out = len(location_store.resolutions)
+
+    joiner = ScheduleJoiner(locations, location_store, fuzzy_matcher)
+    stats = joiner.stats
+
+    # Build joined data - ONE ROW PER APPOINTMENT
+    print("Joining data (one row per appointment)...")
+    print("Join logic:")
+    print("  - Match on: TC name + date + EXACT appt_care_center_location")
+    if fuzzy_matcher:
+        print(f"  - Location match is EXACT, falling back to the most similar location (>= {args.fuzzy_threshold})")
+    else:
+        print("  - Location match must be EXACT (no substring matching)")
+    print("  - Schedules with 'Unknown Location' will NOT match any appointments")
+    print()
+
+    with report.stage('join') as stage:
+        # With --stream the join runs lazily while the rows are written
+        if args.sqlite:
+            # Groups are read in output order through the store's indexes
+            joined_rows = sqlite_join(joiner, schedule_store)
+            schedule_store.close()
+        elif args.stream:
+            # Rows are produced in output order, so nothing is accumulated
+            joined_rows = stream_join(joiner, sorted_schedules, sorted_appointments)
+        elif args.workers > 1:
+            # Partitions come back in date order and ordered within
+            joined_rows = parallel_join(joiner, valid_schedules, appointments, args.workers)
+        else:
+            # Ordered by date, then TC name, then appointment time as it is built
+            joined_rows = joiner.join_all(valid_schedules, appointment_index)
+        if not args.stream:
+            stage.rows_in = stats['schedules_processed']
+            stage.rows_out = len(joined_rows)
+
+    # Write output file
+    output_file = 'public/data/joined_schedules.csv'
+    print(f"Writing joined data to {output_file}...")
+
+    # Group rows into TC schedules for the dashboard as they are written; each
+    # finished (date, TC) group is streamed to the artifacts and dropped
+    schedules_file = 'public/data/tc_schedules.json'
+    schedule_fields = OUTPUT_FIELDNAMES[:len(OUTPUT_FIELDNAMES) - len(APPOINTMENT_OUTPUT_COLUMNS) - 1]
+    schedules_writer = ArtifactWriter(schedules_file, schedule_fields, APPOINTMENT_OUTPUT_COLUMNS)
+    shard_writer = ShardWriter(schedule_fields, APPOINTMENT_OUTPUT_COLUMNS, SHARD_DIR, args.shard_by)
+    search_builder = SearchIndexBuilder(schedule_fields, APPOINTMENT_OUTPUT_COLUMNS)
+    aggregates_builder = AggregatesBuilder(schedule_fields, APPOINTMENT_OUTPUT_COLUMNS)
+    aggregator = TCScheduleAggregator(schedule_fields, APPOINTMENT_OUTPUT_COLUMNS,
+                                      [schedules_writer, shard_writer, search_builder, aggregates_builder])
+
+    row_count = 0
+    with report.stage('write_joined_csv') as stage:
+        try:
+            with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(OUTPUT_FIELDNAMES)
+                for row in joined_rows:
+                    writer.writerow(row + (str(row_count),))
+                    aggregator.add(row)
+                    row_count += 1
+            schedule_count = aggregator.finish()
+        except BaseException:
+            schedules_writer.abort()
+            shard_writer.abort()
+            raise
+        stage.rows_in = stage.rows_out = row_count
+
+    print(f"  ✓ Wrote {row_count:,} rows ({stats['total_appointment_rows']:,} appointment rows + {stats['schedules_without_appointments']:,} empty schedule rows)")
+
+    with report.stage('write_tc_schedules') as stage:
+        schedules_writer.close()
+        print(f"  ✓ Wrote {schedule_count:,} TC schedules to {schedules_file}")
+        stage.rows_in = row_count
+        stage.rows_out = schedule_count
+
+    with report.stage('write_shards') as stage:
+        manifest = shard_writer.close()
+        print(f"  ✓ Wrote {len(manifest['shards']):,} {args.shard_by}ly shards to {SHARD_DIR}")
+        stage.rows_in = schedule_count
+        stage.rows_out = len(manifest['shards'])
+
+    with report.stage('write_search_index') as stage:
+        search_index = search_builder.build()
+        write_search_index(search_index, SEARCH_INDEX_FILE)
+        print(f"  ✓ Wrote search index of {len(search_index['tokens']):,} words to {SEARCH_INDEX_FILE}")
+        stage.rows_in = schedule_count
+        stage.rows_out = len(search_index['tokens'])
+
+    with report.stage('write_aggregates') as stage:
+        aggregates = aggregates_builder.build()
+        write_aggregates(aggregates, AGGREGATES_FILE)
+        print(f"  ✓ Wrote {len(aggregates['cells']):,} aggregate cells to {AGGREGATES_FILE}")
+        stage.rows_in = schedule_count
+        stage.rows_out = len(aggregates['cells'])
+
+    with report.stage('save_location_store') as stage:
+        if location_store.save():
+            print(f"  ✓ Saved {len(location_store.resolutions):,} location resolutions to {args.location_store}")
+        stage.rows_out = len(location_store.resolutions)
+    print()
+
+    report.record('join', 'stats', **stats)
+    report.record('join', 'location_store', **location_store.stats)
+
     # Print statistics
     print("=" * 80)
     print("STATISTICS")
@@ -315,7 +702,7 @@ def main():
     print(f"  Without appointments:       {stats['schedules_without_appointments']:,} ({stats['schedules_without_appointments']/stats['schedules_processed']*100:.1f}%)")
     print(f"  Unknown Location (no join): {stats['schedules_unknown_location']:,} ({stats['schedules_unknown_location']/stats['schedules_processed']*100:.1f}%)")
     print()
-    print(f"Total output rows:            {len(joined_rows):,}")
+    print(f"Total output rows:            {row_count:,}")
     print(f"  Appointment rows:           {stats['total_appointment_rows']:,}")
     print(f"  Empty schedule rows:        {stats['schedules_without_appointments']:,}")
     print()
@@ -325,6 +712,15 @@ def main():
     print(f"  Exact (has store_guid):     {stats['exact_match']:,} ({stats['exact_match']/stats['schedules_processed']*100:.1f}%)")
     print(f"  Fuzzy (has location/addr):  {stats['fuzzy_match']:,} ({stats['fuzzy_match']/stats['schedules_processed']*100:.1f}%)")
     print(f"  Unmatched:                  {stats['unmatched']:,} ({stats['unmatched']/stats['schedules_processed']*100:.1f}%)")
+    if fuzzy_matcher:
+        print(f"  Fuzzy location joins:       {stats['fuzzy_location_joins']:,}")
+    print()
+    print(f"Address resolutions:")
+    print(f"  Reused from store:          {location_store.stats['reused']:,}")
+    print(f"  Newly resolved:             {location_store.stats['resolved']:,}")
+    if fuzzy_matcher:
+        print(f"  Fuzzy matches reused:       {location_store.stats['fuzzy_reused']:,}")
+        print(f"  Fuzzy matches computed:     {location_store.stats['fuzzy_resolved']:,}")
     print()
     print("=" * 80)
     print(f"✅ Done! Review the output file: {output_file}")
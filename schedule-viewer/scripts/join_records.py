@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Typed Join Records
+
+Compact records for the three inputs of join_data.py. csv.DictReader gives
+every row its own dict of ~20 keys; these records use __slots__, intern the
+strings that repeat across thousands of rows (TC names, dates, locations,
+time zones, statuses) and parse dates and appointment times into integer
+ordinals once at load time, so dates and times never compare as display
+strings.
+
+Appointment records carry their output columns as a ready-made tuple, so a
+joined row is the schedule's output tuple followed by the appointment's.
+"""
+
+import csv
+import sys
+import unicodedata
+from datetime import date
+from functools import lru_cache
+from sys import intern
+from typing import Any, Dict, Iterator, List, Tuple
+
+from address_normalizer import normalize_address
+
+# Appointment columns copied to the output, in output order
+APPOINTMENT_OUTPUT_COLUMNS = (
+    'appt_guid', 'appt_date_time', 'appt_time',
+    'patient_full_name', 'cloud9_patient_name', 'patient_status', 'patient_id',
+    'appt_care_center_location', 'appt_type', 'is_consult', 'appt_status',
+    'chair', 'appt_note', 'pat_apt_count_all', 'assigned_care_center'
+)
+
+# Appointment output columns that repeat across rows and are worth interning
+_INTERNED_APPOINTMENT_COLUMNS = {
+    'appt_time', 'patient_status', 'appt_care_center_location', 'appt_type',
+    'is_consult', 'appt_status', 'chair', 'assigned_care_center'
+}
+
+# Output columns of a schedule without appointments
+EMPTY_APPOINTMENT_FIELDS = ('',) * len(APPOINTMENT_OUTPUT_COLUMNS)
+
+# Ordinal for a missing or unparseable date or time (orders first)
+UNKNOWN_ORDINAL = -1
+
+@lru_cache(maxsize=None)
+def tc_sort_key(tc_name: str) -> Tuple[str, str, str, str]:
+    """
+    Get the key TC names are ordered by, matching the dashboard's localeCompare.
+
+    Names compare ignoring accents and case first, then with accents, then
+    with case (lowercase first), so "éva" and "eva" sort among the E names
+    rather than after "Z" as they would by code point. The name itself
+    breaks any remaining tie.
+    """
+    decomposed = unicodedata.normalize('NFD', tc_name)
+    base = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return (base.casefold(), tc_name.casefold(), tc_name.swapcase(), tc_name)
+
+def format_date_for_comparison(date_str: str) -> str:
+    """Convert M/D/YY format to YYYY-MM-DD format."""
+    try:
+        parts = date_str.split('/')
+        if len(parts) == 3:
+            month = parts[0].zfill(2)
+            day = parts[1].zfill(2)
+            year = parts[2] if len(parts[2]) == 4 else f"20{parts[2]}"
+            return f"{year}-{month}-{day}"
+    except Exception as e:
+        print(f"Error formatting date '{date_str}': {e}")
+    return date_str
+
+def date_ordinal(iso_date: str) -> int:
+    """Convert YYYY-MM-DD to a day number that sorts chronologically."""
+    try:
+        year, month, day = iso_date.split('-')
+        return date(int(year), int(month), int(day)).toordinal()
+    except ValueError:
+        return UNKNOWN_ORDINAL
+
+def time_ordinal(appt_time: str) -> int:
+    """Convert a Cloud9 time like '11H 30M 0S' to seconds since midnight."""
+    try:
+        hours, minutes, seconds = appt_time.split()
+        return int(hours.rstrip('H')) * 3600 + int(minutes.rstrip('M')) * 60 + int(seconds.rstrip('S'))
+    except ValueError:
+        return UNKNOWN_ORDINAL
+
+class ScheduleRecord:
+    """A Connecteam shift from schedule_data.csv."""
+
+    __slots__ = ('id', 'tc_name', 'date', 'iso_date', 'date_ordinal', 'start_time', 'end_time',
+                 'time_zone', 'store_guid', 'store_name', 'store_id', 'location', 'address',
+                 'normalized_address', 'job_id', 'is_published')
+
+    def __init__(self, row: Dict[str, str]):
+        get = row.get
+        self.id = get('id') or ''
+        self.tc_name = intern(get('assignedUsers') or '')
+        self.date = intern(get('startDate') or '')
+        self.iso_date = intern(format_date_for_comparison(self.date))
+        self.date_ordinal = date_ordinal(self.iso_date)
+        self.start_time = intern(get('startTime') or '')
+        self.end_time = intern(get('endTime') or '')
+        self.time_zone = intern(get('timeZone') or '')
+        self.store_guid = get('store_guid') or ''
+        self.store_name = intern(get('store_name') or '')
+        self.store_id = get('store_id') or ''
+        self.location = intern(get('location') or '')
+        self.address = intern(get('address') or '')
+        self.normalized_address = intern(get('normalized_address') or '')
+        self.job_id = intern(get('jobId') or '')
+        self.is_published = intern(get('isPublished') or '')
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, intern(value) if isinstance(value, str) else value)
+
+class AppointmentRecord:
+    """A Cloud9 appointment from cloud9_appts.csv."""
+
+    __slots__ = ('tc_name', 'iso_date', 'date_ordinal', 'time_ordinal', 'location_key', 'output')
+
+    def __init__(self, row: Dict[str, str]):
+        get = row.get
+        self.tc_name = intern(get('assigned_tc') or '')
+        self.iso_date = intern(get('appt_date') or '')
+        self.date_ordinal = date_ordinal(self.iso_date)
+        self.time_ordinal = time_ordinal(get('appt_time') or '')
+        self.location_key = intern(normalize_address(get('appt_care_center_location') or ''))
+        self.output = tuple(intern(get(column) or '') if column in _INTERNED_APPOINTMENT_COLUMNS
+                            else get(column) or ''
+                            for column in APPOINTMENT_OUTPUT_COLUMNS)
+
+    def __getstate__(self) -> Tuple[str, str, int, int, str, Tuple[str, ...]]:
+        return (self.tc_name, self.iso_date, self.date_ordinal, self.time_ordinal, self.location_key, self.output)
+
+    def __setstate__(self, state: Tuple[str, str, int, int, str, Tuple[str, ...]]) -> None:
+        self.tc_name, self.iso_date, self.date_ordinal, self.time_ordinal, self.location_key, self.output = (
+            intern(state[0]), intern(state[1]), state[2], state[3], intern(state[4]), state[5])
+
+class LocationRecord:
+    """A job location mapping from job_locations.csv."""
+
+    __slots__ = ('location', 'job')
+
+    def __init__(self, row: Dict[str, str]):
+        self.location = row.get('Location') or ''
+        self.job = intern(row.get('Job') or '')
+
+def iter_csv(filepath: str) -> Iterator[Dict[str, str]]:
+    """Stream a CSV file as dictionaries, one row at a time."""
+    try:
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            yield from reader
+    except FileNotFoundError:
+        print(f"ERROR: File not found: {filepath}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"ERROR loading {filepath}: {e}")
+        sys.exit(1)
+
+def iter_schedules(filepath: str) -> Iterator[ScheduleRecord]:
+    """Stream schedule records from a CSV file."""
+    return (ScheduleRecord(row) for row in iter_csv(filepath))
+
+def iter_appointments(filepath: str) -> Iterator[AppointmentRecord]:
+    """Stream appointment records from a CSV file."""
+    return (AppointmentRecord(row) for row in iter_csv(filepath))
+
+def load_locations(filepath: str) -> List[LocationRecord]:
+    """Load location mapping records from a CSV file."""
+    return [LocationRecord(row) for row in iter_csv(filepath)]
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Location Resolution Store
+
+Persists how join_data.py resolved each schedule location so the decision is
+made once and reused on later runs. Resolutions are keyed by
+(address, jobId), the address exactly as the schedule gives it since that
+is what address resolution compares, and record the canonical location name, the
+method that produced it and its score. Fuzzy appointment-location matches
+are kept alongside, keyed by the normalized display location.
+
+Address resolutions depend on job_locations.csv and fuzzy matches depend on
+the set of appointment locations and the threshold, so each section carries
+a fingerprint of its inputs and is dropped when those inputs change. Only
+keys never seen before (or invalidated) go through matching again.
+
+The store is a plain JSON file sorted by key so it can be read and diffed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+STORE_FILE = 'data-pipelines/connecteam/location_resolutions.json'
+STORE_VERSION = 2
+
+# Resolution methods
+METHOD_SCHEDULE_LOCATION = 'schedule_location'  # store/location name on the shift's job
+METHOD_EXACT_ADDRESS = 'exact_address'          # address equals a job_locations.csv Location
+METHOD_PARTIAL_ADDRESS = 'partial_address'      # address contains a Location's first segment
+METHOD_UNRESOLVED = 'unresolved'
+
+# Methods whose result depends on job_locations.csv
+ADDRESS_METHODS = {METHOD_EXACT_ADDRESS, METHOD_PARTIAL_ADDRESS, METHOD_UNRESOLVED}
+
+def fingerprint(values: Iterable[str]) -> str:
+    """Get a stable hash of a sequence of values."""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(value.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class LocationStore:
+    """
+    Location dimension store backed by a JSON file.
+
+    Call load() with the fingerprints of the current inputs, resolve() for
+    every schedule, optionally fuzzy_matches() for unmatched locations, then
+    save(). Nothing is written if no resolution changed.
+    """
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        self.locations_fingerprint = ''
+        self.fuzzy_fingerprint = ''
+        self.resolutions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.fuzzy: Dict[str, List[Tuple[str, float]]] = {}
+        # Keys added or changed since the last take_changes()
+        self.changed: Set[Tuple[str, str]] = set()
+        self.changed_fuzzy: Set[str] = set()
+        self.dirty = False
+        self.stats = {'reused': 0, 'resolved': 0, 'fuzzy_reused': 0, 'fuzzy_resolved': 0}
+
+    def load(self, locations_fingerprint: str, fuzzy_fingerprint: str = '', reset: bool = False) -> None:
+        """
+        Load the store, dropping sections whose inputs have changed.
+
+        Args:
+            locations_fingerprint: Fingerprint of job_locations.csv rows
+            fuzzy_fingerprint: Fingerprint of appointment locations and threshold
+                (empty when fuzzy matching is off)
+            reset: Start from an empty store instead of reading the file
+        """
+        data: Dict[str, Any] = {}
+        if not reset and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"  Warning: ignoring unreadable location store {self.path}: {e}")
+                data = {}
+        if data.get('version') != STORE_VERSION:
+            data = {}
+
+        locations_changed = data.get('locations_fingerprint') != locations_fingerprint
+        for entry in data.get('resolutions', []):
+            if locations_changed and entry.get('method') in ADDRESS_METHODS:
+                continue
+            self.resolutions[(entry['address'], entry['job_id'])] = entry
+
+        # Keep stored fuzzy matches on runs without fuzzy matching
+        fuzzy_changed = bool(fuzzy_fingerprint) and data.get('fuzzy_fingerprint') != fuzzy_fingerprint
+        if not fuzzy_changed:
+            self.fuzzy = {location: [(match, score) for match, score in matches]
+                          for location, matches in data.get('fuzzy_matches', {}).items()}
+
+        self.dirty = locations_changed or fuzzy_changed
+        self.locations_fingerprint = locations_fingerprint
+        self.fuzzy_fingerprint = fuzzy_fingerprint or data.get('fuzzy_fingerprint', '')
+
+    def _record(self, key: Tuple[str, str], location: Optional[str], method: str, score: float) -> None:
+        """Store a resolution if it is new or different."""
+        entry = self.resolutions.get(key)
+        if (entry is not None and entry['display_location'] == (location or '')
+                and entry['method'] == method and entry['score'] == score):
+            return
+        self.resolutions[key] = {
+            'address': key[0],
+            'job_id': key[1],
+            'display_location': location or '',
+            'method': method,
+            'score': score,
+            'resolved_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.changed.add(key)
+        self.dirty = True
+
+    def resolve(self, address: str, job_id: str, schedule_location: str,
+                resolve_address: Callable[[str], Tuple[Optional[str], str, float]]) -> Optional[str]:
+        """
+        Resolve a schedule's location name.
+
+        A store/location name on the schedule always wins and is only
+        recorded. Otherwise the stored address resolution is reused, and
+        resolve_address() is called only for keys not yet in the store.
+
+        Args:
+            address: Raw schedule address
+            job_id: Schedule jobId
+            schedule_location: Store or location name from the schedule row
+            resolve_address: Returns (location, method, score) for an address
+
+        Returns:
+            Location name, or None if it could not be resolved
+        """
+        key = (address, job_id)
+
+        if schedule_location:
+            self._record(key, schedule_location, METHOD_SCHEDULE_LOCATION, 1.0)
+            return schedule_location
+
+        entry = self.resolutions.get(key)
+        if entry is not None and entry['method'] in ADDRESS_METHODS:
+            self.stats['reused'] += 1
+            return entry['display_location'] or None
+
+        location, method, score = resolve_address(address)
+        self._record(key, location, method, score)
+        self.stats['resolved'] += 1
+        return location
+
+    def fuzzy_matches(self, location: str,
+                      match: Callable[[str], List[Tuple[str, float]]]) -> List[Tuple[str, float]]:
+        """Get the ranked fuzzy matches for a normalized location, computing them once."""
+        if location in self.fuzzy:
+            self.stats['fuzzy_reused'] += 1
+            return self.fuzzy[location]
+
+        matches = match(location)
+        self.fuzzy[location] = matches
+        self.changed_fuzzy.add(location)
+        self.stats['fuzzy_resolved'] += 1
+        self.dirty = True
+        return matches
+
+    def take_changes(self) -> Dict[str, Any]:
+        """
+        Get and clear what this copy of the store resolved since the last call.
+
+        Used by parallel join workers to send their new resolutions and
+        counters back to the parent's store (see merge_changes()).
+        """
+        changes = {
+            'resolutions': {key: self.resolutions[key] for key in self.changed},
+            'fuzzy': {location: self.fuzzy[location] for location in self.changed_fuzzy},
+            'stats': dict(self.stats),
+        }
+        self.changed.clear()
+        self.changed_fuzzy.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+        return changes
+
+    def merge_changes(self, changes: Dict[str, Any]) -> None:
+        """Apply changes taken from another copy of the store."""
+        if changes['resolutions'] or changes['fuzzy']:
+            self.dirty = True
+        self.resolutions.update(changes['resolutions'])
+        self.fuzzy.update(changes['fuzzy'])
+        for name, count in changes['stats'].items():
+            self.stats[name] += count
+
+    def save(self) -> bool:
+        """Write the store atomically if anything changed. Returns True if written."""
+        if not self.dirty:
+            return False
+
+        data = {
+            'version': STORE_VERSION,
+            'locations_fingerprint': self.locations_fingerprint,
+            'fuzzy_fingerprint': self.fuzzy_fingerprint,
+            'resolutions': [self.resolutions[key] for key in sorted(self.resolutions)],
+            'fuzzy_matches': {location: [[match, score] for match, score in self.fuzzy[location]]
+                              for location in sorted(self.fuzzy)},
+        }
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.location_resolutions.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self.dirty = False
+        return True
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Publish Dashboard Data Artifacts
+
+Last step of the data pipeline. Copies the dashboard artifacts under
+public/data/ to content-hash-named files in public/data/published/, writes
+pre-built gzip and brotli variants next to each, and writes a small pointer
+manifest (public/data/data-manifest.json) that maps each artifact's logical
+name to its hashed URL.
+
+Hashed files never change once written. next.config.ts reads the pointer
+manifest at build time and generates the headers and rewrites for them:
+immutable, year-long cache headers, and a rewrite to the .br or .gz variant
+chosen by the request's Accept-Encoding. Only the pointer manifest is revalidated on every
+load; a deploy that doesn't change an artifact doesn't change its URL, so
+browsers keep their cached copy.
+
+The published files are build output, not source: `npm run build` runs
+this script first (the prebuild step), and both public/data/published/ and
+the pointer manifest are gitignored. Committing them would add a full
+hashed copy of every artifact to the repository on each data refresh.
+
+Brotli variants need the optional `brotli` module (pip3 install brotli);
+without it only gzip variants are written.
+
+Usage:
+  python3 scripts/publish_data.py
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DATA_DIR = 'public/data'
+PUBLISH_DIR = 'public/data/published'
+POINTER_FILE = 'public/data/data-manifest.json'
+POINTER_VERSION = 1
+
+# URL prefix of PUBLISH_DIR as served from public/
+PUBLISH_URL = '/data/published'
+
+# Artifacts to publish, as globs relative to DATA_DIR
+ARTIFACT_PATTERNS = [
+    'joined_schedules.csv',
+    'tc_schedules.json',
+    'search_index.json',
+    'aggregates.json',
+    'shards/manifest.json',
+    'shards/tc_schedules_*.json',
+]
+
+# Characters of the SHA-256 kept in published file names
+HASH_LENGTH = 16
+
+def _write_atomic(filename: str, content: bytes) -> None:
+    """Write a file via a temporary file and rename, so readers never see it half written."""
+    directory = os.path.dirname(filename) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filename)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def hashed_name(logical_name: str, digest: str) -> str:
+    """Get the published file name, e.g. shards/manifest.json -> shards__manifest.<hash>.json."""
+    stem, ext = os.path.splitext(logical_name.replace('/', '__'))
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+def compress_variants(content: bytes) -> Dict[str, bytes]:
+    """Build the gzip and (if available) brotli encodings of a file."""
+    # mtime=0 keeps gzip output identical for identical input
+    variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(content, quality=11)
+    return variants
+
+def publish_file(logical_name: str, publish_dir: str) -> Dict[str, Any]:
+    """
+    Publish one artifact and its compressed variants.
+
+    Args:
+        logical_name: Path relative to DATA_DIR
+        publish_dir: Directory for published files
+
+    Returns:
+        Pointer manifest entry for the artifact
+    """
+    with open(os.path.join(DATA_DIR, logical_name), 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    filename = hashed_name(logical_name, digest)
+    path = os.path.join(publish_dir, filename)
+
+    entry: Dict[str, Any] = {
+        'url': f"{PUBLISH_URL}/{filename}",
+        'sha256': digest,
+        'bytes': len(content),
+        'encodings': {},
+    }
+
+    # Content-addressed: an existing file already has these bytes
+    if not os.path.exists(path):
+        _write_atomic(path, content)
+
+    extensions = {'gzip': '.gz', 'br': '.br'}
+    for encoding, encoded in compress_variants(content).items():
+        # Only keep encodings that actually save bytes
+        if len(encoded) >= len(content):
+            continue
+        variant_path = path + extensions[encoding]
+        if not os.path.exists(variant_path):
+            _write_atomic(variant_path, encoded)
+        entry['encodings'][encoding] = len(encoded)
+
+    return entry
+
+def load_pointer(filename: str) -> Dict[str, Any]:
+    """Load the current pointer manifest, or an empty one."""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            pointer = json.load(f)
+        return pointer if pointer.get('version') == POINTER_VERSION else {}
+    except (OSError, ValueError):
+        return {}
+
+def referenced_files(pointer: Dict[str, Any]) -> Set[str]:
+    """Get the published file names (with variants) a pointer manifest refers to."""
+    names = set()
+    for entry in pointer.get('files', {}).values():
+        filename = entry['url'].rsplit('/', 1)[-1]
+        names.add(filename)
+        names.update(filename + ext for ext in ('.gz', '.br'))
+    return names
+
+def prune(publish_dir: str, keep: Set[str]) -> int:
+    """Remove published files not in keep. Returns the number removed."""
+    removed = 0
+    for path in glob.glob(os.path.join(publish_dir, '*')):
+        if os.path.basename(path) not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+def publish(publish_dir: str = PUBLISH_DIR, pointer_file: str = POINTER_FILE) -> Dict[str, Any]:
+    """
+    Publish all dashboard artifacts and write the pointer manifest.
+
+    Files from the previous publish are kept for one more generation so
+    pages loaded before this publish can still fetch what their pointer
+    manifest referenced; anything older is removed.
+
+    Returns:
+        The new pointer manifest
+    """
+    logical_names: List[str] = []
+    for pattern in ARTIFACT_PATTERNS:
+        matches = sorted(glob.glob(os.path.join(DATA_DIR, pattern)))
+        logical_names.extend(os.path.relpath(path, DATA_DIR).replace(os.sep, '/') for path in matches)
+    if not logical_names:
+        print(f"ERROR: No artifacts found in {DATA_DIR}. Run join_data.py first.")
+        sys.exit(1)
+
+    previous = load_pointer(pointer_file)
+    os.makedirs(publish_dir, exist_ok=True)
+
+    files = {name: publish_file(name, publish_dir) for name in logical_names}
+    pointer = {
+        'version': POINTER_VERSION,
+        'published_at': datetime.now().isoformat(timespec='seconds'),
+        'files': files,
+    }
+    # Unchanged artifacts keep the previous timestamp so the pointer only changes with the data
+    if previous.get('files') == files:
+        pointer['published_at'] = previous.get('published_at', pointer['published_at'])
+
+    _write_atomic(pointer_file, (json.dumps(pointer, indent=2) + '\n').encode('utf-8'))
+    prune(publish_dir, referenced_files(pointer) | referenced_files(previous))
+    return pointer
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Publish content-hashed, precompressed dashboard data artifacts")
+    parser.add_argument('--publish-dir', default=PUBLISH_DIR,
+                        help=f"Directory for published files (default: {PUBLISH_DIR})")
+    parser.add_argument('--pointer', default=POINTER_FILE,
+                        help=f"Pointer manifest the dashboard loads first (default: {POINTER_FILE})")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    # Change to script's parent directory to ensure correct paths
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(os.path.join(script_dir, '..'))
+
+    print("Publishing dashboard data artifacts...")
+    if brotli is None:
+        print("  Note: brotli module not installed, writing gzip variants only (pip3 install brotli)")
+
+    pointer = publish(args.publish_dir, args.pointer)
+
+    total = sum(entry['bytes'] for entry in pointer['files'].values())
+    compressed = sum(min(entry['encodings'].values(), default=entry['bytes'])
+                     for entry in pointer['files'].values())
+    print(f"  ✓ Published {len(pointer['files']):,} artifacts to {args.publish_dir}")
+    print(f"  ✓ {total:,} bytes, {compressed:,} bytes with the smallest encoding")
+    print(f"  ✓ Wrote pointer manifest {args.pointer}")
+
+if __name__ == '__main__':
+    main()
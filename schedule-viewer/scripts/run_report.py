@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Pipeline Run Reports
+
+Stage-level instrumentation shared by connecteam_extractor.py and
+join_data.py. Each run writes a machine-readable JSON report to
+data-pipelines/reports/ so performance can be trended across runs:
+
+    {
+      "script": "join_data", "argv": [...], "started_at": ..., "finished_at": ...,
+      "status": "ok" | "error", "duration_seconds": ..., "peak_rss_kb": ...,
+      "stages": [{"name", "calls", "wall_seconds", "cpu_seconds",
+                  "rows_in", "rows_out", "peak_rss_kb", "traced_peak_kb"}, ...],
+      "requests": {"<endpoint>": {"requests", ..., "latency_histogram": {...}}},
+      "details": {"<section>": {"<key>": {...}}},
+      "profile": {"file": ..., "top": [...]}
+    }
+
+Stages are named blocks timed with stage(); a stage entered several times
+(e.g. once per scheduler) accumulates. Peak RSS is the process high-water
+mark when the stage ends. With profiling enabled, the whole run is captured
+with cProfile (saved as a .prof file next to the report, with the top
+functions summarized in it) and tracemalloc records each stage's peak
+Python allocation. Both slow the run down, so timings from profiled runs
+aren't comparable with normal ones.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+REPORT_DIR = 'data-pipelines/reports'
+REPORT_VERSION = 1
+
+# Upper bounds (seconds) of the request latency histogram buckets; slower requests go in the last
+LATENCY_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Functions listed in the report's profile summary
+PROFILE_TOP_FUNCTIONS = 25
+
+def latency_bucket(seconds: float) -> str:
+    """Get the histogram bucket label for a request latency, e.g. '<=0.25s' or '>10.0s'."""
+    for bound in LATENCY_BUCKETS_SECONDS:
+        if seconds <= bound:
+            return f"<={bound}s"
+    return f">{LATENCY_BUCKETS_SECONDS[-1]}s"
+
+def peak_rss_kb() -> int:
+    """Get the process's peak resident set size in KB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class Stage:
+    """Row counts of one stage execution, set by the code being timed."""
+
+    def __init__(self):
+        self.rows_in = 0
+        self.rows_out = 0
+
+class RunReport:
+    """
+    Collects stage timings, row counts, memory and request statistics for one run.
+
+    Use stage() around each step, set rows_in/rows_out on the yielded Stage,
+    and call write() at the end (also on failure).
+    """
+
+    def __init__(self, script: str, report_dir: str = REPORT_DIR, profile: bool = False):
+        self.script = script
+        self.report_dir = report_dir
+        self.profile = profile
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.requests: Dict[str, Dict[str, Any]] = {}
+        self.details: Dict[str, Dict[str, Any]] = {}
+        self.profiler: Optional[cProfile.Profile] = None
+        if profile:
+            tracemalloc.start()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        """Time a named stage; repeated stages with the same name accumulate."""
+        stage = Stage()
+        if self.profile:
+            tracemalloc.reset_peak()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield stage
+        finally:
+            entry = self.stages.setdefault(name, {
+                'name': name, 'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                'rows_in': 0, 'rows_out': 0, 'peak_rss_kb': 0,
+            })
+            entry['calls'] += 1
+            entry['wall_seconds'] += time.perf_counter() - wall_started
+            entry['cpu_seconds'] += time.process_time() - cpu_started
+            entry['rows_in'] += stage.rows_in
+            entry['rows_out'] += stage.rows_out
+            entry['peak_rss_kb'] = peak_rss_kb()
+            if self.profile:
+                traced_peak = tracemalloc.get_traced_memory()[1] // 1024
+                entry['traced_peak_kb'] = max(entry.get('traced_peak_kb', 0), traced_peak)
+
+    def record(self, section: str, key: str, **values: Any) -> None:
+        """Add details for one item of a section, e.g. per-scheduler fetch times; numbers accumulate."""
+        entry = self.details.setdefault(section, {}).setdefault(key, {})
+        for name, value in values.items():
+            if isinstance(value, (int, float)) and isinstance(entry.get(name), (int, float)):
+                entry[name] += value
+            else:
+                entry[name] = value
+
+    def set_requests(self, requests: Dict[str, Dict[str, Any]]) -> None:
+        """Attach per-endpoint request statistics (including latency histograms)."""
+        self.requests = json.loads(json.dumps(requests))
+
+    def _profile_summary(self, prof_file: str) -> Dict[str, Any]:
+        """Stop the profiler, save its stats and summarize the top functions by cumulative time."""
+        self.profiler.disable()
+        self.profiler.dump_stats(prof_file)
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        top: List[Dict[str, Any]] = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            top.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'total_seconds': round(total, 6),
+                'cumulative_seconds': round(cumulative, 6),
+            })
+        top.sort(key=lambda item: item['cumulative_seconds'], reverse=True)
+        return {'file': prof_file, 'top': top[:PROFILE_TOP_FUNCTIONS]}
+
+    def write(self, status: str = 'ok') -> str:
+        """Write the report (and profile, if enabled) and return the report path."""
+        os.makedirs(self.report_dir, exist_ok=True)
+        stamp = self.started_at.strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(self.report_dir, f"{self.script}_{stamp}.json")
+
+        report = {
+            'version': REPORT_VERSION,
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'status': status,
+            'duration_seconds': round(time.perf_counter() - self.started, 3),
+            'peak_rss_kb': peak_rss_kb(),
+            'stages': [{name: round(value, 3) if isinstance(value, float) else value
+                        for name, value in stage.items()} for stage in self.stages.values()],
+            'requests': self.requests,
+            'details': self.details,
+        }
+        if self.profiler is not None:
+            report['profile'] = self._profile_summary(path[:-len('.json')] + '.prof')
+            tracemalloc.stop()
+            self.profiler = None
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        return path
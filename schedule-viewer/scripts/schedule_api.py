@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Local Schedule Query API
+
+A small HTTP service (standard library only) that answers the dashboard's
+filters on the server instead of shipping the whole dataset to the browser.
+It loads public/data/tc_schedules.json into in-memory indexes:
+
+  - by date: schedules are stored in the artifact's chronological order, so a
+    date window is one contiguous range found by binary search
+  - by TC and by normalized location: sorted schedule positions
+  - by text: an inverted index from lowercase word tokens of the TC name,
+    location, address, patient names and appointment locations to schedule
+    positions, with a bigram index over the words. Text queries match like
+    the dashboard's search box (lib/search.ts): the query must be a
+    case-insensitive substring of one of those fields. Every word of such a
+    query lies inside a word of the schedule, so the schedules having a word
+    containing each query word are the candidates, and only they get the
+    substring check
+
+Filters are intersected starting from the smallest candidate list and only
+the requested page is built, so response time follows the result size
+rather than the size of the history.
+
+Endpoints (GET):
+  /api/schedules?tc=&date=today|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD
+                 &location=&q=&offset=0&limit=100
+      {"total", "offset", "limit", "schedules": [TCSchedule, ...]}
+  /api/tcs       {"tc_names": [...], "start", "end"}
+
+Responses carry an ETag derived from the data file's hash and the
+resolved query (relative dates as the actual start and end dates), and If-None-Match requests get 304. The data file is
+reloaded when join_data.py rewrites it.
+
+Usage:
+  python3 scripts/schedule_api.py [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from address_normalizer import normalize_address
+from join_records import UNKNOWN_ORDINAL, date_ordinal, format_date_for_comparison
+from search_index import MIN_INDEXED_WORD_LENGTH, WordIndex, tokenize
+
+DATA_FILE = 'public/data/tc_schedules.json'
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+def date_window(name: str, today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+    """
+    Get the dashboard's relative date filters as (start, end), inclusive.
+
+    Mirrors getDateFilterRange in lib/data-loader.ts, including how a month
+    ahead overflows into the following month (Jan 31 -> Mar 3).
+    """
+    today = today or date.today()
+    if name == 'today':
+        return today, today
+    if name == 'week':
+        return today, today + timedelta(days=7)
+    if name == 'month':
+        year, month = (today.year + 1, 1) if today.month == 12 else (today.year, today.month + 1)
+        return today, date(year, month, 1) + timedelta(days=today.day - 1)
+    return None
+
+def _intersect(sorted_a: List[int], sorted_b: List[int]) -> List[int]:
+    """Intersect two sorted position lists."""
+    if len(sorted_a) > len(sorted_b):
+        sorted_a, sorted_b = sorted_b, sorted_a
+    members = set(sorted_b)
+    return [position for position in sorted_a if position in members]
+
+class ScheduleIndex:
+    """In-memory schedules from tc_schedules.json with date, TC, location and text indexes."""
+
+    def __init__(self, artifact: Dict[str, Any], data_hash: str):
+        self.data_hash = data_hash
+        schedule_fields = artifact['schedule_fields']
+        appointment_fields = artifact['appointment_fields']
+
+        self.schedules: List[Dict[str, Any]] = []
+        self.date_ordinals: List[int] = []
+        self.by_tc: Dict[str, List[int]] = {}
+        self.by_location: Dict[str, List[int]] = {}
+        self.search_texts: List[Tuple[str, ...]] = []
+        postings: Dict[str, List[int]] = {}
+
+        for position, (values, appointment_count, appointment_rows) in enumerate(artifact['schedules']):
+            fields = dict(zip(schedule_fields, values))
+            appointments = [{**fields, **dict(zip(appointment_fields, row))} for row in appointment_rows]
+            match_quality = fields['match_quality'] if fields['match_quality'] in ('exact', 'fuzzy') else 'unmatched'
+            # Same shape as TCSchedule in lib/types.ts
+            self.schedules.append({
+                'tcName': fields['tc_name'],
+                'date': fields['date'],
+                'location': fields['schedule_location'],
+                'address': fields['schedule_address'],
+                'startTime': fields['start_time'],
+                'endTime': fields['end_time'],
+                'appointmentCount': appointment_count,
+                'appointments': appointments,
+                'matchQuality': match_quality,
+            })
+            self.date_ordinals.append(date_ordinal(format_date_for_comparison(fields['date'])))
+            self.by_tc.setdefault(fields['tc_name'], []).append(position)
+            self.by_location.setdefault(normalize_address(fields['schedule_location']), []).append(position)
+
+            texts = [fields['tc_name'], fields['schedule_location'], fields['schedule_address']]
+            for appt in appointments:
+                texts.append(appt['patient_full_name'])
+                texts.append(appt['appt_care_center_location'])
+            self.search_texts.append(tuple(text.lower() for text in texts))
+            for token in set(token for text in texts for token in tokenize(text)):
+                postings.setdefault(token, []).append(position)
+
+        if any(a > b for a, b in zip(self.date_ordinals, self.date_ordinals[1:])):
+            raise ValueError("tc_schedules.json is not in chronological order; re-run join_data.py")
+
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.word_index = WordIndex(self.vocabulary)
+        self.tc_names = sorted(self.by_tc)
+        dated = [ordinal for ordinal in self.date_ordinals if ordinal != UNKNOWN_ORDINAL]
+        self.start = date.fromordinal(dated[0]).isoformat() if dated else ''
+        self.end = date.fromordinal(dated[-1]).isoformat() if dated else ''
+
+    @classmethod
+    def load(cls, filename: str) -> 'ScheduleIndex':
+        with open(filename, 'rb') as f:
+            content = f.read()
+        artifact = json.loads(content)
+        if artifact.get('version') != 1:
+            raise ValueError(f"Unsupported {filename} version: {artifact.get('version')}")
+        return cls(artifact, hashlib.sha256(content).hexdigest())
+
+    def _word_positions(self, fragment: str) -> List[int]:
+        """Get the sorted positions of schedules with a word containing fragment."""
+        matches = [self.postings[self.vocabulary[i]] for i in self.word_index.containing(fragment)]
+        if len(matches) == 1:
+            return matches[0]
+        return sorted(set().union(*matches))
+
+    def _matches_text(self, position: int, text: str) -> bool:
+        return any(text in field for field in self.search_texts[position])
+
+    def query(self, tc: str = '', start: Optional[date] = None, end: Optional[date] = None,
+              location: str = '', text: str = '', offset: int = 0,
+              limit: int = DEFAULT_PAGE_SIZE) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Find schedules matching all given filters.
+
+        Returns:
+            (total number of matches, the requested page of schedules)
+        """
+        # The date window is a contiguous range of positions
+        low, high = 0, len(self.schedules)
+        if start is not None:
+            low = bisect_left(self.date_ordinals, start.toordinal())
+        if end is not None:
+            high = bisect_right(self.date_ordinals, end.toordinal())
+
+        candidates: List[List[int]] = []
+        if tc:
+            candidates.append(self.by_tc.get(tc, []))
+        if location:
+            candidates.append(self.by_location.get(normalize_address(location), []))
+        text = text.lower()
+        for word in dict.fromkeys(tokenize(text)):
+            if len(word) >= MIN_INDEXED_WORD_LENGTH:
+                candidates.append(self._word_positions(word))
+
+        if not candidates:
+            positions = range(low, high)
+        else:
+            candidates.sort(key=len)
+            positions = candidates[0]
+            for other in candidates[1:]:
+                if not positions:
+                    break
+                positions = _intersect(positions, other)
+            positions = positions[bisect_left(positions, low):bisect_left(positions, high)]
+        if text:
+            # Multi-word and punctuated queries must match as typed
+            positions = [position for position in positions if self._matches_text(position, text)]
+
+        page = positions[offset:offset + limit]
+        return len(positions), [self.schedules[position] for position in page]
+
+class ScheduleData:
+    """Holds the current index, reloading it when the data file changes."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.index: Optional[ScheduleIndex] = None
+
+    def get(self) -> ScheduleIndex:
+        mtime = os.stat(self.filename).st_mtime_ns
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    self.index = ScheduleIndex.load(self.filename)
+                    self.mtime = mtime
+                    print(f"Loaded {len(self.index.schedules):,} schedules from {self.filename}")
+        return self.index
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """Serves the query endpoints from the server's ScheduleData."""
+
+    server_version = 'ScheduleAPI/1.0'
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            index = self.server.data.get()
+            if url.path == '/api/schedules':
+                query = self._schedule_query(params)
+                total, schedules = index.query(**query)
+                body = {'total': total, 'offset': query['offset'], 'limit': query['limit'], 'schedules': schedules}
+            elif url.path == '/api/tcs':
+                query = {}
+                body = {'tc_names': index.tc_names, 'start': index.start, 'end': index.end}
+            else:
+                self._send_error(404, f"Unknown endpoint {url.path}")
+                return
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        except OSError as e:
+            self._send_error(503, f"Data unavailable: {e}")
+            return
+
+        # Same data and resolved query give the same response (date=today etc.
+        # resolve to the current day's window, so the tag changes at midnight)
+        etag_source = json.dumps([index.data_hash, url.path, query], sort_keys=True, default=str)
+        etag = '"' + hashlib.sha256(etag_source.encode('utf-8')).hexdigest()[:32] + '"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._send_json(200, body, etag)
+
+    def _schedule_query(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Resolve /api/schedules parameters into ScheduleIndex.query arguments."""
+        start = end = None
+        if params.get('date'):
+            window = date_window(params['date'])
+            if window is None:
+                raise ValueError("date must be today, week or month")
+            start, end = window
+        if params.get('start'):
+            start = date.fromisoformat(params['start'])
+        if params.get('end'):
+            end = date.fromisoformat(params['end'])
+
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+        if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+
+        return {'tc': params.get('tc', ''), 'start': start, 'end': end, 'location': params.get('location', ''),
+                'text': params.get('q', ''), 'offset': offset, 'limit': limit}
+
+    def _send_json(self, status: int, body: Dict[str, Any], etag: Optional[str] = None) -> None:
+        content = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if len(content) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            content = gzip.compress(content, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {'error': message})
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Serve filtered, paginated schedule queries over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--data', default=DATA_FILE, help=f"Pre-grouped schedules artifact (default: {DATA_FILE})")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    # Change to script's parent directory to ensure correct paths
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(os.path.join(script_dir, '..'))
+
+    data = ScheduleData(args.data)
+    try:
+        data.get()
+    except FileNotFoundError:
+        print(f"ERROR: {args.data} not found. Run join_data.py first.")
+        raise SystemExit(1)
+
+    server = ThreadingHTTPServer((args.host, args.port), ScheduleRequestHandler)
+    server.data = data
+    print(f"Serving schedule queries on http://{args.host}:{args.port}/api/schedules")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
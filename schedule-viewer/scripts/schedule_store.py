@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+SQLite Schedule Store
+
+An embedded SQLite database holding the pipeline's inputs: Connecteam shifts
+keyed by id, Cloud9 appointments keyed by appt_guid and the job_locations.csv
+mappings. The extractor upserts shifts into it and exports
+schedule_data.csv from it; join_data.py --sqlite bulk-loads appointments and
+locations into it and joins straight from its indexes.
+
+Extractor runs without --sqlite rewrite schedule_data.csv alone, so the
+store records the SHA-256 of the CSV its shifts last matched, and
+sync_shifts_csv() reloads the shifts from any CSV that has changed since.
+
+Shifts are indexed on (TC, date), (date, location) and jobId, and
+appointments on (TC, date) and (date, normalized location), so reading one
+TC's day or one location's day never scans the table. Upserts keep a row's
+rowid, so exports keep the order rows were first seen in, like the CSV merge.
+
+The database runs in WAL mode: a reader inside a transaction (see
+snapshot()) sees one consistent state even while the extractor writes.
+"""
+
+import csv
+import hashlib
+import os
+import sqlite3
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from address_normalizer import normalize_address
+from join_records import (ScheduleRecord, AppointmentRecord, LocationRecord, format_date_for_comparison,
+                          date_ordinal, tc_sort_key)
+
+STORE_FILE = 'data-pipelines/connecteam/schedule_store.sqlite'
+SCHEMA_VERSION = 1
+
+# schedule_data.csv columns, in file order
+SHIFT_COLUMNS = (
+    'id', 'assignedUsers', 'startDateTime', 'endDateTime', 'startDate', 'endDate',
+    'startTime', 'endTime', 'timeZone', 'isOpenShift', 'title', 'location',
+    'address', 'normalized_address', 'jobId', 'isPublished', 'updatedDateTime',
+    'createdDateTime', 'shiftName'
+)
+
+# meta key of the SHA-256 of the schedule_data.csv the shifts table matches
+SHIFTS_CSV_KEY = 'shifts_csv_sha256'
+
+# cloud9_appts.csv columns, in file order
+APPOINTMENT_COLUMNS = (
+    'appt_guid', 'appt_date_time', 'appt_date', 'appt_time', 'patient_full_name',
+    'cloud9_patient_name', 'patient_status', 'patient_id', 'appt_care_center_location',
+    'appt_type', 'is_consult', 'appt_status', 'chair', 'assigned_tc', 'appt_note',
+    'pat_apt_count_all', 'assigned_care_center'
+)
+
+# job_locations.csv columns, in file order
+JOB_LOCATION_COLUMNS = ('Job', 'Location', 'Job Schedules')
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+def _column_list(columns: Sequence[str]) -> str:
+    return ', '.join(_quote(column) for column in columns)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS shifts (
+    {', '.join(f"{_quote(column)} TEXT NOT NULL DEFAULT ''" for column in SHIFT_COLUMNS)},
+    iso_date TEXT NOT NULL,
+    date_ordinal INTEGER NOT NULL,
+    UNIQUE (id)
+);
+CREATE INDEX IF NOT EXISTS shifts_tc_date ON shifts (assignedUsers, iso_date);
+CREATE INDEX IF NOT EXISTS shifts_date_location ON shifts (iso_date, location);
+CREATE INDEX IF NOT EXISTS shifts_job ON shifts (jobId);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    {', '.join(f"{_quote(column)} TEXT NOT NULL DEFAULT ''" for column in APPOINTMENT_COLUMNS)},
+    location_key TEXT NOT NULL,
+    UNIQUE (appt_guid)
+);
+CREATE INDEX IF NOT EXISTS appointments_tc_date ON appointments (assigned_tc, appt_date);
+CREATE INDEX IF NOT EXISTS appointments_date_location ON appointments (appt_date, location_key);
+
+CREATE TABLE IF NOT EXISTS job_locations (
+    {', '.join(f"{_quote(column)} TEXT NOT NULL DEFAULT ''" for column in JOB_LOCATION_COLUMNS)}
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def file_sha256(path: str) -> str:
+    """Get the SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _compare_tc_names(a: str, b: str) -> int:
+    """SQLite collation ordering TC names by tc_sort_key(), like join_data.py."""
+    key_a, key_b = tc_sort_key(a), tc_sort_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+def _dict_factory(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Return rows as dicts, the shape csv.DictReader gives the record classes."""
+    return {description[0]: value for description, value in zip(cursor.description, row)}
+
+class ScheduleStore:
+    """
+    Schedule, appointment and location tables in one SQLite file.
+
+    Writes happen in one transaction per call, so a failed load leaves the
+    previous contents in place.
+    """
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are managed explicitly (see _transaction and snapshot)
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.row_factory = _dict_factory
+        self.connection.create_collation('tc_order', _compare_tc_names)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+
+        version = self.connection.execute('PRAGMA user_version').fetchone()['user_version']
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}")
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run writes in one immediate transaction, rolled back on error."""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    @contextmanager
+    def snapshot(self) -> Iterator['ScheduleStore']:
+        """Read everything inside the block from one consistent state of the database."""
+        self.connection.execute('BEGIN')
+        try:
+            # A deferred transaction pins its snapshot at the first read
+            self.connection.execute('SELECT 1 FROM shifts LIMIT 1').fetchall()
+            yield self
+        finally:
+            self.connection.execute('COMMIT')
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, connection: sqlite3.Connection, key: str, value: str) -> None:
+        connection.execute('INSERT INTO meta (key, value) VALUES (?, ?) '
+                           'ON CONFLICT (key) DO UPDATE SET value = excluded.value', (key, value))
+
+    # Shifts
+
+    def _upsert_shifts(self, connection: sqlite3.Connection, shifts: Iterable[Dict[str, Any]]) -> int:
+        columns = SHIFT_COLUMNS + ('iso_date', 'date_ordinal')
+        updates = ', '.join(f"{_quote(column)} = excluded.{_quote(column)}" for column in columns[1:])
+        sql = (f"INSERT INTO shifts ({_column_list(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (id) DO UPDATE SET {updates}")
+
+        def values() -> Iterator[Tuple[Any, ...]]:
+            for shift in shifts:
+                iso_date = format_date_for_comparison(shift.get('startDate') or '')
+                yield tuple(shift.get(column) or '' for column in SHIFT_COLUMNS) + (iso_date, date_ordinal(iso_date))
+
+        return connection.executemany(sql, values()).rowcount
+
+    def upsert_shifts(self, shifts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or update shifts by id.
+
+        Updated shifts keep their position; new shifts are appended.
+
+        Returns:
+            Number of shifts written
+        """
+        with self._transaction() as connection:
+            return self._upsert_shifts(connection, shifts)
+
+    def replace_shifts(self, shifts: Iterable[Dict[str, Any]],
+                       failed_shift_names: Iterable[str] = ()) -> Tuple[int, int]:
+        """
+        Upsert a full extraction and delete shifts it no longer contains.
+
+        Shifts whose shiftName is in failed_shift_names belong to schedulers
+        that could not be fetched, so they are kept rather than deleted.
+
+        Returns:
+            (shifts written, shifts deleted)
+        """
+        shifts = list(shifts)
+        failed_shift_names = list(failed_shift_names)
+        with self._transaction() as connection:
+            written = self._upsert_shifts(connection, shifts)
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS current_ids (id TEXT PRIMARY KEY)')
+            connection.execute('DELETE FROM current_ids')
+            connection.executemany('INSERT OR IGNORE INTO current_ids VALUES (?)',
+                                   ((shift.get('id') or '',) for shift in shifts))
+            placeholders = ', '.join('?' * len(failed_shift_names))
+            deleted = connection.execute(
+                f'DELETE FROM shifts WHERE id NOT IN (SELECT id FROM current_ids) '
+                f'AND shiftName NOT IN ({placeholders})', failed_shift_names).rowcount
+            connection.execute('DROP TABLE current_ids')
+        return written, deleted
+
+    def record_shifts_csv(self, path: str) -> None:
+        """Record that the schedule_data.csv at path holds exactly the stored shifts (after exporting it)."""
+        digest = file_sha256(path)
+        with self._transaction() as connection:
+            self._set_meta(connection, SHIFTS_CSV_KEY, digest)
+
+    def sync_shifts_csv(self, path: str) -> bool:
+        """
+        Reload the shifts from schedule_data.csv if it changed since the store last matched it.
+
+        A CSV the store did not write or load is newer than the store (an
+        extractor run without --sqlite), so its rows replace all stored
+        shifts, in file order. A missing CSV leaves the store as it is.
+
+        Returns:
+            True if the shifts were reloaded
+        """
+        if not os.path.exists(path):
+            return False
+        digest = file_sha256(path)
+        if digest == self._meta(SHIFTS_CSV_KEY):
+            return False
+        with open(path, 'r', newline='', encoding='utf-8-sig') as csvfile, self._transaction() as connection:
+            connection.execute('DELETE FROM shifts')
+            self._upsert_shifts(connection, csv.DictReader(csvfile))
+            self._set_meta(connection, SHIFTS_CSV_KEY, digest)
+        return True
+
+    def count_shifts(self) -> int:
+        return self.connection.execute('SELECT count(*) AS n FROM shifts').fetchone()['n']
+
+    def write_shifts_csv(self, csvfile: TextIO) -> int:
+        """Export shifts as schedule_data.csv, in the order they were first stored. Returns the row count."""
+        writer = csv.writer(csvfile)
+        writer.writerow(SHIFT_COLUMNS)
+        count = 0
+        for row in self.connection.execute(f"SELECT {_column_list(SHIFT_COLUMNS)} FROM shifts ORDER BY rowid"):
+            writer.writerow(row.values())
+            count += 1
+        return count
+
+    def shifts_for_tc(self, tc_name: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Get a TC's shifts between two YYYY-MM-DD dates (inclusive)."""
+        return self.connection.execute(
+            f"SELECT {_column_list(SHIFT_COLUMNS)} FROM shifts "
+            "WHERE assignedUsers = ? AND iso_date BETWEEN ? AND ? ORDER BY iso_date, rowid",
+            (tc_name, start_date, end_date)).fetchall()
+
+    def shifts_at_location(self, location: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Get the shifts at a location between two YYYY-MM-DD dates (inclusive)."""
+        return self.connection.execute(
+            f"SELECT {_column_list(SHIFT_COLUMNS)} FROM shifts "
+            "WHERE iso_date BETWEEN ? AND ? AND location = ? ORDER BY iso_date, rowid",
+            (start_date, end_date, location)).fetchall()
+
+    # Appointments and locations
+
+    def load_appointments(self, appointments: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Bulk-load a full Cloud9 export, upserting by appt_guid and deleting appointments it no longer contains.
+
+        Returns:
+            (appointments written, appointments deleted)
+        """
+        columns = APPOINTMENT_COLUMNS + ('location_key',)
+        updates = ', '.join(f"{_quote(column)} = excluded.{_quote(column)}" for column in columns[1:])
+        sql = (f"INSERT INTO appointments ({_column_list(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (appt_guid) DO UPDATE SET {updates}")
+
+        guids: List[Tuple[str]] = []
+
+        def values() -> Iterator[Tuple[str, ...]]:
+            for appt in appointments:
+                guids.append((appt.get('appt_guid') or '',))
+                yield (tuple(appt.get(column) or '' for column in APPOINTMENT_COLUMNS) +
+                       (normalize_address(appt.get('appt_care_center_location') or ''),))
+
+        with self._transaction() as connection:
+            written = connection.executemany(sql, values()).rowcount
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS current_guids (appt_guid TEXT PRIMARY KEY)')
+            connection.execute('DELETE FROM current_guids')
+            connection.executemany('INSERT OR IGNORE INTO current_guids VALUES (?)', guids)
+            deleted = connection.execute(
+                'DELETE FROM appointments WHERE appt_guid NOT IN (SELECT appt_guid FROM current_guids)').rowcount
+            connection.execute('DROP TABLE current_guids')
+        return written, deleted
+
+    def load_job_locations(self, locations: Iterable[Dict[str, Any]]) -> int:
+        """Replace the job location mappings. Returns the number loaded."""
+        sql = f"INSERT INTO job_locations ({_column_list(JOB_LOCATION_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_LOCATION_COLUMNS))})"
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM job_locations')
+            return connection.executemany(
+                sql, (tuple(row.get(column) or '' for column in JOB_LOCATION_COLUMNS) for row in locations)).rowcount
+
+    def locations(self) -> List[LocationRecord]:
+        """Get the job location mappings in file order."""
+        return [LocationRecord(row) for row in
+                self.connection.execute('SELECT Job, Location FROM job_locations ORDER BY rowid')]
+
+    def count_appointments(self) -> int:
+        return self.connection.execute('SELECT count(*) AS n FROM appointments').fetchone()['n']
+
+    def appointment_locations(self) -> List[str]:
+        """Get the distinct non-empty normalized appointment locations."""
+        return [row['location_key'] for row in self.connection.execute(
+            "SELECT DISTINCT location_key FROM appointments WHERE location_key != ''")]
+
+    # Join
+
+    def iter_join_groups(self) -> Iterator[Tuple[List[ScheduleRecord], List[AppointmentRecord]]]:
+        """
+        Yield (schedules, appointments) for each (date, TC) group that has schedules with assigned users.
+
+        Groups come in join_data.py's output order (date, then TC name by
+        tc_sort_key() through the tc_order collation), each side in stored
+        order. Appointments are fetched per group through the (TC, date)
+        index and exclude those without a location, which can never match.
+        """
+        schedules = (ScheduleRecord(row) for row in self.connection.execute(
+            f"SELECT {_column_list(SHIFT_COLUMNS)} FROM shifts WHERE trim(assignedUsers, char(9, 10, 11, 12, 13, 32)) != '' "
+            "ORDER BY date_ordinal, assignedUsers COLLATE tc_order, rowid"))
+        appointment_sql = (f"SELECT {_column_list(APPOINTMENT_COLUMNS)} FROM appointments "
+                           "WHERE assigned_tc = ? AND appt_date = ? AND location_key != '' ORDER BY rowid")
+
+        cursor = self.connection.cursor()
+        for _, group in groupby(schedules, key=lambda schedule: (schedule.date_ordinal, schedule.tc_name)):
+            group = list(group)
+            # Unparseable dates share an ordinal but not a date string
+            appointments = []
+            for iso_date in dict.fromkeys(schedule.iso_date for schedule in group):
+                appointments.extend(AppointmentRecord(row) for row in
+                                    cursor.execute(appointment_sql, (group[0].tc_name, iso_date)))
+            yield group, appointments
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Dashboard Search Index
+
+Builds public/data/search_index.json from the grouped TC schedules so the
+dashboard's search box can look up candidate schedules instead of
+substring-scanning every schedule and appointment on each keystroke.
+
+Each searchable field (TC name, location, address, and every appointment's
+patient name and care center location) is lowercased and split into
+alphanumeric words. The index maps every distinct word to the schedules
+containing it:
+
+    {
+      "version": 1,
+      "schedule_ids": ["<schedule_id>", ...],
+      "tokens": ["abby", "bronx", ...],
+      "postings": [[0, 5, 17], [3, 4], ...]
+    }
+
+tokens is sorted and postings[i] lists the positions in schedule_ids of the
+schedules containing tokens[i], ascending. Any word of a substring query is
+itself a substring of one of the schedule's words, so the dashboard finds
+the matching tokens in the (much smaller) vocabulary, intersects their
+postings and only checks the remaining candidates against the full query.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Sequence
+
+from tc_schedules import write_atomic
+
+INDEX_VERSION = 1
+SEARCH_INDEX_FILE = 'public/data/search_index.json'
+
+# Fields the dashboard searches (see filterBySearch in lib/search.ts)
+SCHEDULE_SEARCH_FIELDS = ('tc_name', 'schedule_location', 'schedule_address')
+APPOINTMENT_SEARCH_FIELDS = ('patient_full_name', 'appt_care_center_location')
+
+# Shorter query words match most schedules, so they only go through the full check
+MIN_INDEXED_WORD_LENGTH = 2
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric words."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def _bigrams(word: str) -> set:
+    return {word[i:i + 2] for i in range(len(word) - 1)}
+
+class WordIndex:
+    """
+    Finds the vocabulary words containing a query word.
+
+    Words are indexed by their character bigrams, so a lookup only checks
+    the words sharing the query word's rarest bigram instead of scanning
+    the vocabulary.
+    """
+
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        self.by_bigram: Dict[str, List[int]] = {}
+        for i, word in enumerate(self.words):
+            for bigram in _bigrams(word):
+                self.by_bigram.setdefault(bigram, []).append(i)
+
+    def containing(self, fragment: str) -> List[int]:
+        """Get the positions of the words containing fragment (at least MIN_INDEXED_WORD_LENGTH long)."""
+        rarest = min(_bigrams(fragment), key=lambda bigram: len(self.by_bigram.get(bigram, ())))
+        return [i for i in self.by_bigram.get(rarest, ()) if fragment in self.words[i]]
+
+class SearchIndexBuilder:
+    """Builds the search index one grouped schedule at a time (a TCScheduleAggregator sink)."""
+
+    def __init__(self, schedule_fields: Sequence[str], appointment_fields: Sequence[str]):
+        self.schedule_columns = [schedule_fields.index(field) for field in SCHEDULE_SEARCH_FIELDS]
+        self.appointment_columns = [appointment_fields.index(field) for field in APPOINTMENT_SEARCH_FIELDS]
+        self.id_column = schedule_fields.index('schedule_id')
+        self.schedule_ids: List[str] = []
+        self.postings: Dict[str, List[int]] = {}
+
+    def add(self, entry: Sequence[Any]) -> None:
+        """Add a schedule: (schedule values, appointment value rows, ...), as held by TCScheduleAggregator."""
+        schedule_values, appointments = entry[0], entry[1]
+        position = len(self.schedule_ids)
+        self.schedule_ids.append(schedule_values[self.id_column])
+
+        tokens = set()
+        for column in self.schedule_columns:
+            tokens.update(tokenize(schedule_values[column]))
+        for appointment_values in appointments:
+            for column in self.appointment_columns:
+                tokens.update(tokenize(appointment_values[column]))
+        for token in tokens:
+            self.postings.setdefault(token, []).append(position)
+
+    def build(self) -> Dict[str, Any]:
+        """Get the index, ready to serialize."""
+        tokens = sorted(self.postings)
+        return {
+            'version': INDEX_VERSION,
+            'schedule_ids': self.schedule_ids,
+            'tokens': tokens,
+            'postings': [self.postings[token] for token in tokens],
+        }
+
+def write_search_index(index: Dict[str, Any], filename: str = SEARCH_INDEX_FILE) -> None:
+    """Write the index compactly (atomically, as it is read by publish_data.py)."""
+    write_atomic(filename, json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
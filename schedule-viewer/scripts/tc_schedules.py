@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Pre-grouped TC Schedules Artifact
+
+Builds public/data/tc_schedules.json from the joined rows so the dashboard
+can load TCSchedule[] (lib/types.ts) directly instead of downloading
+joined_schedules.csv and regrouping it by schedule_id in the browser.
+
+The JSON is compact: field names are listed once, each schedule's fields are
+stored once, and its appointments follow as arrays of appointment fields.
+
+    {
+      "version": 1,
+      "schedule_fields": ["schedule_id", "tc_name", ...],
+      "appointment_fields": ["appt_guid", ...],
+      "schedules": [[[schedule values...], appointment_count, [[appointment values...], ...]], ...]
+    }
+
+Schedules appear in the order their first row was joined (chronological),
+each schedule_id once, with the schedule fields of its first row and only the
+rows that have an appointment, matching buildTCSchedulesFromJoinedData.
+
+The same schedules are also written as per-month (or per-week) shards in
+public/data/shards/, each in the format above, with a manifest.json listing
+every shard's date range, counts and content hash. The dashboard fetches
+only the shards overlapping its date filter.
+
+Joined rows arrive ordered by (date, TC), so a schedule is complete once
+its (date, TC) group ends. TCScheduleAggregator then hands it to its sinks
+(ArtifactWriter, ShardWriter, and the search index and aggregates builders)
+and forgets it: the artifacts are streamed to disk, and memory holds one
+group rather than the whole join, which keeps join_data.py --stream bounded.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from join_records import date_ordinal, format_date_for_comparison, tc_sort_key
+
+ARTIFACT_VERSION = 1
+MANIFEST_VERSION = 1
+
+SHARD_DIR = 'public/data/shards'
+MANIFEST_FILE = 'manifest.json'
+SHARD_PERIODS = ('month', 'week')
+DEFAULT_SHARD_PERIOD = 'month'
+
+# Shard key for schedules whose date cannot be parsed
+UNDATED_SHARD = 'undated'
+
+def shard_period(iso_date: str, period: str) -> Tuple[str, str, str]:
+    """
+    Get the shard a date falls in.
+
+    Returns:
+        (shard key, first day, last day) with days as YYYY-MM-DD, e.g.
+        ('2025-07', '2025-07-01', '2025-07-31') or ('2025-W27', '2025-06-30', '2025-07-06');
+        (UNDATED_SHARD, '', '') for unparseable dates
+    """
+    try:
+        year, month, day = (int(part) for part in iso_date.split('-'))
+        value = date(year, month, day)
+    except ValueError:
+        return UNDATED_SHARD, '', ''
+
+    if period == 'week':
+        iso_year, iso_week, iso_weekday = value.isocalendar()
+        start = value - timedelta(days=iso_weekday - 1)
+        return f"{iso_year}-W{iso_week:02d}", start.isoformat(), (start + timedelta(days=6)).isoformat()
+
+    start = value.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return f"{year:04d}-{month:02d}", start.isoformat(), (next_month - timedelta(days=1)).isoformat()
+
+def _dump(data: Dict[str, Any]) -> bytes:
+    """Serialize an artifact compactly."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_atomic(filename: str, content: bytes) -> None:
+    """Write a file via a temporary file and rename, so readers never see it half written."""
+    directory = os.path.dirname(filename) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filename)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+class ArtifactWriter:
+    """
+    Streams a TC schedules artifact to disk one schedule at a time.
+
+    The file is written to a temporary file and renamed into place by
+    close(), so readers never see it half written.
+    """
+
+    def __init__(self, filename: str, schedule_fields: Sequence[str], appointment_fields: Sequence[str]):
+        self.filename = filename
+        self.schedules = 0
+        self.appointments = 0
+        self.rows = 0
+        self.hash = hashlib.sha256()
+        directory = os.path.dirname(filename) or '.'
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+        self.file = os.fdopen(fd, 'wb')
+        # Everything up to the schedules array, which add() fills in
+        self._write(_dump({
+            'version': ARTIFACT_VERSION,
+            'schedule_fields': list(schedule_fields),
+            'appointment_fields': list(appointment_fields),
+            'schedules': [],
+        })[:-len(b']}')])
+
+    def _write(self, content: bytes) -> None:
+        self.file.write(content)
+        self.hash.update(content)
+
+    def add(self, entry: List[Any]) -> None:
+        """Append a schedule entry ([schedule values, appointment rows, joined row count])."""
+        schedule_values, appointments, row_count = entry
+        self._write((b',' if self.schedules else b'') + _dump([schedule_values, len(appointments), appointments]))
+        self.schedules += 1
+        self.appointments += len(appointments)
+        self.rows += row_count
+
+    def close(self) -> str:
+        """Finish the file, move it into place and return its SHA-256."""
+        self._write(b']}')
+        self.file.close()
+        os.chmod(self.temp_path, 0o644)
+        os.replace(self.temp_path, self.filename)
+        return self.hash.hexdigest()
+
+    def abort(self) -> None:
+        """Discard the partly written file."""
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+class ShardWriter:
+    """Streams schedules into per-month or per-week shard artifacts and writes their manifest."""
+
+    def __init__(self, schedule_fields: Sequence[str], appointment_fields: Sequence[str],
+                 directory: str = SHARD_DIR, period: str = DEFAULT_SHARD_PERIOD):
+        self.schedule_fields = list(schedule_fields)
+        self.appointment_fields = list(appointment_fields)
+        self.directory = directory
+        self.period = period
+        self.date_index = self.schedule_fields.index('date')
+        self.tc_index = self.schedule_fields.index('tc_name')
+        self.tc_names = set()
+        self.start = self.end = ''
+        # Shards in the order they were started: (key, first day, last day, writer, sha256)
+        self.shards: List[List[Any]] = []
+        self.current: Optional[List[Any]] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _finish_current(self) -> None:
+        if self.current is not None:
+            self.current[4] = self.current[3].close()
+            self.current = None
+
+    def add(self, entry: List[Any]) -> None:
+        """Add a schedule entry; entries must arrive in date order."""
+        iso_date = format_date_for_comparison(entry[0][self.date_index])
+        key, start, end = shard_period(iso_date, self.period)
+        if self.current is None or self.current[0] != key:
+            # Schedules arrive in date order, so the previous shard is complete
+            if any(shard[0] == key for shard in self.shards):
+                raise ValueError(f"Schedules for shard {key} are not contiguous; rows must be in date order")
+            self._finish_current()
+            writer = ArtifactWriter(os.path.join(self.directory, f"tc_schedules_{key}.json"),
+                                    self.schedule_fields, self.appointment_fields)
+            self.current = [key, start, end, writer, '']
+            self.shards.append(self.current)
+        self.current[3].add(entry)
+        self.tc_names.add(entry[0][self.tc_index])
+        if key != UNDATED_SHARD:
+            self.start = min(self.start, iso_date) if self.start else iso_date
+            self.end = max(self.end, iso_date)
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish the shards and write the manifest.
+
+        Shards are written before the manifest, and shards no longer listed
+        are removed after it, so the manifest never points at a missing file.
+
+        Returns:
+            The manifest
+        """
+        self._finish_current()
+        manifest_shards = []
+        # Dated shards in date order, undated last
+        for key, start, end, writer, content_hash in sorted(self.shards,
+                                                            key=lambda shard: (shard[0] == UNDATED_SHARD, shard[0])):
+            manifest_shards.append({
+                'key': key,
+                'file': os.path.basename(writer.filename),
+                'start': start,
+                'end': end,
+                'schedules': writer.schedules,
+                'appointments': writer.appointments,
+                'rows': writer.rows,
+                'sha256': content_hash,
+            })
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'period': self.period,
+            'start': self.start,
+            'end': self.end,
+            'tc_names': sorted(self.tc_names),
+            'shards': manifest_shards,
+        }
+        write_atomic(os.path.join(self.directory, MANIFEST_FILE),
+                     json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        current = {shard['file'] for shard in manifest_shards}
+        for path in glob.glob(os.path.join(self.directory, 'tc_schedules_*.json')):
+            if os.path.basename(path) not in current:
+                os.remove(path)
+
+        return manifest
+
+    def abort(self) -> None:
+        """Discard the shard being written; finished shards replace the old ones but the manifest is kept."""
+        if self.current is not None:
+            self.current[3].abort()
+            self.current = None
+
+class TCScheduleAggregator:
+    """
+    Groups joined rows by schedule_id as they are written.
+
+    Rows must arrive ordered by (date, TC), as join_data.py writes them.
+    When a (date, TC) group ends, its schedules are passed in first-seen
+    order to each sink's add() and dropped.
+    """
+
+    def __init__(self, schedule_fields: Sequence[str], appointment_fields: Sequence[str], sinks: Sequence[Any]):
+        self.schedule_fields = list(schedule_fields)
+        self.appointment_fields = list(appointment_fields)
+        self.sinks = list(sinks)
+        self.split = len(self.schedule_fields)
+        self.date_index = self.schedule_fields.index('date')
+        self.tc_index = self.schedule_fields.index('tc_name')
+        self.date_ordinals: Dict[str, int] = {}
+        self.group_key: Optional[Tuple[int, str]] = None
+        # schedule_id -> [schedule values, appointment rows, joined row count] for the current group
+        self.group: Dict[str, List[Any]] = {}
+        self.schedule_count = 0
+
+    def _flush(self) -> None:
+        for entry in self.group.values():
+            for sink in self.sinks:
+                sink.add(entry)
+        self.schedule_count += len(self.group)
+        self.group = {}
+
+    def add(self, row: Tuple[str, ...]) -> None:
+        """Add a joined row (schedule columns followed by appointment columns)."""
+        schedule_values = row[:self.split]
+        entry = self.group.get(schedule_values[0])
+        if entry is None:
+            day = schedule_values[self.date_index]
+            ordinal = self.date_ordinals.get(day)
+            if ordinal is None:
+                ordinal = self.date_ordinals[day] = date_ordinal(format_date_for_comparison(day))
+            key = (ordinal, tc_sort_key(schedule_values[self.tc_index]))
+            if key != self.group_key:
+                if self.group_key is not None and key < self.group_key:
+                    raise ValueError("Joined rows are not ordered by date and TC")
+                self._flush()
+                self.group_key = key
+            entry = [schedule_values, [], 0]
+            self.group[schedule_values[0]] = entry
+        entry[2] += 1
+
+        appointment_values = row[self.split:self.split + len(self.appointment_fields)]
+        # Empty appointment rows only mark schedules without appointments
+        if appointment_values[0].strip():
+            entry[1].append(appointment_values)
+
+    def finish(self) -> int:
+        """Pass on the last group and return the number of schedules."""
+        self._flush()
+        return self.schedule_count
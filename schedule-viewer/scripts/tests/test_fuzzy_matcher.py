@@ -0,0 +1,79 @@
+"""Tests for scripts/fuzzy_matcher.py and the fuzzy fallback of scripts/join_data.py."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fuzzy_matcher import FuzzyLocationMatcher, similarity
+from join_data import ScheduleJoiner, build_appointment_index
+from join_records import AppointmentRecord, ScheduleRecord
+from location_store import LocationStore
+
+APPOINTMENT_LOCATIONS = [
+    'dr erica anand dds pc',
+    'sterling dental care',
+    'stein dental care',
+    'sparta family dental',
+    'advanced dental care - patchogue',
+]
+
+class FuzzyLocationMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = FuzzyLocationMatcher(APPOINTMENT_LOCATIONS)
+
+    def test_misspelling_is_recovered(self):
+        self.assertEqual(self.matcher.match('sterling dentl care'), [('sterling dental care', 0.95)])
+
+    def test_missing_suffix_is_recovered(self):
+        [(location, score)] = self.matcher.match('dr erica anand dds')
+        self.assertEqual(location, 'dr erica anand dds pc')
+        self.assertGreaterEqual(score, 0.85)
+
+    def test_different_practice_with_a_similar_name_is_rejected(self):
+        self.assertEqual(self.matcher.match('advanced dental care - bay shore'), [])
+
+    def test_exact_location_is_excluded(self):
+        self.assertEqual(self.matcher.match('stein dental care'), [('sterling dental care', 0.85)])
+
+    def test_similarity_bounds(self):
+        self.assertEqual(similarity('', ''), 1.0)
+        self.assertEqual(similarity('abc', 'abc'), 1.0)
+        self.assertEqual(similarity('abc', 'xyz', threshold=0.5), 0.0)
+
+class FuzzyJoinTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = LocationStore(os.path.join(directory.name, 'location_resolutions.json'))
+        self.store.load('locations', 'appointments')
+        self.appointment_index = build_appointment_index([AppointmentRecord({
+            'assigned_tc': 'Jen Hayes', 'appt_date': '2025-07-21', 'appt_time': '10H 0M 0S',
+            'appt_care_center_location': 'Sterling Dental Care',
+        })])
+        self.schedule = ScheduleRecord({
+            'id': '1', 'assignedUsers': 'Jen Hayes', 'startDate': '7/21/25', 'jobId': 'job',
+            'location': 'Sterling Dentl Care',
+        })
+
+    def join(self, fuzzy_matcher):
+        joiner = ScheduleJoiner([], self.store, fuzzy_matcher)
+        return joiner, joiner.join(self.schedule, self.appointment_index)
+
+    def test_misspelt_schedule_location_joins_its_appointments(self):
+        joiner, rows = self.join(FuzzyLocationMatcher(APPOINTMENT_LOCATIONS))
+        self.assertEqual(len(rows), 1)
+        self.assertIn('Sterling Dental Care', rows[0][1])
+        self.assertEqual(joiner.stats['fuzzy_location_joins'], 1)
+
+    def test_without_fuzzy_matching_no_appointments_join(self):
+        joiner, rows = self.join(None)
+        self.assertNotIn('Sterling Dental Care', rows[0][1])
+        self.assertEqual(joiner.stats['schedules_without_appointments'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
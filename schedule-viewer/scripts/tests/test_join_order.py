@@ -0,0 +1,67 @@
+"""Tests for the (date, TC) output order of scripts/join_data.py."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from join_data import ScheduleJoiner, output_group_key, stream_join
+from join_records import ScheduleRecord, tc_sort_key
+from location_store import LocationStore
+from schedule_store import ScheduleStore
+from tc_schedules import TCScheduleAggregator
+
+# The order the dashboard's localeCompare gives (checked against node)
+LOCALE_ORDER = ['adam Cole', 'Ava Ng', 'Ben Ortiz', 'Émile Roy', 'eva Lind', 'Eva Lind', 'éva Lind', 'Zoe Park']
+
+SHUFFLED = ['Zoe Park', 'éva Lind', 'Eva Lind', 'adam Cole', 'Ben Ortiz', 'Émile Roy', 'eva Lind', 'Ava Ng']
+
+def shift_rows(names, start_date='7/1/25'):
+    return [{'id': str(i), 'assignedUsers': name, 'startDate': start_date, 'location': 'Fairfax'}
+            for i, name in enumerate(names)]
+
+class TCOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.store = LocationStore(os.path.join(directory.name, 'location_resolutions.json'))
+        self.store.load('locations')
+        self.joiner = ScheduleJoiner([], self.store)
+
+    def test_sort_key_matches_locale_compare(self):
+        self.assertEqual(sorted(SHUFFLED, key=tc_sort_key), LOCALE_ORDER)
+
+    def test_join_orders_tcs_within_a_date(self):
+        schedules = [ScheduleRecord(row) for row in shift_rows(SHUFFLED)]
+        rows = self.joiner.join_all(schedules, {})
+        self.assertEqual([row[1] for row in rows], LOCALE_ORDER)
+
+    def test_stream_join_gives_the_same_order(self):
+        schedules = sorted((ScheduleRecord(row) for row in shift_rows(SHUFFLED)), key=output_group_key)
+        rows = list(stream_join(self.joiner, iter(schedules), iter([])))
+        self.assertEqual([row[1] for row in rows], LOCALE_ORDER)
+
+    def test_schedule_store_gives_the_same_order(self):
+        store = ScheduleStore(os.path.join(self.directory, 'schedule_store.sqlite'))
+        self.addCleanup(store.close)
+        store.upsert_shifts(shift_rows(SHUFFLED))
+        groups = [group[0].tc_name for group, _ in store.iter_join_groups()]
+        self.assertEqual(groups, LOCALE_ORDER)
+
+    def test_aggregator_accepts_the_order_and_rejects_code_point_order(self):
+        aggregator = TCScheduleAggregator(['schedule_id', 'tc_name', 'date'], ['appt_guid'], [])
+        for i, name in enumerate(LOCALE_ORDER):
+            aggregator.add((str(i), name, '7/1/25', ''))
+        self.assertEqual(aggregator.finish(), len(LOCALE_ORDER))
+
+        aggregator = TCScheduleAggregator(['schedule_id', 'tc_name', 'date'], ['appt_guid'], [])
+        with self.assertRaises(ValueError):
+            for i, name in enumerate(sorted(LOCALE_ORDER)):
+                aggregator.add((str(i), name, '7/1/25', ''))
+
+if __name__ == '__main__':
+    unittest.main()
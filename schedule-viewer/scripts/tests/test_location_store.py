@@ -0,0 +1,46 @@
+"""Tests for scripts/location_store.py."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from location_store import LocationStore, METHOD_EXACT_ADDRESS, METHOD_UNRESOLVED
+
+LOCATIONS = {'290 Ferry St., Malden, MA 02148': 'Malden Cosmetic Dentistry & Implants'}
+
+def resolve_address(address):
+    """Exact match on the address as given, like LocationIndex."""
+    location = LOCATIONS.get(address)
+    return (location, METHOD_EXACT_ADDRESS, 1.0) if location else (None, METHOD_UNRESOLVED, 0.0)
+
+class LocationStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'location_resolutions.json')
+
+    def resolve_all(self, addresses):
+        store = LocationStore(self.path)
+        store.load('locations')
+        results = [store.resolve(address, 'job', '', resolve_address) for address in addresses]
+        store.save()
+        return results
+
+    def test_stored_resolution_matches_a_fresh_one(self):
+        # Both spellings normalize alike but only one is a job_locations.csv Location
+        addresses = ['290 Ferry St, Malden, MA 02148', '290 Ferry St., Malden, MA 02148']
+        fresh = [resolve_address(address)[0] for address in addresses]
+        self.assertEqual(self.resolve_all(addresses), fresh)
+        self.assertEqual(self.resolve_all(reversed(addresses)), fresh[::-1])
+
+    def test_schedule_location_wins(self):
+        store = LocationStore(self.path)
+        store.load('locations')
+        self.assertEqual(store.resolve('1 Main St', 'job', 'Stamford', resolve_address), 'Stamford')
+
+if __name__ == '__main__':
+    unittest.main()
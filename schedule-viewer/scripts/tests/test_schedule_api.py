@@ -0,0 +1,81 @@
+"""Tests for the text search of scripts/schedule_api.py."""
+
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schedule_api import ScheduleIndex
+
+SCHEDULE_FIELDS = ['schedule_id', 'tc_name', 'date', 'start_time', 'end_time', 'schedule_location',
+                   'schedule_address', 'match_quality']
+APPOINTMENT_FIELDS = ['appt_guid', 'patient_full_name', 'appt_care_center_location']
+
+def make_index(schedules):
+    """Build an index from (tc, date, location, address, [(patient, care center location), ...]) tuples."""
+    artifact = {'version': 1, 'schedule_fields': SCHEDULE_FIELDS, 'appointment_fields': APPOINTMENT_FIELDS,
+                'schedules': []}
+    for i, (tc, day, location, address, appointments) in enumerate(schedules):
+        values = [str(i), tc, day, '9:00 AM', '5:00 PM', location, address, 'exact']
+        rows = [[f"{i}-{j}", patient, care_center] for j, (patient, care_center) in enumerate(appointments)]
+        artifact['schedules'].append([values, len(rows), rows])
+    return ScheduleIndex(artifact, 'test')
+
+class TextSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = make_index([
+            ('Abby Cao', '7/1/25', 'Dupont Circle', '1350 Connecticut Ave NW, Washington, DC', [
+                ('Jane Doe', 'Dupont Circle'),
+            ]),
+            ('Ben Ortiz', '7/1/25', 'Fairfax', '3580 Joseph Siewick Dr., Fairfax, VA', [
+                ('John Montgomery', 'Fairfax'),
+            ]),
+            ('Abby Cao', '7/2/25', 'St. Louis', '10 Main St., St. Louis, MO', []),
+            ('Cara Lee', '7/2/25', 'Stamford', '1 Main Street, Stamford, CT', [
+                ('Ann Stone', 'Stamford'),
+            ]),
+        ])
+
+    def search(self, text, **filters):
+        total, schedules = self.index.query(text=text, **filters)
+        self.assertEqual(total, len(schedules))
+        return [(schedule['tcName'], schedule['date']) for schedule in schedules]
+
+    def test_infix_query_matches_inside_a_word(self):
+        self.assertEqual(self.search('upont'), [('Abby Cao', '7/1/25')])
+        self.assertEqual(self.search('ont'), [('Abby Cao', '7/1/25'), ('Ben Ortiz', '7/1/25')])
+
+    def test_punctuation_is_part_of_the_query(self):
+        self.assertEqual(self.search('st.'), [('Abby Cao', '7/2/25')])
+        self.assertEqual(self.search('dr.,'), [('Ben Ortiz', '7/1/25')])
+        self.assertEqual(self.search('ave nw,'), [('Abby Cao', '7/1/25')])
+        self.assertEqual(self.search('.'), [('Ben Ortiz', '7/1/25'), ('Abby Cao', '7/2/25')])
+
+    def test_words_must_match_as_typed(self):
+        self.assertEqual(self.search('abby cao'), [('Abby Cao', '7/1/25'), ('Abby Cao', '7/2/25')])
+        self.assertEqual(self.search('cao abby'), [])
+        self.assertEqual(self.search('main st'), [('Abby Cao', '7/2/25'), ('Cara Lee', '7/2/25')])
+        self.assertEqual(self.search('main st,'), [])
+
+    def test_query_is_case_insensitive(self):
+        self.assertEqual(self.search('STAMFORD'), [('Cara Lee', '7/2/25')])
+
+    def test_appointment_fields_are_searched(self):
+        self.assertEqual(self.search('montgomery'), [('Ben Ortiz', '7/1/25')])
+        self.assertEqual(self.search('ann st'), [('Cara Lee', '7/2/25')])
+
+    def test_short_query_uses_the_substring_check(self):
+        self.assertEqual(self.search('z'), [('Ben Ortiz', '7/1/25')])
+        self.assertEqual(self.search('xq'), [])
+
+    def test_text_combines_with_other_filters(self):
+        self.assertEqual(self.search('st', tc='Abby Cao'), [('Abby Cao', '7/2/25')])
+        self.assertEqual(self.search('main', start=date(2025, 7, 2), end=date(2025, 7, 2)),
+                         [('Abby Cao', '7/2/25'), ('Cara Lee', '7/2/25')])
+        self.assertEqual(self.search('fairfax', start=date(2025, 7, 2)), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tests for scripts/schedule_store.py."""
+
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schedule_store import ScheduleStore, SHIFT_COLUMNS
+
+def shift(shift_id, tc_name, start_date='7/1/25'):
+    return {'id': shift_id, 'assignedUsers': tc_name, 'startDate': start_date, 'shiftName': 'Scheduler'}
+
+class ShiftsCsvSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv_path = os.path.join(directory.name, 'schedule_data.csv')
+        self.store = ScheduleStore(os.path.join(directory.name, 'schedule_store.sqlite'))
+        self.addCleanup(self.store.close)
+
+    def write_csv(self, shifts):
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, SHIFT_COLUMNS, restval='')
+            writer.writeheader()
+            writer.writerows(shifts)
+
+    def stored(self):
+        out = io.StringIO()
+        self.store.write_shifts_csv(out)
+        return [(row['id'], row['assignedUsers']) for row in csv.DictReader(io.StringIO(out.getvalue()))]
+
+    def test_missing_csv_leaves_the_store_alone(self):
+        self.store.upsert_shifts([shift('1', 'Abby Cao')])
+        self.assertFalse(self.store.sync_shifts_csv(self.csv_path))
+        self.assertEqual(self.stored(), [('1', 'Abby Cao')])
+
+    def test_unchanged_csv_is_not_reloaded(self):
+        self.write_csv([shift('1', 'Abby Cao')])
+        self.assertTrue(self.store.sync_shifts_csv(self.csv_path))
+        self.assertFalse(self.store.sync_shifts_csv(self.csv_path))
+
+    def test_csv_rewritten_without_the_store_replaces_its_shifts(self):
+        self.write_csv([shift('1', 'Abby Cao'), shift('2', 'Ben Ortiz')])
+        self.store.sync_shifts_csv(self.csv_path)
+
+        # A refresh without --sqlite: shift 1 deleted, 2 reassigned, 3 added before it
+        self.write_csv([shift('3', 'Cara Lee'), shift('2', 'Abby Cao')])
+        self.assertTrue(self.store.sync_shifts_csv(self.csv_path))
+        self.assertEqual(self.stored(), [('3', 'Cara Lee'), ('2', 'Abby Cao')])
+
+    def test_recorded_export_is_not_reloaded(self):
+        self.store.upsert_shifts([shift('1', 'Abby Cao')])
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            self.store.write_shifts_csv(f)
+        self.store.record_shifts_csv(self.csv_path)
+        self.store.upsert_shifts([shift('2', 'Ben Ortiz')])
+        self.assertFalse(self.store.sync_shifts_csv(self.csv_path))
+        self.assertEqual(self.stored(), [('1', 'Abby Cao'), ('2', 'Ben Ortiz')])
+
+if __name__ == '__main__':
+    unittest.main()